@@ -0,0 +1,143 @@
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import click
+from tabulate import tabulate
+
+from aeternum.core.bench import (
+    BenchmarkReport,
+    benchmark_step,
+    current_commit,
+    format_duration,
+)
+from aeternum.core.constants import ProjectFiles
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.models import ProjectSpec
+from aeternum.core.templating import parse_variables
+
+logger = logging.getLogger(__name__)
+
+BENCH_TABLE_HEADERS = [
+    "STEP",
+    "RUNS",
+    "MEAN",
+    "MEDIAN",
+    "STDDEV",
+    "MIN",
+    "MAX",
+    "OUTLIERS",
+]
+
+
+@click.command("bench")
+@click.option(
+    "--file",
+    "-f",
+    type=click.Path(exists=True),
+    help="Path to YAML config file",
+    default=ProjectFiles.SPEC_FILE,
+)
+@click.option(
+    "--var",
+    "variables",
+    multiple=True,
+    help="Spec template variable as KEY=VALUE, may be repeated.",
+)
+@click.option(
+    "--step",
+    "step_names",
+    multiple=True,
+    help="Benchmark only this step, may be repeated. Defaults to every step.",
+)
+@click.option(
+    "--runs",
+    "-n",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Number of timed runs of each step.",
+)
+@click.option(
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="Number of untimed runs of each step before the timed ones.",
+)
+@click.option(
+    "--export-json",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+    help="Write the statistics and every sample to this JSON file.",
+)
+@click.option(
+    "--export-csv",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+    help="Write the statistics of every step to this CSV file.",
+)
+def bench(
+    file: str,
+    variables: Tuple[str, ...],
+    step_names: Tuple[str, ...],
+    runs: int,
+    warmup: int,
+    export_json: Optional[Path],
+    export_csv: Optional[Path],
+) -> None:
+    """Time build steps over repeated runs."""
+    project = ProjectSpec.load_from_yaml(file, parse_variables(variables))
+    steps = project.build_stage.steps
+    if step_names:
+        steps_by_name = {step.name: step for step in steps}
+        unknown = [name for name in step_names if name not in steps_by_name]
+        if unknown:
+            raise AeternumInputError(
+                f"Unknown steps: {', '.join(unknown)}",
+                f"Steps of {project.name}: {', '.join(steps_by_name)}",
+            )
+        steps = [steps_by_name[name] for name in dict.fromkeys(step_names)]
+    piped = [step.name for step in steps if step.stdin_from is not None]
+    if piped:
+        raise AeternumInputError(
+            f"Cannot benchmark steps reading another step's output: {', '.join(piped)}"
+        )
+
+    click.echo(
+        f"Benchmarking {len(steps)} steps of {project.name} v{project.version} "
+        + f"({warmup} warmup, {runs} timed runs each)"
+    )
+    results = []
+    for step in steps:
+        click.echo(f"Running '{step.name}'...")
+        results.append(benchmark_step(step, project.shell, runs, warmup))
+    report = BenchmarkReport(
+        project.name, project.version, results, warmup, current_commit()
+    )
+
+    click.echo(
+        tabulate(
+            [
+                [
+                    result.name,
+                    result.runs,
+                    format_duration(result.mean),
+                    format_duration(result.median),
+                    format_duration(result.stddev),
+                    format_duration(result.min),
+                    format_duration(result.max),
+                    len(result.outliers),
+                ]
+                for result in results
+            ],
+            headers=BENCH_TABLE_HEADERS,
+            tablefmt="github",
+        )
+    )
+    if export_json is not None:
+        report.write_json(export_json)
+        click.echo(f"Benchmark results saved to {export_json}")
+    if export_csv is not None:
+        report.write_csv(export_csv)
+        click.echo(f"Benchmark results saved to {export_csv}")
@@ -1,43 +1,27 @@
+import json
 import logging
-from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
 import click
+from tabulate import tabulate
 
 from aeternum.core.constants import ConsoleIcons, ProjectFiles
-from aeternum.core.output import run_validation_command
+from aeternum.core.requirements import (
+    DEFAULT_DOCTOR_JOBS,
+    AeternumRequirement,
+    ExpectedBinary,
+    ExpectedFile,
+    FleetReport,
+    RequirementCache,
+    check_workspaces,
+    default_requirements,
+    discover_workspaces,
+)
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class AeternumRequirement:
-    name: str
-    impact_if_missing: str
-    help_text: str
-
-
-@dataclass
-class ExpectedFile(AeternumRequirement):
-    path_in_repo: str
-
-
-@dataclass
-class ExpectedBinary(AeternumRequirement):
-    command: str
-    args: Optional[List[str]] = None
-    ready: bool = None
-
-    def __post_init__(self) -> None:
-        cmd_validation = None
-        if self.args is None:
-            cmd_validation = run_validation_command(self.command)
-        else:
-            cmd_validation = run_validation_command(self.command, *self.args)
-        self.ready = cmd_validation
-
-
 @click.command("doctor")
 @click.option(
     "--file",
@@ -46,28 +30,51 @@ class ExpectedBinary(AeternumRequirement):
     help="Path to YAML config file",
     default=ProjectFiles.SPEC_FILE,
 )
-def doctor(file: Path) -> None:
+@click.option(
+    "--recursive",
+    "-r",
+    "root",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    required=False,
+    help="Validate every workspace found below this directory.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=DEFAULT_DOCTOR_JOBS,
+    show_default=True,
+    help="Maximum number of concurrent checks with --recursive.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    help="Report format of --recursive.",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Probe every requirement again instead of using cached results.",
+    default=False,
+)
+def doctor(
+    file: Path,
+    root: Optional[Path],
+    jobs: int,
+    output_format: str,
+    refresh: bool,
+) -> None:
     """Validate current workspace for Aeternum CI compatibility."""
-    required_bins = [
-        ExpectedBinary(
-            name="Git",
-            command="git",
-            args=["rev-parse", "--is-inside-work-tree"],
-            impact_if_missing="Cannot perform build checks without a Git repository",
-            help_text="Ensure you are re in a Git repository",
-        ),
-    ]
-    required_files = [
-        ExpectedFile(
-            name="Aeternum YAML config file",
-            path_in_repo=file,
-            impact_if_missing="Cannot build project without configuration file",
-            help_text=f"Create an {ProjectFiles.SPEC_FILE} file in your project.",
-        ),
-    ]
+    if root is not None:
+        __doctor_fleet(root, Path(file).name, jobs, output_format, refresh)
+        return
 
     click.echo("Aeternum Doctor:")
-    fixes_needed = validate_requirements([*required_bins, *required_files])
+    cache = RequirementCache.for_workspace(Path.cwd())
+    fixes_needed = validate_requirements(default_requirements(file), cache, refresh)
+    cache.save()
     click.echo("-" * 20)
     if fixes_needed:
         click.echo(f"Doctor found {len(fixes_needed)} fixes needed:")
@@ -77,14 +84,72 @@ def doctor(file: Path) -> None:
         click.echo(f"All dependencies ready!")
 
 
-def validate_requirements(requirements: List[AeternumRequirement]) -> List[str]:
+def __doctor_fleet(
+    root: Path, spec_file: str, jobs: int, output_format: str, refresh: bool
+) -> None:
+    workspaces = discover_workspaces(root, spec_file)
+    report = check_workspaces(
+        workspaces,
+        spec_file,
+        jobs,
+        cache=RequirementCache.for_workspace(root),
+        refresh=refresh,
+    )
+    if output_format == "json":
+        click.echo(json.dumps(report.to_dict(), indent=2))
+        return
+    if not workspaces:
+        click.echo(f"No workspaces with {spec_file} found in {root}")
+        return
+    click.echo(__format_fleet_report(report, root))
+    click.echo("-" * 20)
+    failing = [
+        workspace
+        for workspace, statuses in report.workspaces()
+        if not all(status.ready for status in statuses)
+    ]
+    if failing:
+        click.secho(
+            f"Doctor found {len(report.failures)} fixes needed in "
+            + f"{len(failing)} of {len(workspaces)} workspaces",
+            fg="yellow",
+        )
+    else:
+        click.echo(f"All {len(workspaces)} workspaces ready!")
+
+
+def __format_fleet_report(report: FleetReport, root: Path) -> str:
+    rows = []
+    for workspace, statuses in report.workspaces():
+        missing = [status.requirement for status in statuses if not status.ready]
+        rows.append(
+            [
+                str(Path(workspace).relative_to(root)),
+                ConsoleIcons.CROSS if missing else ConsoleIcons.CHECK,
+                ", ".join(requirement.name for requirement in missing) or "-",
+                "; ".join(requirement.help_text for requirement in missing) or "-",
+            ]
+        )
+    return tabulate(
+        rows,
+        headers=["WORKSPACE", "READY", "MISSING", "FIX"],
+        tablefmt="simple",
+    )
+
+
+def validate_requirements(
+    requirements: List[AeternumRequirement],
+    cache: Optional[RequirementCache] = None,
+    refresh: bool = False,
+) -> List[str]:
     fixes = []
     for req in requirements:
-        ready_condition = None
-        if isinstance(req, ExpectedFile):
-            ready_condition = Path(req.path_in_repo).exists()
-        elif isinstance(req, ExpectedBinary):
+        if isinstance(req, ExpectedBinary) and req.ready is not None:
             ready_condition = req.ready
+        elif isinstance(req, (ExpectedFile, ExpectedBinary)) and cache is not None:
+            ready_condition = cache.probe(req, Path.cwd(), refresh)
+        elif isinstance(req, (ExpectedFile, ExpectedBinary)):
+            ready_condition = req.probe(Path.cwd())
         else:
             raise TypeError(f"Unsupported requirement type: {type(req).__name__}")
 
@@ -0,0 +1,44 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from aeternum.core.artifacts import (
+    ARTIFACT_DIR_ENV,
+    ArtifactStore,
+    default_artifact_dir,
+)
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY: int = 24 * 60 * 60
+
+
+@click.command("gc")
+@click.option(
+    "--artifact-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    required=False,
+    envvar=ARTIFACT_DIR_ENV,
+    help="Directory of the artifact store.",
+)
+@click.option(
+    "--max-age",
+    type=click.FloatRange(min=0),
+    required=False,
+    help="Also remove stored step outputs not used for this many days.",
+)
+def collect_garbage(artifact_dir: Optional[Path], max_age: Optional[float]) -> None:
+    """Remove unused step outputs from the artifact store."""
+    store = ArtifactStore(artifact_dir or default_artifact_dir())
+    if not store.root.is_dir():
+        click.echo(f"No artifact store found at {store.root}")
+        return
+    collection = store.gc(max_age * SECONDS_PER_DAY if max_age is not None else None)
+    logger.info(f"Collected garbage in artifact store {store.root}")
+    click.echo(
+        f"Removed {collection.records_removed} stored step outputs and "
+        + f"{collection.objects_removed} unreferenced files, "
+        + f"freed {collection.bytes_freed / 1024**2:.1f} MiB"
+    )
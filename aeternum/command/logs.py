@@ -0,0 +1,28 @@
+import logging
+
+import click
+
+from aeternum.core.capture import copy_step_output, find_step_output
+
+logger = logging.getLogger(__name__)
+
+
+@click.group("logs")
+def logs() -> None:
+    """Inspect the captured output of exported runs."""
+
+
+@logs.command("show")
+@click.argument("run", type=str)
+@click.argument("step", type=str)
+def show_step_output(run: str, step: str) -> None:
+    """Print the captured output of a step.
+
+    RUN is a run id, such as 2024-08-01_12-34-56, or the path of an execution
+    log exported with --save-output. STEP is a step index or name.
+    """
+    output_file = find_step_output(run, step)
+    logger.info(f"Reading step output from {output_file}")
+    stdout = click.get_binary_stream("stdout")
+    copy_step_output(output_file, stdout)
+    stdout.flush()
@@ -0,0 +1,32 @@
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import click
+
+from aeternum.core.execution_log import ExecutionLog, merge_execution_logs
+
+logger = logging.getLogger(__name__)
+
+
+@click.command("merge-logs")
+@click.argument(
+    "logs", nargs=-1, required=True, type=click.Path(exists=True, path_type=Path)
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(path_type=Path),
+    required=False,
+    help="Write the merged report to this file instead of stdout.",
+)
+def merge_logs(logs: Tuple[Path, ...], output: Optional[Path]) -> None:
+    """Combine execution logs of sharded runs into one report."""
+    execution_logs = [ExecutionLog.load(log) for log in logs]
+    merged = merge_execution_logs(execution_logs)
+    logger.info(f"Merged {len(execution_logs)} execution logs")
+    if output is None:
+        click.echo(merged.render(), nl=False)
+        return
+    merged.write(output)
+    click.echo(f"Merged execution log saved to {output.resolve()}")
@@ -0,0 +1,41 @@
+import logging
+from typing import Tuple
+
+import click
+import yaml
+
+from aeternum.core.constants import ProjectFiles
+from aeternum.core.templating import load_spec_document, parse_variables
+from aeternum.core.writer import OrderedDumper
+
+logger = logging.getLogger(__name__)
+
+
+@click.command("render")
+@click.option(
+    "--file",
+    "-f",
+    type=click.Path(exists=True),
+    help="Path to YAML config file",
+    default=ProjectFiles.SPEC_FILE,
+)
+@click.option(
+    "--var",
+    "variables",
+    multiple=True,
+    help="Template variable as KEY=VALUE, may be repeated.",
+)
+def render_spec(file: str, variables: Tuple[str, ...]) -> None:
+    """Print a spec with its templates rendered and includes expanded."""
+    document = load_spec_document(file, parse_variables(variables))
+    logger.info(f"Rendered project spec {file}")
+    click.echo(
+        yaml.dump(
+            document,
+            Dumper=OrderedDumper,
+            sort_keys=False,
+            indent=2,
+            default_flow_style=False,
+        ),
+        nl=False,
+    )
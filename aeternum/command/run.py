@@ -1,11 +1,30 @@
+import json
 import logging
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 import click
 
+from aeternum.core.artifacts import ARTIFACT_DIR_ENV, ArtifactStore
+from aeternum.core.cache import (
+    CACHE_DIR_ENV,
+    CACHE_MAX_SIZE_ENV,
+    open_cache_store,
+    parse_size,
+)
 from aeternum.core.constants import ProjectFiles
-from aeternum.core.errors import AeternumInputError
+from aeternum.core.errors import AeternumInputError, AeternumValidationError
 from aeternum.core.models import ProjectSpec
+from aeternum.core.plan import PlanCache
+from aeternum.core.requirements import preflight
+from aeternum.core.sharding import ShardSpec
+from aeternum.core.templating import load_spec_document, parse_variables
+from aeternum.core.timings import (
+    DEFAULT_MIN_DELTA,
+    RegressionGate,
+    load_timings,
+    parse_percentage,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +37,12 @@ logger = logging.getLogger(__name__)
     help="Path to YAML config file",
     default=ProjectFiles.SPEC_FILE,
 )
+@click.option(
+    "--var",
+    "variables",
+    multiple=True,
+    help="Spec template variable as KEY=VALUE, may be repeated.",
+)
 @click.option(
     "--dry-run",
     is_flag=True,
@@ -34,7 +59,7 @@ logger = logging.getLogger(__name__)
 @click.option(
     "--save-output",
     is_flag=True,
-    help="Save execution output to file.",
+    help="Save the execution log and the output of every step to files.",
     default=False,
 )
 @click.option(
@@ -49,18 +74,166 @@ logger = logging.getLogger(__name__)
     required=False,
     help="Run only specific step types (e.g. 'build', 'test', or 'deploy').",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    required=False,
+    help="Serve a make jobserver with this many slots to build step processes.",
+)
+@click.option(
+    "--shard",
+    type=str,
+    required=False,
+    help="Run only shard i of n of the selected steps (e.g. '2/4').",
+)
+@click.option(
+    "--timings",
+    type=click.Path(exists=True, path_type=Path),
+    required=False,
+    help="Recorded step durations used to balance shards.",
+)
+@click.option(
+    "--record-timings",
+    type=click.Path(path_type=Path),
+    required=False,
+    help="Record measured step durations to this file.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    help="Output format; 'json' prints the execution plan of a dry run.",
+)
+@click.option(
+    "--keep-going/--fail-fast",
+    "-k",
+    help="Keep running steps that do not depend on a failed step, or stop at "
+    + "the first failure. Defaults to the strategy failure_policy.",
+    default=None,
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip steps completed by the last failed or interrupted run of this spec.",
+    default=False,
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    required=False,
+    envvar=CACHE_DIR_ENV,
+    help="Directory storing dependency caches, may be shared over NFS.",
+)
+@click.option(
+    "--cache-max-size",
+    type=str,
+    required=False,
+    envvar=CACHE_MAX_SIZE_ENV,
+    help="Evict least recently used caches beyond this size (e.g. '10G').",
+)
+@click.option(
+    "--artifact-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    required=False,
+    envvar=ARTIFACT_DIR_ENV,
+    help="Directory storing the outputs of steps that declare them.",
+)
+@click.option(
+    "--compress-output/--no-compress-output",
+    default=True,
+    help="Gzip-compress the step output kept with --save-output.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Show step output as it is produced instead of after each step.",
+    default=False,
+)
+@click.option(
+    "--dashboard",
+    is_flag=True,
+    help="Show a live view of running steps and stream their output.",
+    default=False,
+)
+@click.option(
+    "--sample-interval",
+    type=click.FloatRange(min=0.01),
+    required=False,
+    help="Sample the CPU, memory and I/O of step processes every this many "
+    + "seconds (Linux only).",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+    help="Fail when steps got slower than their durations in this timings file.",
+)
+@click.option(
+    "--max-regression",
+    type=str,
+    default="20%",
+    show_default=True,
+    help="Slowdown against the baseline a step may have (e.g. '20%').",
+)
+@click.option(
+    "--min-delta",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_MIN_DELTA,
+    show_default=True,
+    help="Slowdown in seconds below which a step never counts as regressed.",
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Blend the step durations of a successful build without regressions "
+    + "into the baseline.",
+    default=False,
+)
+@click.option(
+    "--preflight",
+    "run_preflight",
+    is_flag=True,
+    help="Check the workspace requirements before building, like 'doctor'.",
+    default=False,
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Probe the requirements of --preflight again instead of using the cache.",
+    default=False,
+)
 def run_scripts(
     file: str,
+    variables: Tuple[str, ...],
     dry_run: bool,
     quiet: bool,
     save_output: bool,
     include: Optional[Tuple[str, ...]],
     exclude: Optional[Tuple[str, ...]],
+    jobs: Optional[int],
+    shard: Optional[str],
+    timings: Optional[Path],
+    record_timings: Optional[Path],
+    output_format: str,
+    keep_going: Optional[bool],
+    resume: bool,
+    cache_dir: Optional[Path],
+    cache_max_size: Optional[str],
+    artifact_dir: Optional[Path],
+    compress_output: bool,
+    stream: bool,
+    dashboard: bool,
+    sample_interval: Optional[float],
+    baseline: Optional[Path],
+    max_regression: str,
+    min_delta: float,
+    update_baseline: bool,
+    run_preflight: bool,
+    refresh: bool,
 ) -> None:
     """Initialize and build a project from specification file."""
-    project = ProjectSpec.load_from_yaml(file)
-    logger.info(f"Loaded project: {project.name} {project.version}")
-    project.build_stage.validate(project.strict_build)
     common_step_types = list(set(include) & set(exclude))
     if len(common_step_types) > 0:
         raise AeternumInputError(
@@ -68,10 +241,115 @@ def run_scripts(
             + "and exclude options.",
             help_text=f"Conflicting filters: {common_step_types}",
         )
+    if output_format == "json" and not dry_run:
+        raise AeternumInputError(
+            "JSON output is only available for dry runs",
+            "Pass --dry-run together with --format json.",
+        )
+    shard_spec = ShardSpec.parse(shard) if shard else None
+    max_cache_size = parse_size(cache_max_size) if cache_max_size else None
+    recorded_timings = load_timings(timings) if timings else None
+    template_variables = parse_variables(variables)
+    regression_gate = __regression_gate(
+        baseline, max_regression, min_delta, update_baseline
+    )
+    if output_format == "json":
+        click.echo(
+            __get_plan_json(
+                Path(file),
+                template_variables,
+                include,
+                exclude,
+                shard_spec,
+                recorded_timings,
+            )
+        )
+        return
+
+    if run_preflight:
+        __preflight(Path(file), refresh)
+    project = ProjectSpec.load_from_yaml(file, template_variables)
+    click.echo(f"Loaded project: {project.name} v{project.version}")
+    logger.info(f"Loaded project: {project.name} {project.version}")
+    project.build_stage.validate(project.strict_build)
     project.build(
         dry_run_mode=dry_run,
         quiet_output=quiet,
         export_logs=save_output,
         include_filters=include,
         exclude_filters=exclude,
+        jobs=jobs,
+        shard=shard_spec,
+        timings=recorded_timings,
+        record_timings=record_timings,
+        dashboard=dashboard,
+        keep_going=keep_going,
+        resume=resume,
+        cache_store=open_cache_store(cache_dir, max_cache_size),
+        artifact_store=ArtifactStore(artifact_dir) if artifact_dir else None,
+        compress_output=compress_output,
+        stream=stream,
+        regression_gate=regression_gate,
+        update_baseline=baseline if update_baseline else None,
+        sample_interval=sample_interval,
     )
+
+
+def __regression_gate(
+    baseline: Optional[Path],
+    max_regression: str,
+    min_delta: float,
+    update_baseline: bool,
+) -> Optional[RegressionGate]:
+    if baseline is None:
+        if update_baseline:
+            raise AeternumInputError(
+                "--update-baseline needs a baseline file",
+                "Pass the file to update with --baseline.",
+            )
+        return None
+    # A baseline created by --update-baseline starts out empty
+    recorded = (
+        load_timings(baseline) if baseline.exists() or not update_baseline else {}
+    )
+    return RegressionGate(recorded, parse_percentage(max_regression), min_delta)
+
+
+def __preflight(spec_file: Path, refresh: bool) -> None:
+    """Fail before building if the workspace misses a requirement."""
+    missing = preflight(spec_file, refresh)
+    if missing:
+        raise AeternumValidationError(
+            "Preflight failed, missing: "
+            + ", ".join(requirement.name for requirement in missing),
+            " ".join(requirement.help_text for requirement in missing),
+        )
+
+
+def __get_plan_json(
+    spec_file: Path,
+    variables: Dict[str, str],
+    include: Tuple[str, ...],
+    exclude: Tuple[str, ...],
+    shard: Optional[ShardSpec],
+    timings: Optional[Dict[str, float]],
+) -> str:
+    """Serialize the execution plan, reusing the cached plan of an unchanged spec."""
+    cache = PlanCache(Path(spec_file.resolve().parent, ProjectFiles.STATE_DIR, "plans"))
+    shard_label = str(shard) if shard else None
+    document = load_spec_document(spec_file, variables)
+    # Keyed on the expanded spec, so changed fragments invalidate the plan
+    spec_content = json.dumps(document, sort_keys=True, default=str).encode("utf-8")
+    cache_key = PlanCache.key(spec_content, include, exclude, shard_label, timings)
+    plan_json = cache.get(cache_key)
+    if plan_json is not None:
+        # Working directories may have been removed since the plan was cached
+        ProjectSpec.check_document(document)
+        logger.debug(f"Using cached execution plan {cache_key[:12]}")
+        return plan_json
+
+    project = ProjectSpec.load_from_yaml(spec_file, variables)
+    project.build_stage.validate(project.strict_build)
+    plan_json = project.plan(include, exclude, shard, timings).to_json()
+    cache.put(cache_key, plan_json)
+    return plan_json
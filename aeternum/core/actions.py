@@ -0,0 +1,198 @@
+"""Built-in filesystem and template actions.
+
+Steps declaring an `action` run it natively instead of spawning a shell for
+`cp -r`, `mv`, `rm -rf`, `mkdir -p` or a templating tool. Paths come from the
+step `args` and are relative to its working directory; sources may be glob
+patterns. Directory trees are copied by a thread pool, since the copies are
+dominated by system calls that release the GIL.
+
+`render` expands a Jinja2 template with the step `params` as context. Compiled
+templates are cached per template directory and reloaded when the file
+changes, so rendering the same template in many steps compiles it once.
+"""
+import glob
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+from aeternum.core.capture import CapturedOutput
+from aeternum.core.spawn import ProcessResult
+
+COPY_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
+
+ActionHandler = Callable[[Sequence[str], Mapping[str, Any], Path], str]
+
+
+class ActionError(Exception):
+    """An action could not be completed; the message is shown as stderr."""
+
+
+def _expand(patterns: Sequence[str], cwd: Path, required: bool = True) -> List[Path]:
+    """Resolve source paths, expanding glob patterns like a shell would."""
+    paths: List[Path] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, root_dir=cwd, recursive=True))
+            if not matches and required:
+                raise ActionError(f"No files match '{pattern}'")
+            paths.extend(Path(cwd, match) for match in matches)
+        else:
+            path = Path(cwd, pattern)
+            if required and not os.path.lexists(path):
+                raise ActionError(f"No such file or directory: '{pattern}'")
+            paths.append(path)
+    return paths
+
+
+def _targets(args: Sequence[str], cwd: Path) -> List[Tuple[Path, Path]]:
+    """Pair each source with its destination, following cp/mv semantics."""
+    if len(args) < 2:
+        raise ActionError("Expected one or more sources and a destination")
+    sources = _expand(args[:-1], cwd)
+    destination = Path(cwd, args[-1])
+    if len(sources) > 1 or args[-1].endswith("/"):
+        destination.mkdir(parents=True, exist_ok=True)
+    if destination.is_dir():
+        return [(source, Path(destination, source.name)) for source in sources]
+    return [(sources[0], destination)]
+
+
+def copy_tree(source: Path, destination: Path) -> int:
+    """Copy a directory tree, copying files in parallel.
+
+    Returns:
+        int: Number of files copied
+    """
+    files = []
+    for root, dirs, names in os.walk(source):
+        target_root = Path(destination, os.path.relpath(root, source))
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in [*dirs, *names]:
+            path = Path(root, name)
+            if path.is_symlink():
+                target = Path(target_root, name)
+                if os.path.lexists(target):
+                    target.unlink()
+                os.symlink(os.readlink(path), target)
+            elif name in names:
+                files.append((path, Path(target_root, name)))
+        # Symlinked directories are recreated as links, not descended into
+        dirs[:] = [name for name in dirs if not Path(root, name).is_symlink()]
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        # list() re-raises the first copy error
+        list(pool.map(lambda pair: shutil.copy2(*pair), files))
+    shutil.copystat(source, destination)
+    return len(files)
+
+
+def copy(args: Sequence[str], params: Mapping[str, Any], cwd: Path) -> str:
+    copied = 0
+    for source, destination in _targets(args, cwd):
+        if source.is_dir() and not source.is_symlink():
+            copied += copy_tree(source, destination)
+        else:
+            shutil.copy2(source, destination, follow_symlinks=False)
+            copied += 1
+    return f"Copied {copied} files to {args[-1]}"
+
+
+def move(args: Sequence[str], params: Mapping[str, Any], cwd: Path) -> str:
+    targets = _targets(args, cwd)
+    for source, destination in targets:
+        shutil.move(source, destination)
+    return f"Moved {len(targets)} paths to {args[-1]}"
+
+
+def remove(args: Sequence[str], params: Mapping[str, Any], cwd: Path) -> str:
+    paths = _expand(args, cwd, required=False)
+    for path in paths:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            path.unlink()
+    return f"Removed {len(paths)} paths"
+
+
+def mkdir(args: Sequence[str], params: Mapping[str, Any], cwd: Path) -> str:
+    for directory in args:
+        Path(cwd, directory).mkdir(parents=True, exist_ok=True)
+    return f"Created {len(args)} directories"
+
+
+@lru_cache(maxsize=32)
+def template_environment(search_path: str) -> Any:
+    """Jinja2 environment, and with it the compiled templates, of a directory."""
+    # Imported here so commands that render nothing do not pay for the import
+    import jinja2
+
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(search_path),
+        undefined=jinja2.StrictUndefined,
+        keep_trailing_newline=True,
+        auto_reload=True,
+    )
+
+
+def render(args: Sequence[str], params: Mapping[str, Any], cwd: Path) -> str:
+    if len(args) != 2:
+        raise ActionError("Expected a template and a destination")
+    import jinja2
+
+    template_path = Path(cwd, args[0]).resolve()
+    environment = template_environment(str(template_path.parent))
+    try:
+        template = environment.get_template(template_path.name)
+    except jinja2.TemplateNotFound:
+        raise ActionError(f"Template not found: '{args[0]}'")
+    content = template.render(env=os.environ, **params)
+    destination = Path(cwd, args[1])
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_text(content)
+    return f"Rendered {args[0]} to {args[1]}"
+
+
+ACTIONS: Dict[str, ActionHandler] = {
+    "copy": copy,
+    "move": move,
+    "remove": remove,
+    "mkdir": mkdir,
+    "render": render,
+}
+
+
+def run_action(
+    name: str,
+    args: Sequence[str],
+    params: Mapping[str, Any],
+    cwd: Path,
+    capture: CapturedOutput,
+) -> ProcessResult:
+    """Run a built-in action, reporting like a process would.
+
+    Args:
+        name (str): Action name, a key of ACTIONS
+        args (Sequence[str]): Paths the action works on
+        params (Mapping[str, Any]): Template context of 'render'
+        cwd (Path): Directory the paths are relative to
+        capture (CapturedOutput): Files receiving the summary and errors
+
+    Returns:
+        ProcessResult: Exit code 0 on success and 1 on failure, and duration
+    """
+    start_time = perf_counter()
+    returncode = 0
+    try:
+        summary = ACTIONS[name](args, params, Path(cwd))
+        capture.stdout.write(f"{summary}\n".encode("utf-8"))
+    except (ActionError, OSError) as err:
+        capture.stderr.write(f"{name}: {err}\n".encode("utf-8"))
+        returncode = 1
+    except Exception as err:
+        # Template syntax and rendering errors, e.g. an undefined variable
+        capture.stderr.write(f"{name}: {type(err).__name__}: {err}\n".encode("utf-8"))
+        returncode = 1
+    return ProcessResult(returncode, None, None, perf_counter() - start_time)
@@ -0,0 +1,250 @@
+"""Content-addressed store of step outputs.
+
+Steps that declare `outputs` have them stored after a successful run under a
+key derived from the step invocation. Each file is stored once per content
+hash as a read-only object. Restoring clones objects with a reflink where the
+filesystem supports it and copies them otherwise, so restored files are
+private and writable like the ones the step would have written.
+
+Readers and writers hold a shared lock on the store while garbage collection
+holds an exclusive one, so objects are never removed while in use. New files
+are written to temporary names and renamed into place, which keeps concurrent
+writers of the same object safe.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from aeternum.core.cache import atomic_output, atomic_write, store_lock, walk_paths
+from aeternum.core.constants import ProjectFiles
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR_ENV: str = "AETERNUM_ARTIFACT_DIR"
+RECORD_FORMAT_VERSION: int = 1
+
+# ioctl request to share the extents of a file (Linux btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+_CHUNK_SIZE = 1024 * 1024
+
+
+def default_artifact_dir() -> Path:
+    """Artifact store location from the environment, or the project state dir."""
+    configured = os.environ.get(ARTIFACT_DIR_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    return Path(ProjectFiles.STATE_DIR, "artifacts").resolve()
+
+
+def clone_file(source: Path, target: Path) -> str:
+    """Create target with the content of source as cheaply as possible.
+
+    The target never shares its inode with the source, so it can be written
+    to without changing the source.
+
+    Args:
+        source (Path): Existing file
+        target (Path): New file, must not exist
+
+    Returns:
+        str: Method used, either 'reflink' or 'copy'
+    """
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as src, open(target, "xb") as dst:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copymode(source, target)
+            return "reflink"
+        except OSError:
+            target.unlink(missing_ok=True)
+    shutil.copy2(source, target)
+    return "copy"
+
+
+@dataclass(frozen=True)
+class GarbageCollection:
+    records_removed: int
+    objects_removed: int
+    bytes_freed: int
+
+
+class ArtifactStore:
+    """Local content-addressed store of step outputs.
+
+    Args:
+        root (Path): Store directory; restores are cheapest on the filesystem
+            of the project
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.objects_dir = Path(self.root, "objects")
+        self.records_dir = Path(self.root, "records")
+
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        """Hold the store lock, shared unless exclusive is requested."""
+        with store_lock(self.root, exclusive):
+            yield
+
+    def __record_path(self, key: str) -> Path:
+        return Path(self.records_dir, key[:2], f"{key}.json")
+
+    def __object_path(self, digest: str, executable: bool) -> Path:
+        # Executable files get their own objects, which keep their mode
+        suffix = "x" if executable else "r"
+        return Path(self.objects_dir, digest[:2], f"{digest}.{suffix}")
+
+    def contains(self, key: str) -> bool:
+        return self.__record_path(key).exists()
+
+    def save(self, key: str, paths: Iterable[Path], root: Path, step: str = "") -> int:
+        """Store output paths under a key.
+
+        Args:
+            key (str): Step invocation key
+            paths (Iterable[Path]): Output files or directories
+            root (Path): Directory the paths are relative to
+            step (str): Name of the step, for reference
+
+        Returns:
+            int: Number of files stored
+        """
+        record: Dict = {
+            "version": RECORD_FORMAT_VERSION,
+            "step": step,
+            "created": time.time(),
+            "directories": [],
+            "symlinks": [],
+            "files": [],
+        }
+        with self.lock():
+            for relative_path in walk_paths(root, paths):
+                path = Path(root, relative_path)
+                mode = path.lstat().st_mode
+                if stat.S_ISLNK(mode):
+                    record["symlinks"].append(
+                        {"path": relative_path, "target": os.readlink(path)}
+                    )
+                elif stat.S_ISDIR(mode):
+                    record["directories"].append(relative_path)
+                elif stat.S_ISREG(mode):
+                    executable = bool(mode & stat.S_IXUSR)
+                    digest = self.__store_object(path, executable)
+                    record["files"].append(
+                        {"path": relative_path, "object": digest, "x": executable}
+                    )
+            atomic_write(self.__record_path(key), json.dumps(record).encode("utf-8"))
+        return len(record["files"])
+
+    def __store_object(self, path: Path, executable: bool) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(_CHUNK_SIZE):
+                digest.update(chunk)
+        object_path = self.__object_path(digest.hexdigest(), executable)
+        if object_path.exists():
+            return digest.hexdigest()
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        # Objects are read by concurrent restores, so they must never change
+        # in place
+        with open(path, "rb") as source, atomic_output(
+            object_path, 0o555 if executable else 0o444
+        ) as target:
+            shutil.copyfileobj(source, target, _CHUNK_SIZE)
+        return digest.hexdigest()
+
+    def restore(self, key: str, root: Path) -> Optional[int]:
+        """Restore the outputs stored under a key.
+
+        Args:
+            key (str): Step invocation key
+            root (Path): Directory the outputs are relative to
+
+        Returns:
+            Optional[int]: Number of files restored, None if the key is unknown
+        """
+        record_path = self.__record_path(key)
+        with self.lock():
+            try:
+                with open(record_path, "r") as file:
+                    record = json.load(file)
+            except (OSError, ValueError):
+                return None
+            for directory in record["directories"]:
+                Path(root, directory).mkdir(parents=True, exist_ok=True)
+            for link in record["symlinks"]:
+                link_path = Path(root, link["path"])
+                link_path.parent.mkdir(parents=True, exist_ok=True)
+                if link_path.is_symlink() or link_path.exists():
+                    link_path.unlink()
+                os.symlink(link["target"], link_path)
+            methods: Dict[str, int] = {}
+            for item in record["files"]:
+                file_path = Path(root, item["path"])
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                if file_path.is_symlink() or file_path.exists():
+                    file_path.unlink()
+                method = clone_file(
+                    self.__object_path(item["object"], item["x"]), file_path
+                )
+                os.chmod(file_path, 0o755 if item["x"] else 0o644)
+                methods[method] = methods.get(method, 0) + 1
+            # Garbage collection removes the least recently used records
+            os.utime(record_path)
+        logger.debug(f"Restored outputs of {key[:12]}: {methods}")
+        return len(record["files"])
+
+    def gc(self, max_age: Optional[float] = None) -> GarbageCollection:
+        """Remove old records and the objects no record refers to.
+
+        Args:
+            max_age (Optional[float]): Remove records unused for this many
+                seconds; if None, only unreferenced objects are removed
+
+        Returns:
+            GarbageCollection: What was removed
+        """
+        records_removed = objects_removed = bytes_freed = 0
+        referenced: Set[str] = set()
+        with self.lock(exclusive=True):
+            now = time.time()
+            for record_path in self.records_dir.glob("*/*.json"):
+                try:
+                    if max_age is not None and (
+                        now - record_path.stat().st_mtime > max_age
+                    ):
+                        record_path.unlink()
+                        records_removed += 1
+                        continue
+                    with open(record_path, "r") as file:
+                        record = json.load(file)
+                except (OSError, ValueError):
+                    logger.warning(f"Removing unreadable artifact record {record_path}")
+                    record_path.unlink(missing_ok=True)
+                    records_removed += 1
+                    continue
+                referenced.update(
+                    self.__object_path(item["object"], item["x"]).name
+                    for item in record["files"]
+                )
+            # Readers and writers are locked out, so leftovers are stale
+            for object_path in self.objects_dir.glob("*/*"):
+                if object_path.name not in referenced:
+                    bytes_freed += object_path.stat().st_size
+                    object_path.unlink()
+                    objects_removed += 1
+        return GarbageCollection(records_removed, objects_removed, bytes_freed)
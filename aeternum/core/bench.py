@@ -0,0 +1,197 @@
+"""Repeated timing of build steps.
+
+Each benchmarked step runs a number of untimed warmup rounds, then the timed
+runs. The duration of a run is the one measured by the spawn layer around the
+step process, so the benchmark adds no timing overhead of its own; output is
+spooled to temporary files and discarded. Outliers are runs outside 1.5 times
+the interquartile range around the quartiles.
+"""
+import csv
+import json
+import logging
+import statistics
+import subprocess
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aeternum import __version__
+from aeternum.core.capture import CapturedOutput
+from aeternum.core.errors import AeternumRuntimeError
+from aeternum.core.spawn import run_process
+
+if TYPE_CHECKING:
+    from aeternum.core.models import AutomationStep
+
+logger = logging.getLogger(__name__)
+
+BENCH_FORMAT_VERSION: int = 1
+CSV_COLUMNS: List[str] = [
+    "name",
+    "runs",
+    "mean",
+    "median",
+    "stddev",
+    "min",
+    "max",
+    "outliers",
+]
+IQR_OUTLIER_FACTOR: float = 1.5
+
+
+def quartiles(samples: Sequence[float]) -> Tuple[float, float]:
+    """First and third quartiles, by linear interpolation."""
+    if len(samples) < 2:
+        return (samples[0], samples[0])
+    first, _, third = statistics.quantiles(samples, n=4, method="inclusive")
+    return (first, third)
+
+
+@dataclass(frozen=True)
+class StepBenchmark:
+    name: str
+    command: str
+    # Duration of every timed run in seconds, in run order
+    samples: List[float] = field(default_factory=list)
+
+    @property
+    def runs(self) -> int:
+        return len(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def stddev(self) -> float:
+        return statistics.stdev(self.samples) if self.runs > 1 else 0.0
+
+    @property
+    def min(self) -> float:
+        return min(self.samples)
+
+    @property
+    def max(self) -> float:
+        return max(self.samples)
+
+    @property
+    def outliers(self) -> List[float]:
+        """Runs further than 1.5 IQR below the first or above the third quartile."""
+        first, third = quartiles(self.samples)
+        margin = IQR_OUTLIER_FACTOR * (third - first)
+        return [
+            sample
+            for sample in self.samples
+            if sample < first - margin or sample > third + margin
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "command": self.command,
+            "runs": self.runs,
+            "mean": self.mean,
+            "median": self.median,
+            "stddev": self.stddev,
+            "min": self.min,
+            "max": self.max,
+            "outliers": len(self.outliers),
+            "samples": list(self.samples),
+        }
+
+
+@dataclass(frozen=True)
+class BenchmarkReport:
+    project: str
+    version: str
+    steps: List[StepBenchmark]
+    warmup: int = 0
+    commit: Optional[str] = None
+    timestamp: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+
+    def to_dict(self) -> Dict:
+        content = asdict(self)
+        content["steps"] = [step.to_dict() for step in self.steps]
+        return {"version": BENCH_FORMAT_VERSION, "aeternum": __version__, **content}
+
+    def write_json(self, filepath: Path) -> None:
+        with open(filepath, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write("\n")
+
+    def write_csv(self, filepath: Path) -> None:
+        with open(filepath, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for step in self.steps:
+                writer.writerow(step.to_dict())
+
+
+def current_commit() -> Optional[str]:
+    """Commit checked out in the working directory, if it is a Git repository."""
+    try:
+        result = run_process(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    if result.returncode != 0 or not isinstance(result.stdout, str):
+        return None
+    return result.stdout.strip() or None
+
+
+def benchmark_step(
+    step: "AutomationStep",
+    shell: str,
+    runs: int,
+    warmup: int = 0,
+    on_run: Optional[Callable[[int, float], None]] = None,
+) -> StepBenchmark:
+    """Run a step repeatedly and collect its durations.
+
+    Args:
+        step (AutomationStep): Step to benchmark
+        shell (str): Shell the step command runs in
+        runs (int): Number of timed runs
+        warmup (int): Number of untimed runs before the timed ones
+        on_run (Optional[Callable[[int, float], None]]): Called with the run
+            number and duration after every timed run
+
+    Returns:
+        StepBenchmark: Durations of the timed runs
+
+    Raises:
+        AeternumRuntimeError: If any run of the step fails
+    """
+    samples: List[float] = []
+    for run in range(-warmup, runs):
+        capture = CapturedOutput()
+        try:
+            result = step.run(shell, capture=capture)
+            if result.exit_code != 0:
+                raise AeternumRuntimeError(
+                    f"Step '{step.name}' failed with exit code {result.exit_code} "
+                    + f"during benchmark run {run + warmup + 1}:\n{result.stderr}"
+                )
+        finally:
+            capture.close()
+        if run >= 0:
+            samples.append(result.duration)
+            if on_run is not None:
+                on_run(run + 1, result.duration)
+    logger.debug(f"Benchmarked '{step.name}' over {runs} runs")
+    return StepBenchmark(step.name, step.command_line, samples)
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration with a unit suited to its magnitude."""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.3f}s"
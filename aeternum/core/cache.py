@@ -0,0 +1,422 @@
+"""Keyed dependency caches saved and restored around builds.
+
+A cache entry is a manifest listing the files of the cached directories, each
+pointing at a gzip-compressed blob named after the SHA-256 of its content.
+Blobs are shared between entries, so successive entries of a large dependency
+directory only store the files that changed. Every file is written to a
+uniquely named temporary file and renamed into place, which keeps a store
+safe to share between machines over NFS. The store is trimmed to a maximum
+size by evicting the least recently used entries. Saves and restores hold a
+shared lock on the store and eviction an exclusive one, so a blob is never
+removed while a concurrent save is about to record it in its manifest.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import stat
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from aeternum.core.errors import AeternumInputError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV: str = "AETERNUM_CACHE_DIR"
+CACHE_MAX_SIZE_ENV: str = "AETERNUM_CACHE_MAX_SIZE"
+DEFAULT_MAX_SIZE: int = 5 * 1024**3
+MANIFEST_FORMAT_VERSION: int = 1
+
+_CHUNK_SIZE = 1024 * 1024
+_PLACEHOLDER = re.compile(r"\{([a-z]+)(?::([^}]+))?\}")
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def default_cache_dir() -> Path:
+    """Cache store location from the environment, or the user cache directory."""
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache_home, "aeternum")
+
+
+def parse_size(value: str) -> int:
+    """Parse a size like '500M' or '2GiB' into bytes."""
+    match = _SIZE.match(value)
+    if not match:
+        raise AeternumInputError(
+            f"Invalid size: '{value}'", "Use a number with an optional K, M, G or T."
+        )
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def hash_files(pattern: str, root: Optional[Path] = None) -> str:
+    """Hash the content of the files matching a glob pattern.
+
+    Args:
+        pattern (str): Glob pattern, relative to the root directory
+        root (Optional[Path]): Directory patterns are resolved against
+
+    Returns:
+        str: SHA-256 hex digest over the sorted matching paths and contents
+    """
+    root = Path(root or Path.cwd())
+    digest = hashlib.sha256()
+    matches = sorted(glob.glob(pattern, root_dir=root, recursive=True))
+    for relative_path in matches:
+        file_path = Path(root, relative_path)
+        if not file_path.is_file():
+            continue
+        digest.update(relative_path.encode("utf-8") + b"\0")
+        with open(file_path, "rb") as file:
+            while chunk := file.read(_CHUNK_SIZE):
+                digest.update(chunk)
+    if not matches:
+        logger.warning(f"No files match cache key pattern '{pattern}'")
+    return digest.hexdigest()
+
+
+def render_cache_key(template: str, root: Optional[Path] = None) -> str:
+    """Expand the placeholders of a cache key template.
+
+    Supported placeholders are `{platform}`, `{arch}`, `{python}`,
+    `{env:NAME}` and `{hash:GLOB}`.
+
+    Args:
+        template (str): Key template
+        root (Optional[Path]): Directory hashed file patterns are resolved against
+
+    Returns:
+        str: Cache key
+    """
+
+    def expand(match: re.Match) -> str:
+        name, argument = match.group(1), match.group(2)
+        if name == "platform":
+            return sys.platform
+        if name == "arch":
+            return platform.machine().lower()
+        if name == "python":
+            return f"{sys.version_info.major}.{sys.version_info.minor}"
+        if name == "env" and argument:
+            return os.environ.get(argument, "")
+        if name == "hash" and argument:
+            return hash_files(argument, root)
+        raise AeternumInputError(
+            f"Unknown cache key placeholder: '{match.group(0)}'",
+            "Use {platform}, {arch}, {python}, {env:NAME} or {hash:GLOB}.",
+        )
+
+    return _PLACEHOLDER.sub(expand, template)
+
+
+def walk_paths(root: Path, paths: Iterable[Path]) -> Iterator[str]:
+    """List the given paths and everything below them, relative to the root.
+
+    Args:
+        root (Path): Directory the paths are relative to
+        paths (Iterable[Path]): Files or directories
+
+    Returns:
+        Iterator[str]: Relative paths, directories before their content
+    """
+    for top_path in paths:
+        top = Path(root, top_path)
+        if not top.exists() and not top.is_symlink():
+            logger.warning(f"Path does not exist: {top_path}")
+            continue
+        yield os.path.relpath(top, root)
+        if top.is_symlink() or not top.is_dir():
+            continue
+        for dir_path, dir_names, file_names in os.walk(top):
+            dir_names.sort()
+            for name in [*dir_names, *sorted(file_names)]:
+                yield os.path.relpath(Path(dir_path, name), root)
+
+
+@contextmanager
+def store_lock(root: Path, exclusive: bool = False) -> Iterator[None]:
+    """Hold the lock of a store directory, shared unless exclusive is requested.
+
+    Uses flock, which Linux maps to POSIX locks on NFS, so the lock also
+    holds between machines sharing a store.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    with open(Path(root, "lock"), "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def temp_path_for(path: Path) -> Path:
+    """A temporary file name next to a path, unique across hosts and processes."""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+
+@contextmanager
+def atomic_output(path: Path, mode: Optional[int] = None) -> Iterator[IO[bytes]]:
+    """Open a temporary file that replaces the path once written.
+
+    Args:
+        path (Path): File to write
+        mode (Optional[int]): Permission bits of the file, if not the default
+
+    Returns:
+        Iterator[IO[bytes]]: Binary file to write the content to
+    """
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, "xb") as file:
+            yield file
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write(path: Path, content: bytes) -> None:
+    """Write a file through a temporary file renamed into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_output(path) as file:
+        file.write(content)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    key: str
+    manifest_path: Path
+    last_used: float
+
+
+class CacheStore:
+    """Local directory of compressed, deduplicated cache entries.
+
+    Args:
+        root (Path): Store directory, possibly on a shared filesystem
+        max_size (int): Total blob size in bytes kept after eviction
+    """
+
+    def __init__(self, root: Path, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.root = Path(root)
+        self.max_size = max_size
+        self.blobs_dir = Path(self.root, "blobs")
+        self.entries_dir = Path(self.root, "entries")
+
+    def __manifest_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return Path(self.entries_dir, f"{digest}.json")
+
+    def __blob_path(self, digest: str) -> Path:
+        return Path(self.blobs_dir, digest[:2], digest)
+
+    def entries(self) -> List[CacheEntry]:
+        """All entries, most recently used first."""
+        entries = []
+        for manifest_path in self.entries_dir.glob("*.json"):
+            try:
+                with open(manifest_path, "r") as file:
+                    key = json.load(file)["key"]
+                entries.append(
+                    CacheEntry(key, manifest_path, manifest_path.stat().st_mtime)
+                )
+            except (OSError, ValueError, KeyError):
+                logger.debug(f"Ignoring unreadable cache manifest {manifest_path}")
+        return sorted(entries, key=lambda entry: entry.last_used, reverse=True)
+
+    def find(self, key: str, restore_keys: Iterable[str] = ()) -> Optional[CacheEntry]:
+        """Find the entry for a key, or the newest entry matching a key prefix.
+
+        Args:
+            key (str): Exact cache key
+            restore_keys (Iterable[str]): Fallback key prefixes, in order
+
+        Returns:
+            Optional[CacheEntry]: Matching entry, if any
+        """
+        manifest_path = self.__manifest_path(key)
+        if manifest_path.exists():
+            return CacheEntry(key, manifest_path, manifest_path.stat().st_mtime)
+        entries = self.entries()
+        for prefix in restore_keys:
+            for entry in entries:
+                if entry.key.startswith(prefix):
+                    return entry
+        return None
+
+    def contains(self, key: str) -> bool:
+        return self.__manifest_path(key).exists()
+
+    def restore(self, entry: CacheEntry, root: Optional[Path] = None) -> int:
+        """Restore the files of an entry.
+
+        Args:
+            entry (CacheEntry): Entry to restore
+            root (Optional[Path]): Directory the cached paths are relative to
+
+        Returns:
+            int: Number of files restored
+        """
+        root = Path(root or Path.cwd())
+        with store_lock(self.root):
+            with open(entry.manifest_path, "r") as file:
+                manifest = json.load(file)
+            for directory in manifest["directories"]:
+                Path(root, directory).mkdir(parents=True, exist_ok=True)
+            for link in manifest["symlinks"]:
+                link_path = Path(root, link["path"])
+                link_path.parent.mkdir(parents=True, exist_ok=True)
+                if link_path.is_symlink() or link_path.exists():
+                    link_path.unlink()
+                os.symlink(link["target"], link_path)
+            for item in manifest["files"]:
+                file_path = Path(root, item["path"])
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                with gzip.open(self.__blob_path(item["blob"]), "rb") as source:
+                    with atomic_output(file_path, item["mode"]) as target:
+                        shutil.copyfileobj(source, target, _CHUNK_SIZE)
+            # Entries are evicted least recently used first
+            os.utime(entry.manifest_path)
+        return len(manifest["files"])
+
+    def save(self, key: str, paths: Iterable[Path], root: Optional[Path] = None) -> int:
+        """Store the content of the given paths under a key.
+
+        Args:
+            key (str): Cache key
+            paths (Iterable[Path]): Files or directories, relative to the root
+            root (Optional[Path]): Directory the paths are relative to
+
+        Returns:
+            int: Bytes of new blobs written
+        """
+        root = Path(root or Path.cwd())
+        manifest: Dict = {
+            "version": MANIFEST_FORMAT_VERSION,
+            "key": key,
+            "created": time.time(),
+            "directories": [],
+            "symlinks": [],
+            "files": [],
+        }
+        written = 0
+        with store_lock(self.root):
+            for relative_path in walk_paths(root, paths):
+                path = Path(root, relative_path)
+                mode = path.lstat().st_mode
+                if stat.S_ISLNK(mode):
+                    manifest["symlinks"].append(
+                        {"path": relative_path, "target": os.readlink(path)}
+                    )
+                elif stat.S_ISDIR(mode):
+                    manifest["directories"].append(relative_path)
+                elif stat.S_ISREG(mode):
+                    digest, size = self.__store_blob(path)
+                    written += size
+                    manifest["files"].append(
+                        {
+                            "path": relative_path,
+                            "blob": digest,
+                            "mode": stat.S_IMODE(mode),
+                        }
+                    )
+            atomic_write(
+                self.__manifest_path(key), json.dumps(manifest).encode("utf-8")
+            )
+        return written
+
+    def __store_blob(self, path: Path) -> Tuple[str, int]:
+        """Store a file as a compressed blob unless its content is already stored."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(_CHUNK_SIZE):
+                digest.update(chunk)
+        blob_path = self.__blob_path(digest.hexdigest())
+        if blob_path.exists():
+            return digest.hexdigest(), 0
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "rb") as source, atomic_output(blob_path) as blob:
+            # No file name or timestamp in the header, blobs depend on content only
+            with gzip.GzipFile(
+                filename="", mode="wb", compresslevel=6, fileobj=blob, mtime=0
+            ) as target:
+                shutil.copyfileobj(source, target, _CHUNK_SIZE)
+        return digest.hexdigest(), blob_path.stat().st_size
+
+    def size(self) -> int:
+        """Total size of the stored blobs, in bytes."""
+        return sum(
+            blob.stat().st_size for blob in self.blobs_dir.glob("*/*") if blob.is_file()
+        )
+
+    def evict(self) -> List[str]:
+        """Remove least recently used entries until the store fits its maximum size.
+
+        Returns:
+            List[str]: Keys of the evicted entries
+        """
+        evicted: List[str] = []
+        # Saves in progress would reference blobs that are not in a manifest yet
+        with store_lock(self.root, exclusive=True):
+            entries = self.entries()
+            total_size = self.size()
+            while entries and total_size > self.max_size:
+                entry = entries.pop()
+                entry.manifest_path.unlink(missing_ok=True)
+                evicted.append(entry.key)
+                total_size -= self.__remove_unreferenced_blobs(entries)
+                logger.info(f"Evicted cache entry '{entry.key}'")
+        return evicted
+
+    def __remove_unreferenced_blobs(self, entries: List[CacheEntry]) -> int:
+        """Delete blobs no remaining entry refers to, returning the bytes freed."""
+        referenced: Set[str] = set()
+        for entry in entries:
+            with open(entry.manifest_path, "r") as file:
+                referenced.update(item["blob"] for item in json.load(file)["files"])
+        freed = 0
+        for blob in self.blobs_dir.glob("*/*"):
+            if blob.name not in referenced and not blob.name.endswith(".tmp"):
+                freed += blob.stat().st_size
+                blob.unlink(missing_ok=True)
+        return freed
+
+
+def open_cache_store(
+    directory: Optional[Path] = None, max_size: Optional[int] = None
+) -> CacheStore:
+    """Open the cache store, falling back to the environment configuration.
+
+    Args:
+        directory (Optional[Path]): Store directory
+        max_size (Optional[int]): Maximum store size in bytes
+
+    Returns:
+        CacheStore: Cache store
+    """
+    if max_size is None:
+        configured_size = os.environ.get(CACHE_MAX_SIZE_ENV)
+        max_size = parse_size(configured_size) if configured_size else DEFAULT_MAX_SIZE
+    return CacheStore(directory or default_cache_dir(), max_size)
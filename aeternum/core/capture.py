@@ -0,0 +1,226 @@
+"""Disk-spooled capture of step output.
+
+Captured steps write stdout and stderr into spooled temporary files instead of
+pipes read by Python, so memory use does not grow with the amount of output.
+Output written from within the process stays in memory up to a threshold and
+only spills to disk beyond it; handing a spool file to a child process moves it
+to disk first, since the child needs a real file descriptor. Only the tail of
+stderr is read back for failure reports. After the step, both streams are
+copied in chunks into one file per step, optionally gzip-compressed, which the
+exported execution log refers to.
+"""
+import codecs
+import gzip
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import IO, Dict, Iterator, Optional
+
+from aeternum.core.constants import ProjectFiles
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.execution_log import ExecutionLog
+from aeternum.core.results import STDERR_TAIL_BYTES, tail_text
+
+logger = logging.getLogger(__name__)
+
+STREAM_NAMES = ("stdout", "stderr")
+_CHUNK_SIZE = 256 * 1024
+# Output kept in memory per stream before spilling to disk
+SPOOL_MEMORY_LIMIT: int = 1024 * 1024
+_SLUG_PATTERN = re.compile(r"[^A-Za-z0-9]+")
+
+
+def runs_dir(state_dir: Optional[Path] = None) -> Path:
+    """Directory holding the captured output of exported runs."""
+    return Path(state_dir or ProjectFiles.STATE_DIR, "runs")
+
+
+def create_run_dir(run_id: str, state_dir: Optional[Path] = None) -> Path:
+    """Create the directory of a new run, unique even for concurrent builds.
+
+    Run ids only have second resolution, so a numbered suffix is appended when
+    another build already created a directory with the same id.
+
+    Returns:
+        Path: The newly created run directory
+    """
+    parent = runs_dir(state_dir)
+    parent.mkdir(parents=True, exist_ok=True)
+    attempt = 1
+    while True:
+        run_dir = Path(parent, run_id if attempt == 1 else f"{run_id}-{attempt}")
+        try:
+            run_dir.mkdir()
+            return run_dir
+        except FileExistsError:
+            attempt += 1
+
+
+def step_slug(name: str) -> str:
+    return _SLUG_PATTERN.sub("-", name).strip("-").lower() or "step"
+
+
+def _spool_file(directory: Optional[Path], max_size: int) -> IO[bytes]:
+    if sys.version_info < (3, 11):
+        # Spooled files only implement the full io interface from 3.11 on,
+        # which wrapping them for in-process Python steps needs
+        return tempfile.TemporaryFile(dir=directory)
+    return tempfile.SpooledTemporaryFile(max_size=max_size, dir=directory)
+
+
+class CapturedOutput:
+    """Output of one step process, spooled to temporary files.
+
+    Args:
+        directory (Optional[Path]): Directory of the files once they spill to
+            disk, the system temporary directory by default
+        max_size (int): Bytes of each stream kept in memory before spilling
+    """
+
+    def __init__(
+        self, directory: Optional[Path] = None, max_size: int = SPOOL_MEMORY_LIMIT
+    ) -> None:
+        self.stdout: IO[bytes] = _spool_file(directory, max_size)
+        self.stderr: IO[bytes] = _spool_file(directory, max_size)
+
+    @property
+    def files(self) -> Dict[str, IO[bytes]]:
+        """Spool files keyed by stream name."""
+        return {"stdout": self.stdout, "stderr": self.stderr}
+
+    def __stream(self, stream: str) -> IO[bytes]:
+        return self.stdout if stream == "stdout" else self.stderr
+
+    def size(self, stream: str) -> int:
+        # Seeking works whether the stream is still in memory or on disk
+        file = self.__stream(stream)
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+        return size
+
+    def tail(self, stream: str = "stderr", max_bytes: int = STDERR_TAIL_BYTES) -> str:
+        """Decode the end of a stream, cut at a line boundary when possible."""
+        file = self.__stream(stream)
+        # One extra byte lets tail_text tell whether the first line is partial
+        file.seek(max(0, self.size(stream) - max_bytes - 1))
+        return tail_text(file.read().decode("utf-8", errors="replace"), max_bytes)
+
+    def iter_chunks(self, stream: str) -> Iterator[bytes]:
+        """Read a stream back in fixed-size chunks."""
+        file = self.__stream(stream)
+        file.seek(0)
+        while chunk := file.read(_CHUNK_SIZE):
+            yield chunk
+
+    def iter_text(self, stream: str) -> Iterator[str]:
+        """Read a stream back as text, in chunks."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for chunk in self.iter_chunks(stream):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+    def save(self, path: Path) -> None:
+        """Write both streams into one file, gzip-compressed if named '.gz'.
+
+        Each stream is introduced by a '==> stdout <==' style header line.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        open_file = gzip.open if path.suffix == ".gz" else open
+        with open_file(path, "wb") as target:
+            for stream in STREAM_NAMES:
+                target.write(f"==> {stream} <==\n".encode("utf-8"))
+                ends_with_newline = True
+                for chunk in self.iter_chunks(stream):
+                    target.write(chunk)
+                    ends_with_newline = chunk.endswith(b"\n")
+                if not ends_with_newline:
+                    target.write(b"\n")
+
+    def close(self) -> None:
+        self.stdout.close()
+        self.stderr.close()
+
+
+class OutputSpool:
+    """Captures step output and keeps one file per step in a run directory.
+
+    Args:
+        directory (Path): Directory of the run
+        compress (bool): Gzip-compress the per-step files
+    """
+
+    def __init__(self, directory: Path, compress: bool = True) -> None:
+        self.directory = Path(directory)
+        self.compress = compress
+
+    def open(self) -> CapturedOutput:
+        """Start capturing a step, spilling large output into the run directory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return CapturedOutput(self.directory)
+
+    def path_for(self, index: int, name: str) -> Path:
+        suffix = ".log.gz" if self.compress else ".log"
+        return Path(self.directory, f"{index}-{step_slug(name)}{suffix}")
+
+    def keep(self, captured: CapturedOutput, index: int, name: str) -> Path:
+        """Persist the output of a step and release its temporary files.
+
+        Returns:
+            Path: File holding the output of the step
+        """
+        output_file = self.path_for(index, name)
+        try:
+            captured.save(output_file)
+        finally:
+            captured.close()
+        return output_file
+
+
+def find_step_output(run: str, step: str, state_dir: Optional[Path] = None) -> Path:
+    """Locate the captured output of a step.
+
+    Args:
+        run (str): Run id (the directory name under .aeternum/runs) or path of
+            an exported execution log
+        step (str): Step index or name
+        state_dir (Optional[Path]): Aeternum state directory
+
+    Returns:
+        Path: File holding the output of the step
+
+    Raises:
+        AeternumInputError: If the run or step output cannot be found
+    """
+    if Path(run).is_file():
+        execution_log = ExecutionLog.load(Path(run))
+        for row in execution_log.rows:
+            if (
+                step in (str(row.index), row.name)
+                and row.index in execution_log.outputs
+            ):
+                return Path(execution_log.outputs[row.index])
+        raise AeternumInputError(f"No captured output of step '{step}' in {run}")
+
+    run_dir = Path(runs_dir(state_dir), run)
+    if not run_dir.is_dir():
+        raise AeternumInputError(
+            f"No captured output found for run: {run}",
+            "Runs are captured by 'aeternum run --save-output'.",
+        )
+    for output_file in sorted(run_dir.iterdir()):
+        index, _, rest = output_file.name.partition("-")
+        if step == index or step_slug(step) == rest.split(".log")[0]:
+            return output_file
+    raise AeternumInputError(f"No captured output of step '{step}' in run {run}")
+
+
+def copy_step_output(path: Path, target: IO[bytes]) -> None:
+    """Stream a captured output file, decompressing it if needed."""
+    open_file = gzip.open if path.suffix == ".gz" else open
+    with open_file(path, "rb") as source:
+        shutil.copyfileobj(source, target, _CHUNK_SIZE)
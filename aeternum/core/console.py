@@ -0,0 +1,184 @@
+"""Terminal rendering of runner events."""
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import click
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.plan import PlannedStep
+from aeternum.core.runner import (
+    BuildFinished,
+    BuildResult,
+    BuildStarted,
+    RunnerEvent,
+    StepFinished,
+    StepSkipped,
+    StepStarted,
+)
+from aeternum.core.timings import Regression, RegressionGate
+
+if TYPE_CHECKING:
+    from aeternum.core.models import StepExecutionResult
+
+STATUS_STYLES = {
+    StepExecutionStatus.COMPLETED: f"{Fore.GREEN}{Style.BRIGHT}",
+    StepExecutionStatus.FAILED: f"{Fore.RED}{Style.BRIGHT}",
+    StepExecutionStatus.SKIPPED: f"{Fore.YELLOW}",
+    StepExecutionStatus.RESUMED: f"{Fore.CYAN}",
+    StepExecutionStatus.RESTORED: f"{Fore.CYAN}",
+    StepExecutionStatus.NOT_EXECUTED: f"{Fore.LIGHTBLACK_EX}",
+}
+
+
+def colorize_status(status: str) -> str:
+    """Apply the console color of a step status."""
+    return f"{STATUS_STYLES.get(status, '')}{status}{Style.RESET_ALL}"
+
+
+def format_change(change: Optional[Regression], regressed: bool) -> str:
+    """Describe a step duration against its baseline, e.g. '+25% (+3.1s)'."""
+    if change is None:
+        return "-"
+    text = f"{change.ratio:+.0%} ({change.delta:+.1f}s)"
+    if regressed:
+        return f"{Fore.RED}{Style.BRIGHT}{text} REGRESSED{Style.RESET_ALL}"
+    return text
+
+
+class ConsoleRenderer:
+    """Runner event listener printing build progress with click."""
+
+    def __init__(
+        self, quiet_output: bool = False, gate: Optional[RegressionGate] = None
+    ) -> None:
+        self.quiet_output = quiet_output
+        self.gate = gate
+        self.__progress = None
+
+    def __call__(self, event: RunnerEvent) -> None:
+        if isinstance(event, BuildStarted):
+            self.__start_progress(event)
+        elif isinstance(event, StepStarted):
+            self.__echo_step_header(event.planned, event.total)
+            if not event.dry_run:
+                click.echo(f"Executing command: '{event.planned.command}'")
+        elif isinstance(event, StepSkipped):
+            self.__echo_step_header(event.planned, event.total)
+            if event.reason:
+                click.echo(f"Skipping step: {event.reason}")
+            self.__progress.update(1)
+        elif isinstance(event, StepFinished):
+            result = event.outcome.result
+            completed = event.outcome.status == StepExecutionStatus.COMPLETED
+            if result is not None and completed and not self.quiet_output:
+                self.__echo_stdout(result)
+            if result is not None and result.tests is not None:
+                click.echo(f"Tests: {result.tests.describe_failures()}")
+            if result is not None and result.latency is not None:
+                click.echo(f"Latency: {result.latency.describe()}")
+            self.__progress.update(1)
+        elif isinstance(event, BuildFinished):
+            self.__progress.__exit__(None, None, None)
+            self.__progress = None
+            self.render_summary(event.result, self.gate)
+
+    def __start_progress(self, event: BuildStarted) -> None:
+        plan = event.plan
+        self.__progress = click.progressbar(
+            length=len(plan.steps),
+            label=f"Building {plan.project} v{plan.version}",
+            fill_char=click.style("=", fg="green"),
+            empty_char=click.style("-", fg="white", dim=True),
+        )
+        self.__progress.__enter__()
+
+    @staticmethod
+    def __echo_stdout(result: "StepExecutionResult") -> None:
+        if result.output is None:
+            click.echo(result.stdout)
+            return
+        # Spooled output is streamed back in chunks, never loaded whole
+        for text in result.output.iter_text("stdout"):
+            click.echo(text, nl=False)
+        click.echo()
+
+    @staticmethod
+    def __echo_step_header(planned: PlannedStep, total: int) -> None:
+        category = planned.category.upper()
+        click.echo(f"\n[{planned.index} / {total}][{category}]: {planned.name}")
+
+    @staticmethod
+    def render_summary(
+        result: BuildResult, gate: Optional[RegressionGate] = None
+    ) -> None:
+        """Print the end-of-build summary table.
+
+        Steps whose resources were sampled get a utilization column, and the
+        request latencies of HTTP check steps are listed below the table.
+
+        Args:
+            result (BuildResult): Result of the build
+            gate (Optional[RegressionGate]): If given, a column compares the
+                step durations against its baseline
+        """
+        changes: Dict[str, Regression] = {}
+        regressed: Dict[str, Regression] = {}
+        if gate is not None and not result.dry_run:
+            changes = {
+                change.name: change for change in gate.compare(result.step_durations)
+            }
+            regressed = {
+                change.name: change
+                for change in gate.regressions(result.step_durations)
+            }
+        summary: List[list] = [
+            [record.index, record.name, record.command, colorize_status(record.status)]
+            for record in result.steps
+            if record.status != StepExecutionStatus.EXCLUDED
+        ]
+        if gate is not None:
+            for row in summary:
+                row.append(format_change(changes.get(row[1]), row[1] in regressed))
+        utilization = {
+            record.index: timeline.describe()
+            for record, timeline in result.steps.resource_timelines()
+        }
+        if utilization:
+            for row in summary:
+                row.append(utilization.get(row[0], "-"))
+        click.echo("--" * 20)
+        click.echo(f"Build completed for {result.project} v{result.version}")
+        if result.plan.shard is not None:
+            click.echo(
+                f"Shard {result.plan.shard}: "
+                + f"{len(result.plan.selected_steps)} steps assigned"
+            )
+        click.echo(f"Ran {len(summary)} automation steps in {result.duration:.3f}s")
+        resumed_count = result.steps.count(StepExecutionStatus.RESUMED)
+        if resumed_count:
+            click.echo(f"Resumed {resumed_count} steps completed in a previous run")
+        headers = map(
+            lambda h: f"{Fore.WHITE}{Style.BRIGHT}{h}{Style.RESET_ALL}",
+            ["#", "STEP", "COMMAND", "STATUS"]
+            + (["VS BASELINE"] if gate is not None else [])
+            + (["UTILIZATION"] if utilization else []),
+        )
+        click.echo(
+            tabulate(
+                summary,
+                headers=list(headers),
+                showindex=False,
+                tablefmt="github",
+                numalign="center",
+            )
+        )
+        for record, latency in result.steps.latency_summaries():
+            click.echo(f"Latency of '{record.name}': {latency.describe()}")
+        if regressed:
+            click.secho(
+                f"{len(regressed)} steps regressed by more than "
+                + f"{gate.max_regression:.0%} and {gate.min_delta:g}s against the "
+                + "baseline",
+                fg="red",
+            )
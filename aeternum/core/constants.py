@@ -7,6 +7,7 @@ class ProjectFiles:
     """Constants for generated files."""
 
     SPEC_FILE: Final[str] = "aeternum.yaml"
+    STATE_DIR: Final[str] = ".aeternum"
 
 
 @dataclass(frozen=True)
@@ -17,6 +18,8 @@ class StepExecutionStatus:
     EXCLUDED: Final[str] = "EXCLUDED"
     FAILED: Final[str] = "FAILED"
     SKIPPED: Final[str] = "SKIPPED"
+    RESUMED: Final[str] = "RESUMED"
+    RESTORED: Final[str] = "RESTORED"
     NOT_EXECUTED: Final[str] = "NOT EXECUTED"
 
 
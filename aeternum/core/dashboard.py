@@ -0,0 +1,147 @@
+"""Live terminal dashboard for running builds.
+
+Running steps are shown in a fixed region at the bottom of the terminal with
+their elapsed time and latest output line, while output and completed steps
+scroll above it with a step name prefix. Redraws are coalesced to a fixed
+frame rate so that chatty steps cannot make the terminal the bottleneck.
+"""
+import sys
+import threading
+from time import monotonic
+from typing import IO, Dict, List, Optional
+
+from colorama import Style
+
+from aeternum.core.console import ConsoleRenderer, colorize_status
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.runner import (
+    BuildFinished,
+    RunnerEvent,
+    StepFinished,
+    StepOutput,
+    StepSkipped,
+    StepStarted,
+)
+from aeternum.core.timings import RegressionGate
+
+DEFAULT_FRAME_RATE: float = 10.0
+MAX_LINE_WIDTH: int = 120
+
+_CURSOR_UP = "\x1b[{count}F"
+_CLEAR_TO_END = "\x1b[J"
+
+
+class _RunningStep:
+    __slots__ = ("name", "started_at", "last_line")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started_at = monotonic()
+        self.last_line = ""
+
+
+class LiveDashboard:
+    """Runner event listener rendering a live, rate-limited build dashboard.
+
+    Falls back to plain prefixed lines when the output is not a terminal.
+    """
+
+    def __init__(
+        self,
+        quiet_output: bool = False,
+        frame_rate: float = DEFAULT_FRAME_RATE,
+        stream: Optional[IO[str]] = None,
+        gate: Optional[RegressionGate] = None,
+    ) -> None:
+        self.quiet_output = quiet_output
+        self.gate = gate
+        self.frame_interval = 1.0 / frame_rate
+        self.stream = stream or sys.stdout
+        self.live = bool(getattr(self.stream, "isatty", lambda: False)())
+        self.__lock = threading.Lock()
+        self.__running: Dict[int, _RunningStep] = {}
+        self.__pending: List[str] = []
+        self.__region_height = 0
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def __call__(self, event: RunnerEvent) -> None:
+        if isinstance(event, StepStarted):
+            if event.dry_run:
+                self.__scroll(f"[{event.planned.name}] {event.planned.command}")
+                return
+            with self.__lock:
+                self.__running[event.planned.index] = _RunningStep(event.planned.name)
+            self.__ensure_started()
+        elif isinstance(event, StepSkipped):
+            if event.reason:
+                status = colorize_status(event.status)
+                self.__scroll(f"[{event.planned.name}] {status} ({event.reason})")
+        elif isinstance(event, StepOutput):
+            with self.__lock:
+                running = self.__running.get(event.planned.index)
+                if running is not None:
+                    running.last_line = event.line
+            if not self.quiet_output:
+                self.__scroll(f"[{event.planned.name}] {event.line}")
+        elif isinstance(event, StepFinished):
+            outcome = event.outcome
+            with self.__lock:
+                self.__running.pop(outcome.index, None)
+            duration = outcome.result.duration if outcome.result else 0.0
+            self.__scroll(
+                f"[{outcome.name}] {colorize_status(outcome.status)} "
+                + f"in {duration:.2f}s"
+            )
+            if outcome.status == StepExecutionStatus.FAILED and outcome.result:
+                for line in outcome.result.stderr.splitlines()[-5:]:
+                    self.__scroll(f"[{outcome.name}] {line}")
+        elif isinstance(event, BuildFinished):
+            self.close()
+            ConsoleRenderer.render_summary(event.result, self.gate)
+
+    def __scroll(self, line: str) -> None:
+        if not self.live:
+            self.stream.write(f"{line}\n")
+            self.stream.flush()
+            return
+        with self.__lock:
+            self.__pending.append(line)
+
+    def __ensure_started(self) -> None:
+        if self.live and self.__thread is None:
+            self.__thread = threading.Thread(target=self.__render_loop, daemon=True)
+            self.__thread.start()
+
+    def __render_loop(self) -> None:
+        while not self.__stop.wait(self.frame_interval):
+            self.render_frame()
+
+    def render_frame(self) -> None:
+        """Redraw the dashboard once, flushing scrolled lines above it."""
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+            now = monotonic()
+            region = [
+                f"{Style.BRIGHT}{step.name}{Style.RESET_ALL} "
+                + f"({now - step.started_at:.1f}s) {step.last_line}"
+                for step in self.__running.values()
+            ]
+        frame = []
+        if self.__region_height:
+            frame.append(_CURSOR_UP.format(count=self.__region_height))
+        frame.append(_CLEAR_TO_END)
+        frame.extend(f"{line}\n" for line in pending)
+        frame.extend(f"{line[:MAX_LINE_WIDTH]}\n" for line in region)
+        self.stream.write("".join(frame))
+        self.stream.flush()
+        self.__region_height = len(region)
+
+    def close(self) -> None:
+        """Stop redrawing and flush any remaining output."""
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        if self.live:
+            self.render_frame()
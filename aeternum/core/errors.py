@@ -8,6 +8,7 @@ class ExitCode:
     RUNTIME_ERROR: Final[int] = 1
     INPUT_ERROR: Final[int] = 2
     VALIDATION_ERROR: Final[int] = 3
+    PERFORMANCE_REGRESSION: Final[int] = 4
 
 
 class AeternumBaseError(Exception):
@@ -65,3 +66,16 @@ class AeternumValidationError(AeternumBaseError):
         """Init an Aeternum Validation Error."""
         self.message = message
         super().__init__(self.message, ExitCode.VALIDATION_ERROR, help_text)
+
+
+class AeternumPerformanceError(AeternumBaseError):
+    """Aeternum Performance Regression Error class."""
+
+    def __init__(
+        self,
+        message: str,
+        help_text: Optional[str] = None,
+    ) -> None:
+        """Init an Aeternum Performance Error."""
+        self.message = message
+        super().__init__(self.message, ExitCode.PERFORMANCE_REGRESSION, help_text)
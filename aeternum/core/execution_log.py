@@ -0,0 +1,272 @@
+"""Exported execution log format."""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tabulate import tabulate
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.errors import AeternumInputError
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLE_HEADERS: List[str] = ["#", "NAME", "COMMAND", "STATUS"]
+
+_COLUMN_RULE_PATTERN = re.compile(r"-+")
+_DURATION_PATTERN = re.compile(r"^([\d.]+)s$")
+
+# When shard logs disagree about a step, the most informative status wins
+_STATUS_PRECEDENCE: Dict[str, int] = {
+    StepExecutionStatus.FAILED: 6,
+    StepExecutionStatus.COMPLETED: 5,
+    StepExecutionStatus.RESTORED: 4,
+    StepExecutionStatus.RESUMED: 3,
+    StepExecutionStatus.SKIPPED: 2,
+    StepExecutionStatus.NOT_EXECUTED: 1,
+    StepExecutionStatus.EXCLUDED: 0,
+}
+
+
+@dataclass(frozen=True)
+class ExecutionLogRow:
+    index: int
+    name: str
+    command: str
+    status: str
+
+
+@dataclass
+class ExecutionLog:
+    project: str
+    version: str
+    shell: str
+    duration: float
+    dry_run: bool
+    rows: List[ExecutionLogRow] = field(default_factory=list)
+    shard: Optional[str] = None
+    # Files holding the captured output of steps, keyed by step index
+    outputs: Dict[int, str] = field(default_factory=dict)
+    # JUnit results of test steps, keyed by step index
+    tests: Dict[int, str] = field(default_factory=dict)
+    # Utilization of sampled steps, keyed by step index
+    resources: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def mode(self) -> str:
+        return "DRY RUN" if self.dry_run else "STANDARD"
+
+    def status_counts(self) -> Dict[str, int]:
+        """Count rows per status, always listing the statuses of the mode."""
+        if self.dry_run:
+            counts = {StepExecutionStatus.NOT_EXECUTED: 0}
+        else:
+            counts = {
+                StepExecutionStatus.COMPLETED: 0,
+                StepExecutionStatus.FAILED: 0,
+                StepExecutionStatus.SKIPPED: 0,
+            }
+        for row in self.rows:
+            counts[row.status] = counts.get(row.status, 0) + 1
+        return counts
+
+    def render(self) -> str:
+        """Render the log as plain text."""
+        step_summary_report = tabulate(
+            [[row.index, row.name, row.command, row.status] for row in self.rows],
+            headers=LOG_TABLE_HEADERS,
+            showindex=False,
+            numalign="center",
+            tablefmt="simple",
+        )
+        lines = [
+            f"Project: {self.project}",
+            f"Version: {self.version}",
+            f"Shell: {self.shell}",
+        ]
+        if self.shard is not None:
+            lines.append(f"Shard: {self.shard}")
+        lines.extend([f"Execution duration: {self.duration:.3f}s", "", "Step Summary:"])
+        lines.extend(
+            f"{status}: {count}" for status, count in self.status_counts().items()
+        )
+        lines.extend(["", f"Build Output ({self.mode}):", step_summary_report])
+        if self.tests:
+            lines.extend(["", "Test Results:"])
+            lines.extend(
+                f"{index}: {self.tests[index]}" for index in sorted(self.tests)
+            )
+        if self.resources:
+            lines.extend(["", "Resource Usage:"])
+            lines.extend(
+                f"{index}: {self.resources[index]}" for index in sorted(self.resources)
+            )
+        if self.outputs:
+            lines.extend(["", "Step Output:"])
+            lines.extend(
+                f"{index}: {self.outputs[index]}" for index in sorted(self.outputs)
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, filepath: Path) -> None:
+        """Write the log to a file.
+
+        Args:
+            filepath (Path): Output path to write to
+        """
+        with open(filepath, "w") as file:
+            file.write(self.render())
+
+    @classmethod
+    def load(cls, filepath: Path) -> "ExecutionLog":
+        """Parse a log previously written by Aeternum.
+
+        Args:
+            filepath (Path): Path of the log file
+
+        Returns:
+            ExecutionLog: Parsed execution log
+        """
+        try:
+            with open(filepath, "r") as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            raise AeternumInputError(f"Execution log not found: {filepath}")
+
+        try:
+            headers = {}
+            for line in lines:
+                if not line:
+                    break
+                key, _, value = line.partition(": ")
+                headers[key] = value
+            table_lines = lines[lines.index("Step Summary:") :]
+            mode_line = next(
+                line for line in table_lines if line.startswith("Build Output (")
+            )
+            table_start = table_lines.index(mode_line) + 1
+            outputs = {}
+            if "Step Output:" in table_lines:
+                output_start = table_lines.index("Step Output:")
+                outputs = _parse_sections(table_lines[output_start + 1 :])
+                table_lines = table_lines[:output_start]
+            resources = {}
+            if "Resource Usage:" in table_lines:
+                resources_start = table_lines.index("Resource Usage:")
+                resources = _parse_sections(table_lines[resources_start + 1 :])
+                table_lines = table_lines[:resources_start]
+            tests = {}
+            if "Test Results:" in table_lines:
+                tests_start = table_lines.index("Test Results:")
+                tests = _parse_sections(table_lines[tests_start + 1 :])
+                table_lines = table_lines[:tests_start]
+            duration_match = _DURATION_PATTERN.match(headers["Execution duration"])
+            return cls(
+                project=headers["Project"],
+                version=headers["Version"],
+                shell=headers["Shell"],
+                duration=float(duration_match.group(1)),
+                dry_run=mode_line == "Build Output (DRY RUN):",
+                rows=_parse_table(table_lines[table_start:]),
+                shard=headers.get("Shard"),
+                outputs=outputs,
+                tests=tests,
+                resources=resources,
+            )
+        except (KeyError, ValueError, AttributeError, StopIteration) as err:
+            raise AeternumInputError(
+                f"Failed to parse execution log: {filepath}",
+                "Only logs exported with --save-output can be read.",
+            ) from err
+
+
+def _parse_sections(lines: Sequence[str]) -> Dict[int, str]:
+    """Parse '<step index>: <value>' lines, up to the next blank line."""
+    values = {}
+    for line in lines:
+        if not line:
+            break
+        index, _, value = line.partition(": ")
+        values[int(index)] = value
+    return values
+
+
+def _parse_table(lines: Sequence[str]) -> List[ExecutionLogRow]:
+    """Parse a tabulate 'simple' table using the dashed rule for columns."""
+    if len(lines) < 2:
+        raise ValueError("Missing step table")
+    spans: List[Tuple[int, Optional[int]]] = []
+    rule_matches = list(_COLUMN_RULE_PATTERN.finditer(lines[1]))
+    for idx, match in enumerate(rule_matches):
+        is_last = idx == len(rule_matches) - 1
+        end = None if is_last else rule_matches[idx + 1].start()
+        spans.append((match.start(), end))
+
+    rows = []
+    for line in lines[2:]:
+        if not line.strip():
+            continue
+        index, name, command, status = (line[start:end].strip() for start, end in spans)
+        rows.append(ExecutionLogRow(int(index), name, command, status))
+    return rows
+
+
+def merge_execution_logs(logs: Sequence[ExecutionLog]) -> ExecutionLog:
+    """Combine the logs of several shards of one build into a single report.
+
+    Args:
+        logs (Sequence[ExecutionLog]): Logs of the same project to merge
+
+    Returns:
+        ExecutionLog: Combined log, with the wall-clock duration of the
+            slowest shard
+
+    Raises:
+        AeternumInputError: If the logs belong to different projects
+    """
+    if not logs:
+        raise AeternumInputError("No execution logs given to merge")
+    first = logs[0]
+    for log in logs[1:]:
+        if (log.project, log.version) != (first.project, first.version):
+            raise AeternumInputError(
+                f"Cannot merge logs of {log.project} v{log.version} "
+                + f"with logs of {first.project} v{first.version}"
+            )
+
+    rows_by_index: Dict[int, ExecutionLogRow] = {}
+    outputs: Dict[int, str] = {}
+    tests: Dict[int, str] = {}
+    resources: Dict[int, str] = {}
+    for log in logs:
+        for row in log.rows:
+            current = rows_by_index.get(row.index)
+            if current is None or _STATUS_PRECEDENCE.get(
+                row.status, 0
+            ) > _STATUS_PRECEDENCE.get(current.status, 0):
+                rows_by_index[row.index] = row
+                if row.index in log.outputs:
+                    outputs[row.index] = log.outputs[row.index]
+                if row.index in log.tests:
+                    tests[row.index] = log.tests[row.index]
+                if row.index in log.resources:
+                    resources[row.index] = log.resources[row.index]
+
+    shards = [log.shard for log in logs if log.shard is not None]
+    shard_counts = {shard.partition("/")[2] for shard in shards}
+    if len(shard_counts) > 1:
+        logger.warning(f"Merging logs with different shard counts: {shards}")
+    return ExecutionLog(
+        project=first.project,
+        version=first.version,
+        shell=first.shell,
+        duration=max(log.duration for log in logs),
+        dry_run=all(log.dry_run for log in logs),
+        rows=[rows_by_index[idx] for idx in sorted(rows_by_index)],
+        shard=", ".join(sorted(shards)) if shards else None,
+        outputs=outputs,
+        tests=tests,
+        resources=resources,
+    )
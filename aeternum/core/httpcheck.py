@@ -0,0 +1,192 @@
+"""HTTP readiness and smoke checks.
+
+An `http_check` step probes its endpoints concurrently through one pooled
+session instead of a `curl` process per probe. Each endpoint is retried with
+exponential backoff until its expected status and body match or the overall
+deadline of the check passes. The report lists the latency percentiles of
+every endpoint over all of its attempts; the percentiles over all endpoints
+are returned with the result for the build summary.
+"""
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import monotonic, perf_counter, sleep
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple
+
+from tabulate import tabulate
+
+from aeternum.core.capture import CapturedOutput
+from aeternum.core.spawn import ProcessResult
+
+if TYPE_CHECKING:
+    from aeternum.core.models import HttpCheck, HttpEndpoint
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_PROBES: int = 32
+REPORT_HEADERS: List[str] = ["URL", "STATUS", "ATTEMPTS", "P50", "P90", "P99"]
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class ProbeResult:
+    url: str
+    succeeded: bool = False
+    latencies: List[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def attempts(self) -> int:
+        return len(self.latencies)
+
+    def latency_ms(self, fraction: float) -> str:
+        if not self.latencies:
+            return "-"
+        return f"{percentile(self.latencies, fraction) * 1000:.1f}ms"
+
+
+@dataclass(frozen=True)
+class LatencySummary:
+    """Latency percentiles over every request of a check, in seconds."""
+
+    requests: int
+    p50: float
+    p90: float
+    p99: float
+
+    @classmethod
+    def of(cls, results: Sequence[ProbeResult]) -> Optional["LatencySummary"]:
+        latencies = [latency for result in results for latency in result.latencies]
+        if not latencies:
+            return None
+        return cls(
+            len(latencies),
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.9),
+            percentile(latencies, 0.99),
+        )
+
+    def describe(self) -> str:
+        """Summarize the percentiles, e.g. 'p50 1.2ms, p90 3.4ms, p99 9.8ms'."""
+        return (
+            f"p50 {self.p50 * 1000:.1f}ms, p90 {self.p90 * 1000:.1f}ms, "
+            + f"p99 {self.p99 * 1000:.1f}ms over {self.requests} requests"
+        )
+
+
+def _mismatch(endpoint: "HttpEndpoint", response: Any) -> Optional[str]:
+    """Describe how a response differs from the expected one, if it does."""
+    if response.status_code != endpoint.status:
+        return f"status {response.status_code}, expected {endpoint.status}"
+    if endpoint.body is not None and not re.search(endpoint.body, response.text):
+        return f"body does not match '{endpoint.body}'"
+    return None
+
+
+def probe(
+    session: Any, endpoint: "HttpEndpoint", check: "HttpCheck", deadline: float
+) -> ProbeResult:
+    """Probe one endpoint until it matches or the deadline passes.
+
+    Args:
+        session (requests.Session): Pooled session shared by the probes
+        endpoint (HttpEndpoint): Endpoint and expected response
+        check (HttpCheck): Timing settings of the check
+        deadline (float): time.monotonic() value after which probing stops
+
+    Returns:
+        ProbeResult: Outcome and the latency of every attempt
+    """
+    import requests
+
+    result = ProbeResult(endpoint.url)
+    delay = check.interval
+    while True:
+        timeout = min(check.timeout, max(deadline - monotonic(), 0.001))
+        start_time = perf_counter()
+        try:
+            response = session.request(endpoint.method, endpoint.url, timeout=timeout)
+            result.latencies.append(perf_counter() - start_time)
+            result.error = _mismatch(endpoint, response)
+        except requests.RequestException as err:
+            result.latencies.append(perf_counter() - start_time)
+            result.error = f"{type(err).__name__}: {err}"
+        if result.error is None:
+            result.succeeded = True
+            return result
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return result
+        logger.debug(f"Probe of {endpoint.url} failed ({result.error}), retrying")
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, check.max_interval)
+
+
+def run_http_check(
+    check: "HttpCheck", capture: CapturedOutput
+) -> Tuple[ProcessResult, Optional[LatencySummary]]:
+    """Probe all endpoints of a check concurrently.
+
+    Args:
+        check (HttpCheck): Endpoints, expectations and timing of the check
+        capture (CapturedOutput): Files receiving the report and the errors
+
+    Returns:
+        Tuple[ProcessResult, Optional[LatencySummary]]: Exit code 0 if every
+            endpoint matched, 1 otherwise, and the latency percentiles over
+            all requests
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    start_time = perf_counter()
+    deadline = monotonic() + check.deadline
+    workers = min(MAX_CONCURRENT_PROBES, len(check.endpoints))
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    lambda endpoint: probe(session, endpoint, check, deadline),
+                    check.endpoints,
+                )
+            )
+
+    report = tabulate(
+        [
+            [
+                result.url,
+                "OK" if result.succeeded else "FAILED",
+                result.attempts,
+                result.latency_ms(0.5),
+                result.latency_ms(0.9),
+                result.latency_ms(0.99),
+            ]
+            for result in results
+        ],
+        headers=REPORT_HEADERS,
+        tablefmt="simple",
+    )
+    capture.stdout.write(f"{report}\n".encode("utf-8"))
+    for result in results:
+        if not result.succeeded:
+            capture.stderr.write(
+                f"{result.url}: {result.error} after {result.attempts} attempts\n".encode(
+                    "utf-8"
+                )
+            )
+    returncode = 0 if all(result.succeeded for result in results) else 1
+    return (
+        ProcessResult(returncode, None, None, perf_counter() - start_time),
+        LatencySummary.of(results),
+    )
@@ -0,0 +1,226 @@
+"""GNU make jobserver support.
+
+Implements the POSIX token protocol used by GNU make, cargo and ninja so that
+nested parallel tools launched from build steps share one concurrency budget.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from aeternum.core.errors import AeternumInputError, AeternumRuntimeError
+
+logger = logging.getLogger(__name__)
+
+JOBSERVER_TOKEN: bytes = b"+"
+
+_JOBSERVER_AUTH_PATTERN = re.compile(r"--jobserver-(?:auth|fds)=(\S+)")
+_JOBS_FLAG_PATTERN = re.compile(r"(?:^|\s)-j(\d*)(?=\s|$)")
+
+
+class JobServer:
+    """A jobserver token pool, either owned by Aeternum or joined from make.
+
+    Every participant holds one implicit token for the job it is currently
+    running; additional concurrent jobs must first acquire a token from the
+    pool and give it back once they finish.
+    """
+
+    def __init__(
+        self,
+        read_fd: int,
+        write_fd: int,
+        jobs: Optional[int] = None,
+        fifo_path: Optional[Path] = None,
+        owner: bool = False,
+        makeflags: Optional[str] = None,
+    ) -> None:
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.jobs = jobs
+        self.fifo_path = fifo_path
+        self.owner = owner
+        self.__inherited_makeflags = makeflags
+        self.__held_tokens: List[bytes] = []
+
+    @classmethod
+    def create(cls, jobs: int, use_fifo: bool = False) -> "JobServer":
+        """Create a new jobserver that hands out up to `jobs` concurrent slots.
+
+        Args:
+            jobs (int): Total concurrency, including the implicit token
+            use_fifo (bool): Use a named FIFO (GNU make 4.4+) instead of a pipe
+
+        Returns:
+            JobServer: Jobserver owned by this process
+        """
+        if jobs < 1:
+            raise AeternumInputError(
+                f"Job count must be at least 1, got {jobs}",
+                "Pass a positive value to --jobs.",
+            )
+        fifo_path = None
+        if use_fifo:
+            fifo_dir = tempfile.mkdtemp(prefix="aeternum-jobserver-")
+            fifo_path = Path(fifo_dir, "fifo")
+            os.mkfifo(fifo_path, 0o600)
+            read_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+            write_fd = os.open(fifo_path, os.O_WRONLY)
+            os.set_blocking(read_fd, True)
+        else:
+            read_fd, write_fd = os.pipe()
+
+        if jobs > 1:
+            os.write(write_fd, JOBSERVER_TOKEN * (jobs - 1))
+        logger.debug(f"Created jobserver with {jobs} slots")
+        return cls(read_fd, write_fd, jobs=jobs, fifo_path=fifo_path, owner=True)
+
+    @classmethod
+    def from_makeflags(cls, makeflags: Optional[str]) -> Optional["JobServer"]:
+        """Join the jobserver advertised by a parent make, if any.
+
+        Args:
+            makeflags (Optional[str]): Value of the MAKEFLAGS variable
+
+        Returns:
+            Optional[JobServer]: Client for the parent jobserver, or None
+        """
+        if not makeflags:
+            return None
+        auth_matches = _JOBSERVER_AUTH_PATTERN.findall(makeflags)
+        if not auth_matches:
+            return None
+
+        # GNU make may repeat the flag; the last occurrence wins
+        auth = auth_matches[-1]
+        jobs_match = _JOBS_FLAG_PATTERN.search(makeflags)
+        jobs = int(jobs_match.group(1)) if jobs_match and jobs_match.group(1) else None
+        if auth.startswith("fifo:"):
+            fifo_path = Path(auth[len("fifo:") :])
+            try:
+                read_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+                write_fd = os.open(fifo_path, os.O_WRONLY)
+                os.set_blocking(read_fd, True)
+            except OSError as err:
+                logger.warning(f"Cannot open jobserver FIFO {fifo_path}: {err}")
+                return None
+            return cls(
+                read_fd, write_fd, jobs=jobs, fifo_path=fifo_path, makeflags=makeflags
+            )
+
+        try:
+            read_fd, write_fd = (int(fd) for fd in auth.split(",", maxsplit=1))
+            os.fstat(read_fd)
+            os.fstat(write_fd)
+        except (ValueError, OSError):
+            # The parent did not pass its pipe down, usually because the
+            # recipe invoking us is not marked as recursive with '+'
+            logger.warning(
+                f"Jobserver '{auth}' from MAKEFLAGS is not usable, ignoring it"
+            )
+            return None
+        return cls(read_fd, write_fd, jobs=jobs, makeflags=makeflags)
+
+    @classmethod
+    def from_environment(
+        cls, jobs: Optional[int] = None, use_fifo: bool = False
+    ) -> Optional["JobServer"]:
+        """Join an inherited jobserver, or create one when jobs are requested.
+
+        Args:
+            jobs (Optional[int]): Concurrency to use if no jobserver is inherited
+            use_fifo (bool): Use a named FIFO for a newly created jobserver
+
+        Returns:
+            Optional[JobServer]: Active jobserver, or None if not configured
+        """
+        inherited = cls.from_makeflags(os.environ.get("MAKEFLAGS"))
+        if inherited is not None:
+            if jobs is not None:
+                logger.info("Joined parent make jobserver, ignoring requested jobs")
+            return inherited
+        if jobs is None:
+            return None
+        return cls.create(jobs, use_fifo=use_fifo)
+
+    @property
+    def makeflags(self) -> str:
+        """MAKEFLAGS value advertising this jobserver to child processes."""
+        if not self.owner:
+            return self.__inherited_makeflags
+        if self.fifo_path is not None:
+            auth = f"fifo:{self.fifo_path}"
+        else:
+            auth = f"{self.read_fd},{self.write_fd}"
+        inherited_flags = _JOBSERVER_AUTH_PATTERN.sub(
+            "", _JOBS_FLAG_PATTERN.sub(" ", os.environ.get("MAKEFLAGS", ""))
+        ).strip()
+        flags = f"-j{self.jobs} --jobserver-auth={auth}"
+        return f"{inherited_flags} {flags}".strip()
+
+    @property
+    def pass_fds(self) -> Tuple[int, ...]:
+        """File descriptors a child must inherit to use the jobserver."""
+        if self.fifo_path is not None:
+            return ()
+        return (self.read_fd, self.write_fd)
+
+    def child_env(self, base: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+        """Build the environment for a child process joining this jobserver.
+
+        Args:
+            base (Optional[Mapping[str, str]]): Environment to extend,
+                defaults to the current process environment
+
+        Returns:
+            Dict[str, str]: Environment with MAKEFLAGS set
+        """
+        env = dict(os.environ if base is None else base)
+        env["MAKEFLAGS"] = self.makeflags
+        return env
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        token = os.read(self.read_fd, 1)
+        if not token:
+            raise AeternumRuntimeError("Jobserver pipe closed unexpectedly")
+        self.__held_tokens.append(token)
+
+    def release(self) -> None:
+        """Return a previously acquired token to the pool."""
+        if not self.__held_tokens:
+            raise AeternumRuntimeError("Released a jobserver token that was not held")
+        os.write(self.write_fd, self.__held_tokens.pop())
+
+    @contextmanager
+    def token(self) -> Iterator[None]:
+        """Hold a token for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def __enter__(self) -> "JobServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Return held tokens and release the pool resources."""
+        while self.__held_tokens:
+            self.release()
+        if not self.owner and self.fifo_path is None:
+            # Inherited pipe descriptors belong to the parent make
+            return
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+        if self.owner and self.fifo_path is not None:
+            self.fifo_path.unlink(missing_ok=True)
+            self.fifo_path.parent.rmdir()
+        logger.debug("Closed jobserver")
@@ -0,0 +1,151 @@
+"""Crash-safe journal of step completions, used to resume builds.
+
+Each spec has one journal file under `.aeternum/journal/`, named after the
+hash of the spec, holding the entries of its most recent run as JSON lines.
+Every entry is flushed and fsync'd before the build moves on, so a journal
+survives the build being killed at any point; a torn last line is ignored.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import IO, Dict, List, Mapping, Optional
+
+from aeternum.core.constants import ProjectFiles, StepExecutionStatus
+from aeternum.core.runner import (
+    BuildFinished,
+    BuildStarted,
+    RunnerEvent,
+    StepFinished,
+)
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FORMAT_VERSION: int = 1
+
+
+def journal_path(spec_hash: str, state_dir: Optional[Path] = None) -> Path:
+    """Location of the journal of a spec."""
+    directory = state_dir or Path(ProjectFiles.STATE_DIR)
+    return Path(directory, "journal", f"{spec_hash}.jsonl")
+
+
+def read_journal(path: Path) -> List[Dict]:
+    """Read the entries of a journal, ignoring a torn trailing line."""
+    entries = []
+    try:
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.debug(f"Ignoring incomplete journal entry in {path}")
+                    break
+    except OSError:
+        return []
+    return entries
+
+
+def resumable_steps(path: Path) -> Dict[int, str]:
+    """Steps already completed by the last run, if it failed or was interrupted.
+
+    Args:
+        path (Path): Journal file of the spec
+
+    Returns:
+        Dict[int, str]: Step names keyed by their 1-based index; empty when
+            there is no journal or its last run succeeded
+    """
+    entries = read_journal(path)
+    if not entries or entries[0].get("version") != JOURNAL_FORMAT_VERSION:
+        return {}
+    if entries[-1].get("event") == "end" and entries[-1].get("succeeded"):
+        return {}
+    return {
+        entry["index"]: entry["name"]
+        for entry in entries
+        if entry.get("event") == "step"
+        and entry.get("status")
+        in (StepExecutionStatus.COMPLETED, StepExecutionStatus.RESUMED)
+    }
+
+
+class JournalWriter:
+    """Runner event listener appending step completions to a journal.
+
+    Args:
+        path (Path): Journal file, replaced when the build starts
+        resumed (Mapping[int, str]): Steps carried over from the previous run,
+            recorded up front so that a later resume skips them as well
+    """
+
+    def __init__(self, path: Path, resumed: Optional[Mapping[int, str]] = None):
+        self.path = Path(path)
+        self.resumed = dict(resumed or {})
+        self.__file: Optional[IO[str]] = None
+
+    def __call__(self, event: RunnerEvent) -> None:
+        if isinstance(event, BuildStarted):
+            self.__start(event.plan.project)
+        elif isinstance(event, StepFinished):
+            outcome = event.outcome
+            self.__append(
+                {
+                    "event": "step",
+                    "index": outcome.index,
+                    "name": outcome.name,
+                    "status": outcome.status,
+                }
+            )
+        elif isinstance(event, BuildFinished):
+            self.__append({"event": "end", "succeeded": event.result.succeeded})
+            self.close()
+
+    def __start(self, project: str) -> None:
+        """Replace the journal with the header of a new run."""
+        lines = [
+            {"event": "start", "version": JOURNAL_FORMAT_VERSION, "project": project},
+            *(
+                {
+                    "event": "step",
+                    "index": index,
+                    "name": name,
+                    "status": StepExecutionStatus.RESUMED,
+                }
+                for index, name in sorted(self.resumed.items())
+            ),
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temp_file, "w") as file:
+            file.writelines(f"{json.dumps(line)}\n" for line in lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.path)
+        self.__fsync_directory()
+        self.__file = open(self.path, "a")
+
+    def __append(self, entry: Dict) -> None:
+        if self.__file is None:
+            return
+        self.__file.write(f"{json.dumps(entry)}\n")
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+
+    def __fsync_directory(self) -> None:
+        """Persist the rename of the journal file itself."""
+        try:
+            directory_fd = os.open(self.path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(directory_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(directory_fd)
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
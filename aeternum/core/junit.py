@@ -0,0 +1,274 @@
+"""JUnit XML reports of test steps.
+
+Test steps may declare the `junit` reports they write. Reports are read with
+`iterparse` and every test case is cleared and detached from its parent once
+counted, so memory stays flat however many test cases a report holds. Only
+counts, the first failures and the duration of every test are kept.
+
+When the step finishes, its per-test durations are appended to a history under
+`.aeternum/tests/`, one file per step holding the most recent durations of
+every test, for trend analysis across runs. The build results keep only the
+aggregated counts, so they do not grow with the number of tests.
+"""
+import glob
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
+
+from aeternum.core.cache import atomic_write
+from aeternum.core.constants import ProjectFiles
+from aeternum.core.runner import RunnerEvent, StepFinished
+
+logger = logging.getLogger(__name__)
+
+MAX_FAILURE_DETAILS: int = 20
+TEST_HISTORY_RUNS: int = 10
+TEST_HISTORY_FORMAT_VERSION: int = 1
+
+_UNSAFE_FILE_CHARACTERS = re.compile(r"[^\w.-]+")
+
+
+@dataclass(frozen=True)
+class JUnitTestCase:
+    name: str
+    classname: str
+    time: float
+    # One of 'passed', 'failed', 'error' or 'skipped'
+    status: str
+    message: Optional[str] = None
+
+    @property
+    def test_id(self) -> str:
+        return f"{self.classname}.{self.name}" if self.classname else self.name
+
+
+def _seconds(value: Optional[str]) -> float:
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+
+def iter_test_cases(report: Path) -> Iterator[JUnitTestCase]:
+    """Stream the test cases of a JUnit XML report.
+
+    Args:
+        report (Path): Path of the report
+
+    Returns:
+        Iterator[JUnitTestCase]: Test cases in document order
+    """
+    parents: List[ET.Element] = []
+    for event, element in ET.iterparse(report, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag != "testcase":
+            continue
+        status, message = "passed", None
+        for outcome in ("failure", "error", "skipped"):
+            detail = element.find(outcome)
+            if detail is not None:
+                status = "failed" if outcome == "failure" else outcome
+                message = detail.attrib.get("message") or (detail.text or "").strip()
+                break
+        yield JUnitTestCase(
+            name=element.attrib.get("name", ""),
+            classname=element.attrib.get("classname", ""),
+            time=_seconds(element.attrib.get("time")),
+            status=status,
+            message=message or None,
+        )
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
+
+
+@dataclass
+class JUnitSummary:
+    """Aggregated results of the JUnit reports of a step."""
+
+    reports: int = 0
+    tests: int = 0
+    failures: int = 0
+    errors: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+    # The first failed or errored test cases
+    failed: List[JUnitTestCase] = field(default_factory=list)
+    # Duration of every test, keyed by test id
+    durations: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def passed(self) -> int:
+        return self.tests - self.failures - self.errors - self.skipped
+
+    def add(self, case: JUnitTestCase) -> None:
+        self.tests += 1
+        self.duration += case.time
+        self.durations[case.test_id] = case.time
+        if case.status == "skipped":
+            self.skipped += 1
+            return
+        if case.status == "failed":
+            self.failures += 1
+        elif case.status == "error":
+            self.errors += 1
+        else:
+            return
+        if len(self.failed) < MAX_FAILURE_DETAILS:
+            self.failed.append(case)
+
+    def without_durations(self) -> "JUnitSummary":
+        """Copy holding only the aggregated results, without per-test durations."""
+        return replace(self, durations={})
+
+    def describe(self) -> str:
+        """One-line summary, e.g. '120 tests: 117 passed, 2 failed, 1 skipped'."""
+        counts = [
+            f"{count} {label}"
+            for count, label in (
+                (self.passed, "passed"),
+                (self.failures, "failed"),
+                (self.errors, "errors"),
+                (self.skipped, "skipped"),
+            )
+            if count
+        ]
+        return f"{self.tests} tests: {', '.join(counts) or 'none ran'}"
+
+    def describe_failures(self) -> str:
+        """Summary followed by the ids of the failed tests, if any."""
+        failed_count = self.failures + self.errors
+        if not failed_count:
+            return self.describe()
+        failed = ", ".join(case.test_id for case in self.failed)
+        if failed_count > len(self.failed):
+            failed += f" and {failed_count - len(self.failed)} more"
+        return f"{self.describe()}; failed: {failed}"
+
+
+def find_reports(
+    patterns: Sequence[str], cwd: Path, since: Optional[float] = None
+) -> List[Path]:
+    """Expand report paths and glob patterns relative to a directory.
+
+    Args:
+        patterns (Sequence[str]): Report paths or glob patterns
+        cwd (Path): Directory the patterns are relative to
+        since (Optional[float]): Ignore reports last modified before this
+            time.time() value, e.g. left over from a previous run
+
+    Returns:
+        List[Path]: Existing reports, without duplicates
+    """
+    reports: Dict[Path, None] = {}
+    for pattern in patterns:
+        for match in sorted(glob.glob(pattern, root_dir=cwd, recursive=True)):
+            path = Path(cwd, match)
+            try:
+                if since is not None and path.stat().st_mtime < since:
+                    logger.debug(f"Ignoring stale JUnit report {path}")
+                    continue
+            except OSError:
+                continue
+            reports[path] = None
+    return list(reports)
+
+
+def parse_reports(reports: Sequence[Path]) -> JUnitSummary:
+    """Aggregate the test cases of JUnit reports.
+
+    Args:
+        reports (Sequence[Path]): Report files
+
+    Returns:
+        JUnitSummary: Counts, failures and durations of all reports; reports
+            that are not valid XML are skipped with a warning
+    """
+    summary = JUnitSummary()
+    for report in reports:
+        try:
+            for case in iter_test_cases(report):
+                summary.add(case)
+            summary.reports += 1
+        except (ET.ParseError, OSError) as err:
+            logger.warning(f"Could not parse JUnit report {report}: {err}")
+    return summary
+
+
+def duration_history_path(step_name: str, state_dir: Optional[Path] = None) -> Path:
+    """Location of the test duration history of a step."""
+    file_name = _UNSAFE_FILE_CHARACTERS.sub("_", step_name).strip("_") or "step"
+    directory = state_dir or Path(ProjectFiles.STATE_DIR)
+    return Path(directory, "tests", f"{file_name}.json")
+
+
+def record_test_durations(
+    path: Path, durations: Mapping[str, float], keep: int = TEST_HISTORY_RUNS
+) -> None:
+    """Append the test durations of a run to a history file.
+
+    The history keeps the last `keep` durations of every test, most recent
+    last; tests that did not run this time keep their previous entries.
+
+    Args:
+        path (Path): History file of the step
+        durations (Mapping[str, float]): Duration of every test, by test id
+        keep (int): Number of durations kept per test
+    """
+    history: Dict[str, List[float]] = {}
+    runs = 0
+    try:
+        with open(path, "r") as file:
+            content = json.load(file)
+        if content.get("version") == TEST_HISTORY_FORMAT_VERSION:
+            history, runs = content["tests"], content["runs"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    for test_id, duration in durations.items():
+        history[test_id] = [*history.get(test_id, []), duration][-keep:]
+    content = {
+        "version": TEST_HISTORY_FORMAT_VERSION,
+        "runs": runs + 1,
+        "tests": history,
+    }
+    try:
+        atomic_write(path, json.dumps(content, separators=(",", ":")).encode("utf-8"))
+    except OSError as err:
+        logger.warning(f"Could not record test durations to {path}: {err}")
+
+
+class DurationHistoryWriter:
+    """Runner event listener recording the test durations of finished steps.
+
+    Args:
+        state_dir (Optional[Path]): Aeternum state directory
+    """
+
+    def __init__(self, state_dir: Optional[Path] = None) -> None:
+        self.state_dir = state_dir
+
+    def __call__(self, event: RunnerEvent) -> None:
+        if not isinstance(event, StepFinished) or event.outcome.result is None:
+            return
+        summary = event.outcome.result.tests
+        if summary is not None and summary.durations:
+            record_test_durations(
+                duration_history_path(event.outcome.name, self.state_dir),
+                summary.durations,
+            )
+
+
+def load_duration_history(path: Path) -> Dict[str, List[float]]:
+    """Recorded durations of every test of a step, most recent last."""
+    try:
+        with open(path, "r") as file:
+            return dict(json.load(file)["tests"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
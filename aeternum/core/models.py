@@ -1,31 +1,78 @@
 import datetime as dt
+import hashlib
+import json
 import logging
 import os
-import subprocess
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, replace
 from pathlib import Path
-from time import perf_counter
-from typing import List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, List, Literal, Mapping, Optional, Tuple
 
 import click
 import yaml
-from colorama import Fore, Style
-from pydantic import BaseModel, Field, ValidationError, field_validator
-from tabulate import tabulate
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
 
-from aeternum.core.constants import StepExecutionStatus, StepType
+from aeternum.core.actions import run_action
+from aeternum.core.artifacts import ArtifactStore, default_artifact_dir
+from aeternum.core.cache import (
+    CacheStore,
+    hash_files,
+    open_cache_store,
+    render_cache_key,
+)
+from aeternum.core.capture import CapturedOutput, OutputSpool, create_run_dir
+from aeternum.core.console import ConsoleRenderer
+from aeternum.core.constants import StepType
+from aeternum.core.dashboard import LiveDashboard
 from aeternum.core.errors import (
     AeternumInputError,
+    AeternumPerformanceError,
     AeternumRuntimeError,
     AeternumValidationError,
 )
+from aeternum.core.execution_log import ExecutionLog, ExecutionLogRow
+from aeternum.core.httpcheck import LatencySummary, run_http_check
+from aeternum.core.jobserver import JobServer
+from aeternum.core.journal import JournalWriter, journal_path, resumable_steps
+from aeternum.core.junit import (
+    DurationHistoryWriter,
+    JUnitSummary,
+    find_reports,
+    parse_reports,
+)
 from aeternum.core.output import get_command_string
+from aeternum.core.plan import ExecutionPlan, PlannedStep
+from aeternum.core.pystep import PythonWorker, call_in_process
+from aeternum.core.results import tail_text
+from aeternum.core.runner import BuildResult, Runner, RunOptions
+from aeternum.core.sampler import ProcessSampler, ResourceTimeline, write_timelines
+from aeternum.core.sharding import ShardSpec, assign_shards
+from aeternum.core.spawn import (
+    PipelineCommand,
+    ProcessResult,
+    run_pipeline,
+    run_process,
+    stream_process,
+    tee_process,
+)
+from aeternum.core.templating import load_spec_document
+from aeternum.core.timings import RegressionGate, save_timings, smooth_timings
 from aeternum.core.writer import OrderedDumper
 
 logger = logging.getLogger(__name__)
 
 
 ALLOWED_STEP_TYPES: List[str] = [StepType.BUILD, StepType.TEST, StepType.DEPLOY]
+AGGREGATED_STDERR_TAIL_BYTES: int = 2048
+
+_CALLABLE_PATTERN = re.compile(r"^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$")
 
 
 @dataclass(frozen=True)
@@ -35,14 +82,56 @@ class StepExecutionResult:
     stdout: str
     stderr: str
     exit_code: int
+    duration: float = 0.0
+    # Spooled output of the step, when it was captured to files
+    output: Optional[CapturedOutput] = None
+    # Results parsed from the JUnit reports of test steps
+    tests: Optional[JUnitSummary] = None
+    # Resource usage of the step processes, when they were sampled
+    resources: Optional[ResourceTimeline] = None
+    # Request latency percentiles of HTTP check steps
+    latency: Optional[LatencySummary] = None
+
+
+class HttpEndpoint(BaseModel):
+    url: str
+    method: Literal["GET", "HEAD"] = "GET"
+    status: int = 200
+    # Regular expression the response body must contain
+    body: Optional[str] = None
+
+
+class HttpCheck(BaseModel):
+    endpoints: List[HttpEndpoint] = Field(..., min_length=1)
+    timeout: float = 5.0
+    deadline: float = 60.0
+    interval: float = 0.5
+    max_interval: float = 10.0
+
+    @field_validator("endpoints", mode="before")
+    def expand_urls(cls, endpoints: List) -> List:
+        return [
+            {"url": endpoint} if isinstance(endpoint, str) else endpoint
+            for endpoint in endpoints
+        ]
 
 
 class AutomationStep(BaseModel):
     name: str
     category: str
-    command: str
+    command: Optional[str] = None
+    python: Optional[str] = None
+    action: Optional[Literal["copy", "move", "remove", "mkdir", "render"]] = None
+    http_check: Optional[HttpCheck] = None
+    params: Optional[Dict[str, Any]] = None
+    isolated: Optional[bool] = None
     working_dir: Optional[Path] = Field(os.path.relpath(str(Path.cwd()), os.getcwd()))
     args: Optional[List[str]] = []
+    depends_on: Optional[List[str]] = None
+    stdin_from: Optional[str] = None
+    inputs: Optional[List[str]] = None
+    outputs: Optional[List[Path]] = None
+    junit: Optional[List[str]] = None
 
     @field_validator("category")
     def validate_category(cls, v: str) -> str:
@@ -53,6 +142,58 @@ class AutomationStep(BaseModel):
             )
         return v
 
+    @model_validator(mode="after")
+    def validate_kind(self) -> "AutomationStep":
+        kinds = [self.command, self.python, self.action, self.http_check]
+        if sum(kind is not None for kind in kinds) != 1:
+            raise AeternumValidationError(
+                f"Step '{self.name}' must define exactly one of 'command', "
+                + "'python', 'action' or 'http_check'."
+            )
+        if self.python is not None and not _CALLABLE_PATTERN.match(self.python):
+            raise AeternumValidationError(
+                f"Invalid python reference '{self.python}', "
+                + "must look like 'package.module:function'."
+            )
+        if self.junit is not None and self.category != StepType.TEST:
+            raise AeternumValidationError(
+                f"Step '{self.name}' declares JUnit reports, "
+                + f"only '{StepType.TEST}' steps can."
+            )
+        return self
+
+    @property
+    def command_line(self) -> str:
+        """The command the step runs, as shown to users."""
+        if self.python is not None:
+            return f"python:{self.python}"
+        if self.action is not None:
+            return get_command_string(f"action:{self.action}", self.args)
+        if self.http_check is not None:
+            return get_command_string(
+                "http_check", [endpoint.url for endpoint in self.http_check.endpoints]
+            )
+        return get_command_string(self.command, self.args)
+
+    def collect_test_reports(self, since: float) -> Optional[JUnitSummary]:
+        """Parse the JUnit reports the step wrote.
+
+        Args:
+            since (float): time.time() value when the step started; older
+                reports are left over from a previous run and ignored
+
+        Returns:
+            Optional[JUnitSummary]: Aggregated results, None if the step
+                declares no reports or wrote none of them
+        """
+        if not self.junit:
+            return None
+        reports = find_reports(self.junit, self.working_dir, since)
+        if not reports:
+            logger.warning(f"Step '{self.name}' wrote no JUnit report")
+            return None
+        return parse_reports(reports)
+
     @field_validator("working_dir")
     def validate_working_directory(cls, dir_path: str) -> Path:
         working_dir_path = Path(dir_path)
@@ -65,34 +206,286 @@ class AutomationStep(BaseModel):
             raise AeternumValidationError(f"Given path is not a directory: {dir_path}")
         return working_dir_path
 
-    def run(self, shell: str) -> StepExecutionResult:
-        """Run the build commands with a specified shell."""
+    def run(
+        self,
+        shell: str,
+        jobserver: Optional[JobServer] = None,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        capture: Optional[CapturedOutput] = None,
+        mirrors: Optional[Mapping[str, IO]] = None,
+        worker: Optional[PythonWorker] = None,
+        sampler: Optional[ProcessSampler] = None,
+    ) -> StepExecutionResult:
+        """Run the build commands with a specified shell.
 
+        Args:
+            shell (str): Shell used to execute the command
+            jobserver (Optional[JobServer]): Jobserver shared with the child
+            on_output (Optional[Callable[[str, str], None]]): If given, called
+                with the stream name and each output line while the step runs
+            capture (Optional[CapturedOutput]): If given, output is spooled to
+                its files instead of being held in memory
+            mirrors (Optional[Mapping[str, IO]]): Console streams the captured
+                output is teed to while the step runs, keyed by stream name
+            worker (Optional[PythonWorker]): Warm worker for isolated Python
+                callable steps; one is started for the step if not given
+            sampler (Optional[ProcessSampler]): Attached to the process of a
+                command step, to record its resource usage
+        """
+        if self.python is not None:
+            return self.__call_python(capture or CapturedOutput(), worker)
+        if self.action is not None:
+            capture = capture or CapturedOutput()
+            return self.__result(
+                run_action(
+                    self.action,
+                    self.args or [],
+                    self.params or {},
+                    self.working_dir,
+                    capture,
+                ),
+                capture,
+            )
+        if self.http_check is not None:
+            capture = capture or CapturedOutput()
+            result, latency = run_http_check(self.http_check, capture)
+            return replace(self.__result(result, capture), latency=latency)
         cmd_exec = get_command_string(self.command, self.args)
         full_cmd = [shell, "-c", cmd_exec]
-        click.echo(f"Executing command: '{cmd_exec}'")
-        result = subprocess.run(
-            full_cmd, capture_output=True, text=True, cwd=self.working_dir
-        )
+        env = jobserver.child_env() if jobserver else None
+        pass_fds = jobserver.pass_fds if jobserver else ()
+        on_spawn = sampler.attach if sampler is not None else None
+        if on_output is not None:
+            result = stream_process(
+                full_cmd,
+                on_output,
+                cwd=self.working_dir,
+                env=env,
+                pass_fds=pass_fds,
+                sinks=capture.files if capture else None,
+                on_spawn=on_spawn,
+            )
+        elif capture is not None and mirrors is not None:
+            result = tee_process(
+                full_cmd,
+                capture.files,
+                mirrors,
+                cwd=self.working_dir,
+                env=env,
+                pass_fds=pass_fds,
+                on_spawn=on_spawn,
+            )
+        elif capture is not None:
+            result = run_process(
+                full_cmd,
+                cwd=self.working_dir,
+                env=env,
+                pass_fds=pass_fds,
+                stdout=capture.stdout,
+                stderr=capture.stderr,
+                text=False,
+                on_spawn=on_spawn,
+            )
+        else:
+            result = run_process(
+                full_cmd,
+                cwd=self.working_dir,
+                env=env,
+                pass_fds=pass_fds,
+                on_spawn=on_spawn,
+            )
         return StepExecutionResult(
             name=self.name,
             command_executed=cmd_exec,
-            stdout=result.stdout,
-            stderr=result.stderr,
+            stdout="" if capture else result.stdout,
+            stderr=capture.tail("stderr") if capture else result.stderr,
             exit_code=result.returncode,
+            duration=result.duration,
+            output=capture,
         )
 
-    def should_run(self, includes: Tuple[str, ...], excludes: Tuple[str, ...]) -> bool:
+    def __call_python(
+        self, capture: CapturedOutput, worker: Optional[PythonWorker]
+    ) -> StepExecutionResult:
+        params = self.params or {}
+        if self.isolated:
+            step_worker = worker or PythonWorker()
+            try:
+                result = step_worker.call(
+                    self.python, params, self.working_dir, capture
+                )
+            finally:
+                if worker is None:
+                    step_worker.close()
+        else:
+            result = call_in_process(self.python, params, self.working_dir, capture)
+        return self.__result(result, capture)
+
+    def __result(
+        self, result: ProcessResult, capture: CapturedOutput
+    ) -> StepExecutionResult:
+        """Report a step run without a shell like a captured shell step."""
+        return StepExecutionResult(
+            name=self.name,
+            command_executed=self.command_line,
+            stdout="",
+            stderr=capture.tail("stderr"),
+            exit_code=result.returncode,
+            duration=result.duration,
+            output=capture,
+        )
+
+    def run_pipeline(
+        self,
+        consumers: List["AutomationStep"],
+        shell: str,
+        captures: List[CapturedOutput],
+        jobserver: Optional[JobServer] = None,
+        samplers: Optional[List[ProcessSampler]] = None,
+    ) -> List[StepExecutionResult]:
+        """Run the step concurrently with the steps reading its output.
+
+        Each consumer reads the standard output of the step before it through
+        an OS pipe. Only the last step's standard output and every step's
+        standard error are captured.
+
+        Args:
+            consumers (List[AutomationStep]): Steps in pipeline order, each
+                with stdin_from naming the step before it
+            shell (str): Shell used to execute the commands
+            captures (List[CapturedOutput]): Output spool of each step, this
+                step first
+            jobserver (Optional[JobServer]): Jobserver shared with the children
+            samplers (Optional[List[ProcessSampler]]): Sampler attached to the
+                process of each step, this step first
+
+        Returns:
+            List[StepExecutionResult]: Result of each step, this step first
+        """
+        steps = [self, *consumers]
+        commands = [get_command_string(step.command, step.args) for step in steps]
+        results = run_pipeline(
+            [
+                PipelineCommand(
+                    [shell, "-c", command], cwd=step.working_dir, stderr=capture.stderr
+                )
+                for step, command, capture in zip(steps, commands, captures)
+            ],
+            stdout=captures[-1].stdout,
+            env=jobserver.child_env() if jobserver else None,
+            pass_fds=jobserver.pass_fds if jobserver else (),
+            on_spawn=(
+                (lambda position, pid: samplers[position].attach(pid))
+                if samplers is not None
+                else None
+            ),
+        )
+        return [
+            StepExecutionResult(
+                name=step.name,
+                command_executed=command,
+                stdout="",
+                stderr=capture.tail("stderr"),
+                exit_code=result.returncode,
+                duration=result.duration,
+                output=capture,
+            )
+            for step, command, capture, result in zip(
+                steps, commands, captures, results
+            )
+        ]
+
+    def artifact_key(self, shell: str) -> str:
+        """Identify an invocation of the step, for its stored outputs.
+
+        The key covers the command, shell, working directory, declared
+        outputs and the content of the files matching the input patterns.
+
+        Args:
+            shell (str): Shell used to execute the command
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        invocation = {
+            "command": self.command_line,
+            "params": self.params,
+            "shell": shell,
+            "working_dir": str(Path(self.working_dir).resolve()),
+            "outputs": [str(output) for output in self.outputs or []],
+            "inputs": {
+                pattern: hash_files(pattern, self.working_dir)
+                for pattern in self.inputs or []
+            },
+        }
+        encoded = json.dumps(invocation, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def filter_reason(
+        self, includes: Tuple[str, ...], excludes: Tuple[str, ...]
+    ) -> Optional[str]:
+        """Explain why the category filters deselect this step, if they do."""
         if includes and self.category not in includes:
-            return False
+            return "not included"
         if excludes and self.category in excludes:
-            return False
-        return True
+            return "excluded"
+        return None
+
+    def should_run(self, includes: Tuple[str, ...], excludes: Tuple[str, ...]) -> bool:
+        return self.filter_reason(includes, excludes) is None
 
 
 class AutomationStrategy(BaseModel):
     strict: bool = Field(True)
     shell: Optional[str] = Field("/bin/bash")
+    jobs: Optional[int] = Field(None, ge=1)
+    jobserver_style: Optional[Literal["pipe", "fifo"]] = Field(None)
+    failure_policy: Optional[Literal["fail-fast", "keep-going"]] = Field(None)
+
+    @property
+    def keep_going(self) -> bool:
+        return self.failure_policy == "keep-going"
+
+
+class CacheDirectory(BaseModel):
+    name: str
+    key: str
+    paths: List[Path]
+    restore_keys: Optional[List[str]] = None
+
+    def restore(self, store: CacheStore) -> str:
+        """Restore the newest matching cache entry.
+
+        Args:
+            store (CacheStore): Cache store to restore from
+
+        Returns:
+            str: Rendered cache key, used to save the cache after the build
+        """
+        key = render_cache_key(self.key)
+        restore_keys = [render_cache_key(prefix) for prefix in self.restore_keys or []]
+        entry = store.find(key, restore_keys)
+        if entry is None:
+            click.echo(f"Cache '{self.name}' not found for key: {key}")
+            return key
+        file_count = store.restore(entry)
+        click.echo(f"Restored cache '{self.name}' from key: {entry.key}")
+        logger.info(f"Restored {file_count} files of cache '{self.name}'")
+        return key
+
+    def save(self, store: CacheStore, key: str) -> None:
+        """Save the cached paths under a key, unless that key is already stored.
+
+        Args:
+            store (CacheStore): Cache store to save to
+            key (str): Rendered cache key
+        """
+        if store.contains(key):
+            logger.info(f"Cache '{self.name}' is up to date for key: {key}")
+            return
+        written = store.save(key, self.paths)
+        click.echo(f"Saved cache '{self.name}' with key: {key}")
+        logger.info(f"Stored {written} new bytes for cache '{self.name}'")
 
 
 class ValidationSummary(BaseModel):
@@ -108,6 +501,7 @@ class ValidationSummary(BaseModel):
 class BuildStage(BaseModel):
     strategy: AutomationStrategy
     steps: List[AutomationStep]
+    caches: Optional[List[CacheDirectory]] = None
 
     def validate(self, strict: Optional[bool] = False) -> ValidationSummary:
         """Validate the build stage steps list.
@@ -131,6 +525,8 @@ class BuildStage(BaseModel):
         if strict and test_count == 0:
             raise AeternumInputError("No test steps found in build stage")
 
+        self.__validate_dependencies()
+
         return ValidationSummary(
             build_step_count=build_count,
             test_step_count=test_count,
@@ -138,6 +534,38 @@ class BuildStage(BaseModel):
             invalid_step_count=invalid_count,
         )
 
+    def __validate_dependencies(self) -> None:
+        """Check that steps only depend on steps defined before them.
+
+        A step reading another step's output must directly follow it.
+        """
+        seen_names = set()
+        for position, step in enumerate(self.steps):
+            if step.stdin_from is not None and (
+                position == 0 or self.steps[position - 1].name != step.stdin_from
+            ):
+                raise AeternumInputError(
+                    f"Step '{step.name}' reads stdin from '{step.stdin_from}', "
+                    + "which is not the step right before it",
+                    "Steps connected by a pipe run together, so a step reading "
+                    + "another step's output must directly follow it.",
+                )
+            if step.stdin_from is not None and (
+                step.command is None or self.steps[position - 1].command is None
+            ):
+                raise AeternumInputError(
+                    f"Step '{step.name}' reads stdin from '{step.stdin_from}', "
+                    + "but only command steps can be connected by a pipe"
+                )
+            for dependency in step.depends_on or []:
+                if dependency not in seen_names:
+                    raise AeternumInputError(
+                        f"Step '{step.name}' depends on unknown step '{dependency}'",
+                        "Steps run in order, so dependencies must be defined "
+                        + "earlier in the build stage.",
+                    )
+            seen_names.add(step.name)
+
 
 class ProjectSpec(BaseModel):
     name: str
@@ -145,6 +573,8 @@ class ProjectSpec(BaseModel):
     version: str
     build_stage: BuildStage = Field(..., alias="build-stage")
 
+    _plans: Dict[tuple, ExecutionPlan] = PrivateAttr(default_factory=dict)
+
     class Config:
         populate_by_name: bool = True
         use_enum_values: bool = True
@@ -167,6 +597,15 @@ class ProjectSpec(BaseModel):
         """
         return self.build_stage.strategy.shell
 
+    @property
+    def spec_hash(self) -> str:
+        """Get a hash identifying the content of the project spec.
+
+        Returns:
+            str: SHA-256 hex digest of the spec
+        """
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()
+
     @classmethod
     def load_from_inputs(
         cls, name: str, repo_url: str, version: str, strict: bool
@@ -213,7 +652,7 @@ class ProjectSpec(BaseModel):
         full_filepath = filepath.with_suffix(".yaml").resolve()
         with open(full_filepath, "w") as file:
             yaml.dump(
-                self.model_dump(),
+                self.model_dump(exclude_none=True),
                 file,
                 Dumper=OrderedDumper,
                 sort_keys=False,
@@ -223,21 +662,22 @@ class ProjectSpec(BaseModel):
         click.echo(f"Project specification exported to file: '{full_filepath}'")
 
     @classmethod
-    def load_from_yaml(cls, filepath: Path) -> "ProjectSpec":
+    def load_from_yaml(
+        cls, filepath: Path, variables: Optional[Dict[str, str]] = None
+    ) -> "ProjectSpec":
         """Build a ProjectSpec from a YAML file.
 
+        The file may be a Jinja2 template and include spec fragments.
+
         Args:
             filepath (Path): Path of file to read from
+            variables (Optional[Dict[str, str]]): Template variables
         """
         try:
-            data = None
             full_filepath = Path(os.getcwd(), filepath)
-            with open(full_filepath, "r") as file:
-                data = yaml.safe_load(file)
+            data = load_spec_document(full_filepath, variables)
 
-            project = ProjectSpec(**data)
-            click.echo(f"Loaded project: {project.name} v{project.version}")
-            return project
+            return ProjectSpec(**data)
 
         except FileNotFoundError:
             raise AeternumInputError(f"Project spec file not found: {full_filepath}")
@@ -247,69 +687,144 @@ class ProjectSpec(BaseModel):
                 f"Failed to load project spec from {filepath}"
             ) from e
 
-    def __create_log_output(
-        self, steps: List[AutomationStep], duration: float, dry_run_mode: bool
-    ):
+    @staticmethod
+    def check_document(data: Dict[str, Any]) -> None:
+        """Re-run the checks of a loaded spec that do not only depend on its content.
+
+        Used when a plan cached for an unchanged spec is reused without
+        validating the spec again: working directories must still exist, and a
+        strict build still needs test steps.
+
+        Args:
+            data (Dict[str, Any]): Spec document, as loaded from the file
+
+        Raises:
+            AeternumInputError: If a check fails
+            AeternumValidationError: If a working directory is not a directory
+        """
+        build_stage = data.get("build-stage", data.get("build_stage")) or {}
+        steps = build_stage.get("steps") or []
+        for step in steps:
+            if step.get("working_dir") is not None:
+                AutomationStep.validate_working_directory(step["working_dir"])
+        strategy = build_stage.get("strategy") or {}
+        if strategy.get("strict", True) and not any(
+            step.get("category") == StepType.TEST for step in steps
+        ):
+            raise AeternumInputError("No test steps found in build stage")
+
+    def __create_log_output(self, result: BuildResult, run_id: str) -> Path:
         """Write execution log to file.
 
         Args:
-            steps (List[AutomationStep]):
-            duration (float): Total dura
+            result (BuildResult): Result of the build to export
+            run_id (str): Timestamp identifying the run
+
+        Returns:
+            Path: Path of the written log file
+        """
+        file_name = f"aeternum-execution_{run_id}"
+        output_file = Path(file_name).with_suffix(".log").resolve()
+        execution_log = ExecutionLog(
+            project=self.name,
+            version=self.version,
+            shell=self.shell,
+            duration=result.duration,
+            dry_run=result.dry_run,
+            rows=[
+                ExecutionLogRow(
+                    record.index, record.name, record.command, record.status
+                )
+                for record in result.steps
+            ],
+            shard=result.plan.shard,
+            outputs={
+                index: str(output_file)
+                for index, output_file in result.output_files.items()
+            },
+            tests={
+                record.index: summary.describe_failures()
+                for record, summary in result.steps.test_summaries()
+            },
+            resources={
+                record.index: timeline.describe()
+                for record, timeline in result.steps.resource_timelines()
+            },
+        )
+        execution_log.write(output_file)
+        return output_file
+
+    def plan(
+        self,
+        include_filters: Tuple[str, ...] = (),
+        exclude_filters: Tuple[str, ...] = (),
+        shard: Optional[ShardSpec] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> ExecutionPlan:
+        """Resolve which steps a build would run, without any console output.
+
+        Plans are memoized per spec instance and filter combination.
 
         Args:
-            steps (List[AutomationStep]): Automation steps executed
-            duration (float): Total execution duration
-            dry_run_mode (bool): Whether the execution was run in dry-run mode
+            include_filters (Tuple[str, ...]): Steps to include
+            exclude_filters (Tuple[str, ...]): Steps to exclude
+            shard (Optional[ShardSpec]): Only select this shard of the steps
+            timings (Optional[Dict[str, float]]): Recorded step durations used
+                to balance shards
+
+        Returns:
+            ExecutionPlan: Immutable execution plan
         """
-        timestamp = dt.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        file_name = f"aeternum-execution_{timestamp}"
-        output_file = Path(file_name).with_suffix(".log")
-        mode = "DRY RUN" if dry_run_mode else "STANDARD"
-        log_summary_rows = []
-        step_counts_by_status = {}
-        if not dry_run_mode:
-            step_counts_by_status.update(
-                {
-                    StepExecutionStatus.COMPLETED: 0,
-                    StepExecutionStatus.FAILED: 0,
-                    StepExecutionStatus.SKIPPED: 0,
-                }
-            )
-        else:
-            step_counts_by_status.update(
-                {
-                    StepExecutionStatus.NOT_EXECUTED: 0,
-                }
-            )
-        for idx, (step, status) in enumerate(steps, start=1):
-            command = (
-                step.command
-                if not step.args
-                else f"{step.command} {' '.join(step.args)}"
+        cache_key = (
+            tuple(include_filters),
+            tuple(exclude_filters),
+            shard,
+            tuple(sorted((timings or {}).items())),
+        )
+        cached_plan = self._plans.get(cache_key)
+        if cached_plan is not None:
+            return cached_plan
+
+        steps = self.build_stage.steps
+        reasons = [
+            step.filter_reason(include_filters, exclude_filters) for step in steps
+        ]
+        if shard is not None:
+            candidates = [pos for pos, reason in enumerate(reasons) if reason is None]
+            assignment = assign_shards(
+                [steps[pos].name for pos in candidates], shard.count, timings
             )
-            log_summary_rows.append([idx, step.name, command, status])
-            step_counts_by_status[status] += 1
-
-        log_summary_headers = ["#", "NAME", "COMMAND", "STATUS"]
-        step_summary_report = tabulate(
-            log_summary_rows,
-            headers=log_summary_headers,
-            showindex=False,
-            numalign="center",
-            tablefmt="simple",
+            shard_of = dict(zip(candidates, assignment))
+            for pos in candidates:
+                step_shard = shard_of[pos]
+                # Steps connected by a pipe must run in the shard of the producer
+                if steps[pos].stdin_from is not None and pos - 1 in shard_of:
+                    step_shard = shard_of[pos] = shard_of[pos - 1]
+                if step_shard != shard.index - 1:
+                    reasons[pos] = f"shard {step_shard + 1}/{shard.count}"
+
+        plan = ExecutionPlan(
+            project=self.name,
+            version=self.version,
+            shell=self.shell,
+            include=tuple(include_filters),
+            exclude=tuple(exclude_filters),
+            shard=str(shard) if shard else None,
+            steps=tuple(
+                PlannedStep(
+                    index=idx,
+                    name=step.name,
+                    category=step.category,
+                    command=step.command_line,
+                    working_dir=str(step.working_dir),
+                    selected=reason is None,
+                    reason=reason or "selected",
+                )
+                for idx, (step, reason) in enumerate(zip(steps, reasons), start=1)
+            ),
         )
-        with open(str(output_file.resolve()), "w") as file:
-            file.write(f"Project: {self.name}\n")
-            file.write(f"Version: {self.version}\n")
-            file.write(f"Shell: {self.shell}\n")
-            file.write(f"Execution duration: {duration:.3f}s\n\n")
-            file.write("Step Summary:\n")
-            for status, count in step_counts_by_status.items():
-                file.write(f"{status}: {count}\n")
-            file.write("\n")
-            file.write(f"Build Output ({mode}):\n")
-            file.write(step_summary_report)
-            file.write("\n")
+        self._plans[cache_key] = plan
+        return plan
 
     def build(
         self,
@@ -318,6 +833,20 @@ class ProjectSpec(BaseModel):
         export_logs: bool,
         include_filters: Tuple[str, ...],
         exclude_filters: Tuple[str, ...],
+        jobs: Optional[int] = None,
+        shard: Optional[ShardSpec] = None,
+        timings: Optional[Dict[str, float]] = None,
+        record_timings: Optional[Path] = None,
+        dashboard: bool = False,
+        keep_going: Optional[bool] = None,
+        resume: bool = False,
+        cache_store: Optional[CacheStore] = None,
+        artifact_store: Optional[ArtifactStore] = None,
+        compress_output: bool = True,
+        stream: bool = False,
+        regression_gate: Optional[RegressionGate] = None,
+        update_baseline: Optional[Path] = None,
+        sample_interval: Optional[float] = None,
     ) -> None:
         """Run the Aeternum steps for the project.
 
@@ -327,91 +856,151 @@ class ProjectSpec(BaseModel):
             export_logs (bool): If true, export the outputs as a log file
             include_filters (Tuple[str, ...]): Steps to include
             exclude_filters (Tuple[str, ...]): Steps to exclude
+            jobs (Optional[int]): Jobserver slots shared by step processes,
+                overrides the strategy setting
+            shard (Optional[ShardSpec]): Only run this shard of the selected steps
+            timings (Optional[Dict[str, float]]): Recorded step durations used
+                to balance shards
+            record_timings (Optional[Path]): File to record step durations to
+            dashboard (bool): If true, show a live dashboard of running steps
+                and stream their output
+            keep_going (Optional[bool]): If true, keep running steps that do
+                not depend on a failed step; overrides the strategy setting
+            resume (bool): If true, skip the steps already completed by the
+                last failed or interrupted run of this spec
+            cache_store (Optional[CacheStore]): Store for the dependency caches
+                of the build stage, defaults to the configured local store
+            artifact_store (Optional[ArtifactStore]): Store of step outputs,
+                defaults to the configured local store
+            compress_output (bool): Gzip-compress the step output files kept
+                with exported logs
+            stream (bool): If true, copy step output to the console while the
+                steps run; ignored with quiet output or the dashboard
+            regression_gate (Optional[RegressionGate]): If given, fail the
+                build when steps got slower than its baseline allows
+            update_baseline (Optional[Path]): Baseline file to blend the step
+                durations of a successful build without regressions into
+            sample_interval (Optional[float]): If given, sample the resource
+                usage of step processes every this many seconds
 
         Raises:
             AeternumRuntimeError: If any build steps fail
+            AeternumPerformanceError: If steps regressed against the baseline
         """
-        build_label = f"Building {self.name} v{self.version}"
-        fill_char = click.style("=", fg="green")
-        empty_char = click.style("-", fg="white", dim=True)
-        build_progress = click.progressbar(
-            iterable=self.build_stage.steps,
-            label=build_label,
-            fill_char=fill_char,
-            empty_char=empty_char,
+        tee_output = stream and not (quiet_output or dashboard or dry_run_mode)
+        renderer = (
+            LiveDashboard(quiet_output, gate=regression_gate)
+            if dashboard
+            # Streamed output was already shown, the renderer must not repeat it
+            else ConsoleRenderer(quiet_output or tee_output, regression_gate)
         )
-
-        logger.info(f"Building project: {self.name}")
-        executed_steps = []
-        summary = []
-        failed_step = None
-        execution_start_time = perf_counter()
-        with build_progress as builds:
-            for idx, step in enumerate(builds, start=1):
+        runner = Runner(self, listeners=[renderer])
+        run_id = dt.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        spool = None
+        if export_logs and not dry_run_mode:
+            spool = OutputSpool(create_run_dir(run_id), compress_output)
+            # Keep the execution log name in step with a suffixed run directory
+            run_id = spool.directory.name
+        resumed: Dict[int, str] = {}
+        if not dry_run_mode:
+            journal_file = journal_path(self.spec_hash)
+            if resume:
+                resumed = resumable_steps(journal_file)
                 click.echo(
-                    f"\n[{idx} / {len(self.build_stage.steps)}][{step.category.upper()}]: {step.name}"
+                    f"Resuming build, {len(resumed)} steps completed in a previous run"
+                    if resumed
+                    else "No failed or interrupted run to resume, running all steps"
                 )
-                if step.should_run(include_filters, exclude_filters):
-                    if not dry_run_mode:
-                        result = step.run(self.shell)
-                        if result.exit_code != 0:
-                            icon = f"{Fore.RED}{Style.BRIGHT}{StepExecutionStatus.FAILED}{Style.RESET_ALL}"
-                            summary.append([idx, step.name, icon])
-                            executed_steps.append((step, StepExecutionStatus.FAILED))
-                            failed_step = result
-                            break
-                        if not quiet_output:
-                            click.echo(result.stdout)
-
-                        icon = f"{Fore.GREEN}{Style.BRIGHT}{StepExecutionStatus.COMPLETED}{Style.RESET_ALL}"
-                        summary.append([idx, step.name, result.command_executed, icon])
-                        executed_steps.append((step, StepExecutionStatus.COMPLETED))
-                    else:
-                        icon = f"{Fore.LIGHTBLACK_EX}{StepExecutionStatus.NOT_EXECUTED}{Style.RESET_ALL}"
-                        summary.append(
-                            [
-                                idx,
-                                step.name,
-                                get_command_string(step.command, step.args),
-                                icon,
-                            ]
-                        )
-                        executed_steps.append((step, StepExecutionStatus.NOT_EXECUTED))
-
-                else:
-                    logger.debug(f"Step #{idx} filtered out, skipping execution")
-                    executed_steps.append((step, StepExecutionStatus.EXCLUDED))
-
-                # Update progress bar
-                builds.update(1)
-
-        execution_end_time = perf_counter()
-        execution_duration = execution_end_time - execution_start_time
-        click.echo("--" * 20)
-        click.echo(f"Build completed for {self.name} v{self.version}")
-        click.echo(f"Ran {len(summary)} automation steps in {execution_duration:.3f}s")
-        headers = map(
-            lambda h: f"{Fore.WHITE}{Style.BRIGHT}{h}{Style.RESET_ALL}",
-            ["#", "STEP", "COMMAND", "STATUS"],
-        )
-        click.echo(
-            tabulate(
-                summary,
-                headers=list(headers),
-                showindex=False,
-                tablefmt="github",
-                numalign="center",
-            )
+            runner.add_listener(JournalWriter(journal_file, resumed))
+            runner.add_listener(DurationHistoryWriter())
+        caches = self.build_stage.caches or []
+        cache_keys: List[str] = []
+        if caches and not dry_run_mode:
+            cache_store = cache_store or open_cache_store()
+            cache_keys = [cache.restore(cache_store) for cache in caches]
+        options = RunOptions(
+            include_filters=include_filters,
+            exclude_filters=exclude_filters,
+            dry_run=dry_run_mode,
+            shard=shard,
+            timings=timings,
+            jobs=jobs,
+            stream_output=dashboard,
+            keep_going=(
+                self.build_stage.strategy.keep_going
+                if keep_going is None
+                else keep_going
+            ),
+            resumed=frozenset(resumed),
+            artifacts=artifact_store or ArtifactStore(default_artifact_dir()),
+            spool=spool,
+            tee_output=tee_output,
+            sample_interval=sample_interval,
         )
+        result = runner.run(options)
 
         if export_logs:
-            log_file = self.__create_log_output(
-                executed_steps, execution_duration, dry_run_mode
-            )
+            log_file = self.__create_log_output(result, run_id)
             click.echo(f"\nStep execution summary saved to {log_file}")
+            timelines = result.steps.resource_timelines()
+            if timelines:
+                timeline_file = log_file.with_suffix(".resources.json")
+                write_timelines(
+                    timeline_file,
+                    [
+                        (record.index, record.name, timeline)
+                        for record, timeline in timelines
+                    ],
+                )
+                click.echo(f"Resource timelines saved to {timeline_file}")
+
+        if cache_keys and result.succeeded:
+            for cache, key in zip(caches, cache_keys):
+                cache.save(cache_store, key)
+            cache_store.evict()
 
-        if failed_step:
+        step_durations = result.step_durations
+        if record_timings is not None and step_durations:
+            save_timings(record_timings, step_durations)
+
+        regressions = (
+            regression_gate.regressions(step_durations)
+            if regression_gate is not None and not dry_run_mode
+            else []
+        )
+        # A regressed run must not creep into the baseline it failed against
+        if (
+            update_baseline is not None
+            and step_durations
+            and result.succeeded
+            and not regressions
+        ):
+            baseline = regression_gate.baseline if regression_gate else {}
+            save_timings(update_baseline, smooth_timings(baseline, step_durations))
+            click.echo(f"Updated baseline timings in {update_baseline}")
+
+        failures = result.failures
+        if len(failures) == 1:
             raise AeternumRuntimeError(
-                f"Step '{failed_step.name}' failed with exit code {failed_step.exit_code}:"
-                + f"\n{failed_step.stderr}"
+                f"Step '{failures[0].name}' failed with exit code {failures[0].exit_code}:"
+                + f"\n{failures[0].stderr}"
+            )
+        if failures:
+            details = "\n\n".join(
+                f"Step '{failure.name}' failed with exit code {failure.exit_code}:"
+                + f"\n{tail_text(failure.stderr, AGGREGATED_STDERR_TAIL_BYTES)}"
+                for failure in failures
+            )
+            raise AeternumRuntimeError(f"{len(failures)} steps failed:\n\n{details}")
+
+        if regressions:
+            details = "\n".join(
+                f"Step '{change.name}' took {change.measured:.2f}s, "
+                + f"{change.ratio:+.0%} against the baseline of {change.baseline:.2f}s"
+                for change in regressions
+            )
+            raise AeternumPerformanceError(
+                f"{len(regressions)} steps regressed against the baseline:\n{details}",
+                "Investigate the slowdown, or accept the new timings by recording "
+                + "the baseline again with --record-timings.",
             )
@@ -1,9 +1,12 @@
 import logging
 import subprocess
+from pathlib import Path
 from typing import Optional, Tuple
 
 from colorama import Fore, Style
 
+from aeternum.core.spawn import run_process
+
 
 class ColorHandler(logging.StreamHandler):
     def emit(self, record: logging.LogRecord) -> None:
@@ -24,18 +27,18 @@ def get_command_string(command: str, args: Optional[Tuple[str]]) -> str:
     return cmd_exec
 
 
-def run_validation_command(command: str, *args: Tuple[str]) -> bool:
+def run_validation_command(
+    command: str, *args: Tuple[str], cwd: Optional[Path] = None
+) -> bool:
     """Returns True if the command is available."""
+    cmd = get_command_string(command, args)
     try:
-        cmd = get_command_string(command, args)
-        result = subprocess.run(
+        result = run_process(
             ["/bin/bash", "-c", cmd],
-            check=True,
+            cwd=cwd,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
-        if result.returncode != 0:
-            raise ValueError(f"Command '{cmd}' failed")
-        return True
-    except (subprocess.CalledProcessError, ValueError):
+    except OSError:
         return False
+    return result.returncode == 0
@@ -0,0 +1,121 @@
+"""Side-effect-free execution plans."""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aeternum import __version__
+
+logger = logging.getLogger(__name__)
+
+PLAN_FORMAT_VERSION: int = 1
+
+
+@dataclass(frozen=True)
+class PlannedStep:
+    index: int
+    name: str
+    category: str
+    command: str
+    working_dir: str
+    selected: bool
+    reason: str
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    project: str
+    version: str
+    shell: str
+    include: Tuple[str, ...]
+    exclude: Tuple[str, ...]
+    shard: Optional[str]
+    steps: Tuple[PlannedStep, ...]
+
+    @property
+    def selected_steps(self) -> Tuple[PlannedStep, ...]:
+        return tuple(step for step in self.steps if step.selected)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the plan to JSON-compatible primitives."""
+        return {"format": PLAN_FORMAT_VERSION, **asdict(self)}
+
+    def to_json(self) -> str:
+        """Serialize the plan to a compact JSON document."""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ExecutionPlan":
+        """Rebuild a plan from the output of `to_dict`."""
+        return cls(
+            project=data["project"],
+            version=data["version"],
+            shell=data["shell"],
+            include=tuple(data["include"]),
+            exclude=tuple(data["exclude"]),
+            shard=data["shard"],
+            steps=tuple(PlannedStep(**step) for step in data["steps"]),
+        )
+
+
+class PlanCache:
+    """On-disk cache of serialized plans, keyed by spec content and filters."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(
+        spec_content: bytes,
+        include: Tuple[str, ...],
+        exclude: Tuple[str, ...],
+        shard: Optional[str] = None,
+        timings: Optional[Mapping[str, float]] = None,
+    ) -> str:
+        """Compute the cache key of a plan.
+
+        Args:
+            spec_content (bytes): Content of the spec, with includes expanded
+            include (Tuple[str, ...]): Step types to include
+            exclude (Tuple[str, ...]): Step types to exclude
+            shard (Optional[str]): Selected shard, if any
+            timings (Optional[Mapping[str, float]]): Timings used for sharding
+
+        Returns:
+            str: Hex digest identifying the plan
+        """
+        digest = hashlib.sha256(spec_content)
+        options = {
+            "aeternum": __version__,
+            "cwd": os.getcwd(),
+            "include": sorted(include),
+            "exclude": sorted(exclude),
+            "shard": shard,
+            "timings": timings or {},
+        }
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the serialized plan for a key, if cached."""
+        try:
+            with open(Path(self.directory, f"{key}.json"), "r") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, plan_json: str) -> None:
+        """Store a serialized plan, replacing any previous entry atomically."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_file = Path(self.directory, f"{key}.json.{os.getpid()}.tmp")
+            with open(temp_file, "w") as file:
+                file.write(plan_json)
+            os.replace(temp_file, Path(self.directory, f"{key}.json"))
+        except OSError as err:
+            # Caching is an optimization, a read-only workspace must not fail
+            logger.debug(f"Could not cache execution plan: {err}")
@@ -0,0 +1,278 @@
+"""In-process Python callable steps.
+
+Steps declaring `python: "module:function"` call the function with their
+`params` as keyword arguments instead of spawning a shell, which saves an
+interpreter start-up and the imports on every step. The return value maps to
+an exit code: None or True is success, False is failure, and integers are
+used as is. Exceptions are written to stderr and fail the step.
+
+In-process calls capture what the function writes through `sys.stdout` and
+`sys.stderr`. Isolated steps run in a warm worker subprocess instead, started
+once per build; its standard descriptors are pointed at the step's capture
+files for every call, so output of child processes and C extensions is
+captured as well. Requests carry the descriptors over a Unix socket.
+"""
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import traceback
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from aeternum.core.capture import CapturedOutput
+from aeternum.core.errors import AeternumRuntimeError
+from aeternum.core.spawn import ProcessResult, spawn_options
+
+_HEADER = struct.Struct("!I")
+_MAX_FDS = 2
+_RECEIVE_SIZE = 64 * 1024
+
+
+def resolve_callable(reference: str, search_dir: Optional[Path] = None) -> Callable:
+    """Import the function a 'module:function' reference points to.
+
+    Args:
+        reference (str): Module path and attribute path, separated by ':'
+        search_dir (Optional[Path]): Directory searched for the module before
+            sys.path, usually the working directory of the step
+
+    Returns:
+        Callable: The referenced function
+    """
+    module_name, _, attribute = reference.partition(":")
+    search_path = str(Path(search_dir or ".").resolve())
+    added = search_path not in sys.path
+    if added:
+        sys.path.insert(0, search_path)
+    try:
+        target: Any = importlib.import_module(module_name)
+    finally:
+        if added:
+            sys.path.remove(search_path)
+    for name in attribute.split("."):
+        target = getattr(target, name)
+    if not callable(target):
+        raise TypeError(f"'{reference}' is not callable")
+    return target
+
+
+def _exit_code(returned: Any) -> int:
+    if returned is None or returned is True:
+        return 0
+    if returned is False:
+        return 1
+    if isinstance(returned, int):
+        return returned
+    return 0
+
+
+def invoke(reference: str, params: Mapping[str, Any], cwd: Path) -> int:
+    """Call a referenced function, reporting failures on stderr.
+
+    Returns:
+        int: Exit code of the call
+    """
+    # Resolve before changing into it; a relative path would resolve twice
+    cwd = Path(cwd).resolve()
+    try:
+        with working_directory(cwd):
+            return _exit_code(resolve_callable(reference, cwd)(**params))
+    except SystemExit as exit_request:
+        if exit_request.code is None or isinstance(exit_request.code, int):
+            return exit_request.code or 0
+        print(exit_request.code, file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+
+@contextlib.contextmanager
+def working_directory(path: Path) -> Iterator[None]:
+    """Temporarily change the working directory of the process."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def call_in_process(
+    reference: str,
+    params: Mapping[str, Any],
+    cwd: Path,
+    capture: CapturedOutput,
+) -> ProcessResult:
+    """Call a function in this process, capturing its Python-level output.
+
+    Args:
+        reference (str): 'module:function' reference
+        params (Mapping[str, Any]): Keyword arguments of the call
+        cwd (Path): Working directory during the call
+        capture (CapturedOutput): Files receiving stdout and stderr
+
+    Returns:
+        ProcessResult: Exit code and duration; the output is in the capture
+    """
+    stdout = io.TextIOWrapper(capture.stdout, encoding="utf-8", write_through=True)
+    stderr = io.TextIOWrapper(capture.stderr, encoding="utf-8", write_through=True)
+    start_time = perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            returncode = invoke(reference, params, cwd)
+    finally:
+        # Detach so the capture files outlive the wrappers
+        stdout.detach()
+        stderr.detach()
+    return ProcessResult(returncode, None, None, perf_counter() - start_time)
+
+
+def _send(channel: socket.socket, message: Dict, fds: Tuple[int, ...] = ()) -> None:
+    payload = json.dumps(message).encode("utf-8")
+    data = _HEADER.pack(len(payload)) + payload
+    sent = socket.send_fds(channel, [data], list(fds)) if fds else 0
+    channel.sendall(data[sent:])
+
+
+def _receive(channel: socket.socket) -> Tuple[Optional[Dict], List[int]]:
+    """Read one message and the descriptors sent with it, None at EOF."""
+    data, fds, _, _ = socket.recv_fds(channel, _RECEIVE_SIZE, _MAX_FDS)
+    if not data:
+        return None, fds
+    while (
+        len(data) < _HEADER.size
+        or len(data) < _HEADER.size + _HEADER.unpack(data[: _HEADER.size])[0]
+    ):
+        chunk = channel.recv(_RECEIVE_SIZE)
+        if not chunk:
+            return None, fds
+        data += chunk
+    return json.loads(data[_HEADER.size :].decode("utf-8")), fds
+
+
+class PythonWorker:
+    """Warm subprocess running isolated Python callable steps one at a time.
+
+    The process is started on the first call and keeps its imported modules
+    between calls.
+
+    Args:
+        env (Optional[Mapping[str, str]]): Environment of the worker
+        pass_fds (Tuple[int, ...]): Extra descriptors the worker must inherit
+    """
+
+    def __init__(
+        self, env: Optional[Mapping[str, str]] = None, pass_fds: Tuple[int, ...] = ()
+    ) -> None:
+        self.env = env
+        self.pass_fds = pass_fds
+        self._process: Optional[subprocess.Popen] = None
+        self._channel: Optional[socket.socket] = None
+
+    def __start(self) -> None:
+        channel, worker_end = socket.socketpair()
+        argv = [sys.executable, "-m", __name__, str(worker_end.fileno())]
+        options = spawn_options(
+            argv, env=self.env, pass_fds=(worker_end.fileno(), *self.pass_fds)
+        )
+        try:
+            self._process = subprocess.Popen(
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, **options
+            )
+        finally:
+            worker_end.close()
+        self._channel = channel
+
+    def call(
+        self,
+        reference: str,
+        params: Mapping[str, Any],
+        cwd: Path,
+        capture: CapturedOutput,
+    ) -> ProcessResult:
+        """Call a function in the worker, capturing all of its output.
+
+        Args:
+            reference (str): 'module:function' reference
+            params (Mapping[str, Any]): Keyword arguments of the call, must be
+                JSON serializable
+            cwd (Path): Working directory during the call
+            capture (CapturedOutput): Files receiving stdout and stderr
+
+        Returns:
+            ProcessResult: Exit code and duration; the output is in the capture
+        """
+        if self._process is None:
+            self.__start()
+        start_time = perf_counter()
+        request = {
+            "callable": reference,
+            "params": dict(params),
+            "cwd": str(Path(cwd).resolve()),
+        }
+        try:
+            _send(
+                self._channel,
+                request,
+                (capture.stdout.fileno(), capture.stderr.fileno()),
+            )
+            reply, _ = _receive(self._channel)
+        except OSError as err:
+            raise AeternumRuntimeError(f"Python step worker failed: {err}") from err
+        if reply is None:
+            # The worker died during the call, e.g. from a crash or os._exit
+            returncode = self._process.wait()
+            self.close()
+            return ProcessResult(
+                returncode or 1, None, None, perf_counter() - start_time
+            )
+        return ProcessResult(
+            reply["returncode"], None, None, perf_counter() - start_time
+        )
+
+    def close(self) -> None:
+        """Stop the worker; it exits once its control socket is closed."""
+        if self._channel is not None:
+            self._channel.close()
+            self._channel = None
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+
+
+def serve(channel_fd: int) -> None:
+    """Worker loop: run requested calls until the control socket closes."""
+    channel = socket.socket(fileno=channel_fd)
+    idle_stdout, idle_stderr = os.dup(1), os.dup(2)
+    while True:
+        request, fds = _receive(channel)
+        if request is None:
+            break
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for target, fd in zip((1, 2), fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        returncode = invoke(request["callable"], request["params"], request["cwd"])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Release the capture files of the step
+        os.dup2(idle_stdout, 1)
+        os.dup2(idle_stderr, 2)
+        _send(channel, {"returncode": returncode})
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
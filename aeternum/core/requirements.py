@@ -0,0 +1,360 @@
+"""Workspace requirements checked by `aeternum doctor`.
+
+Requirements are probed lazily, when a check asks for them. Binaries that do
+not depend on the workspace are machine-global, so a fleet check across many
+workspaces probes each of them once per host.
+
+Probe results are cached in `.aeternum/doctor.json` for a day. Every result is
+stored with a fingerprint of what it depends on: PATH and the inode and mtime
+of the binary, or the mtime of the checked file. A cached result is only used
+while its fingerprint still matches, so installing or upgrading a tool takes
+effect immediately, and checking it costs a few stat calls.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from aeternum.core.cache import atomic_write
+from aeternum.core.constants import ProjectFiles
+from aeternum.core.output import run_validation_command
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOCTOR_JOBS: int = min(16, (os.cpu_count() or 1) * 2)
+DEFAULT_DOCTOR_TTL: float = 24 * 60 * 60
+DOCTOR_CACHE_FORMAT_VERSION: int = 1
+
+# Directories never searched for workspaces
+_SKIPPED_DIRS = frozenset({"node_modules", "__pycache__", "venv"})
+
+
+@dataclass
+class AeternumRequirement(ABC):
+    name: str
+    impact_if_missing: str
+    help_text: str
+
+    def probe_key(self, workspace: Path) -> Hashable:
+        """Identify the probe, so identical probes run once."""
+        return (type(self).__name__, str(workspace.resolve()), self.name)
+
+    @abstractmethod
+    def fingerprint(self, workspace: Path) -> Any:
+        """JSON-serializable state the probe result depends on."""
+
+    @abstractmethod
+    def probe(self, workspace: Path) -> bool:
+        """Check whether the requirement is met in a workspace."""
+
+
+def _stat_fingerprint(path: Optional[str]) -> Optional[List[int]]:
+    """Inode and modification time of a path, None if it does not exist."""
+    if path is None:
+        return None
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    return [stat_result.st_ino, stat_result.st_mtime_ns]
+
+
+@dataclass
+class ExpectedFile(AeternumRequirement):
+    path_in_repo: str
+
+    def fingerprint(self, workspace: Path) -> Any:
+        return _stat_fingerprint(str(Path(workspace, self.path_in_repo)))
+
+    def probe(self, workspace: Path) -> bool:
+        return Path(workspace, self.path_in_repo).exists()
+
+
+@dataclass
+class ExpectedBinary(AeternumRequirement):
+    command: str
+    args: Optional[List[str]] = None
+    ready: Optional[bool] = None
+    # The check depends on the workspace, e.g. 'git rev-parse'
+    per_workspace: bool = False
+
+    def probe_key(self, workspace: Path) -> Hashable:
+        if self.per_workspace:
+            return super().probe_key(workspace)
+        return ("binary", self.command, tuple(self.args or ()))
+
+    def fingerprint(self, workspace: Path) -> Any:
+        path = os.environ.get("PATH", os.defpath)
+        binary = shutil.which(self.command, path=path)
+        fingerprint = {"path": path, "binary": _stat_fingerprint(binary)}
+        if self.per_workspace:
+            # Per-workspace checks inspect the repository, e.g. 'git rev-parse'
+            fingerprint["repository"] = _stat_fingerprint(str(Path(workspace, ".git")))
+        return fingerprint
+
+    def probe(self, workspace: Path) -> bool:
+        self.ready = run_validation_command(
+            self.command,
+            *(self.args or []),
+            cwd=workspace if self.per_workspace else None,
+        )
+        return self.ready
+
+
+def default_requirements(spec_file: str) -> List[AeternumRequirement]:
+    """Requirements of a workspace building the given spec file."""
+    return [
+        ExpectedBinary(
+            name="Git",
+            command="git",
+            args=["--version"],
+            impact_if_missing="Cannot perform build checks without Git",
+            help_text="Install Git and make sure it is on PATH",
+        ),
+        ExpectedBinary(
+            name="Git repository",
+            command="git",
+            args=["rev-parse", "--is-inside-work-tree"],
+            impact_if_missing="Cannot perform build checks without a Git repository",
+            help_text="Ensure you are re in a Git repository",
+            per_workspace=True,
+        ),
+        ExpectedFile(
+            name="Aeternum YAML config file",
+            path_in_repo=spec_file,
+            impact_if_missing="Cannot build project without configuration file",
+            help_text=f"Create an {ProjectFiles.SPEC_FILE} file in your project.",
+        ),
+    ]
+
+
+class RequirementCache:
+    """Probe results reused until they expire or their fingerprint changes.
+
+    Args:
+        path (Path): JSON file holding the results
+        ttl (float): Seconds a result stays valid, whatever its fingerprint
+    """
+
+    def __init__(self, path: Path, ttl: float = DEFAULT_DOCTOR_TTL) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._changed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_workspace(
+        cls, workspace: Path, ttl: float = DEFAULT_DOCTOR_TTL
+    ) -> "RequirementCache":
+        return cls(Path(workspace, ProjectFiles.STATE_DIR, "doctor.json"), ttl)
+
+    def __load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r") as file:
+                    content = json.load(file)
+                if content.get("version") != DOCTOR_CACHE_FORMAT_VERSION:
+                    raise ValueError(f"unsupported version {content.get('version')}")
+                self._entries = dict(content["checks"])
+            except (OSError, ValueError, KeyError, AttributeError) as err:
+                logger.debug(f"Not using doctor cache {self.path}: {err}")
+                self._entries = {}
+        return self._entries
+
+    def probe(
+        self, requirement: AeternumRequirement, workspace: Path, refresh: bool = False
+    ) -> bool:
+        """Probe a requirement unless a valid result is cached.
+
+        Args:
+            requirement (AeternumRequirement): Requirement to check
+            workspace (Path): Workspace the requirement is checked in
+            refresh (bool): Probe even if a valid result is cached
+
+        Returns:
+            bool: Whether the requirement is met
+        """
+        key = json.dumps(requirement.probe_key(workspace))
+        fingerprint = requirement.fingerprint(workspace)
+        with self._lock:
+            entry = self.__load().get(key)
+        if (
+            not refresh
+            and entry is not None
+            and entry.get("fingerprint") == fingerprint
+            and 0 <= time.time() - entry.get("checked_at", 0) < self.ttl
+        ):
+            logger.debug(f"Using cached result of {requirement.name} check")
+            return entry["ready"]
+        ready = requirement.probe(workspace)
+        with self._lock:
+            self.__load()[key] = {
+                "fingerprint": fingerprint,
+                "ready": ready,
+                "checked_at": time.time(),
+            }
+            self._changed = True
+        return ready
+
+    def save(self) -> None:
+        """Write the results back if any probe ran."""
+        if not self._changed:
+            return
+        content = {"version": DOCTOR_CACHE_FORMAT_VERSION, "checks": self.__load()}
+        try:
+            atomic_write(self.path, json.dumps(content, indent=2).encode("utf-8"))
+            self._changed = False
+        except OSError as err:
+            # Caching is an optimization, a read-only workspace must not fail
+            logger.debug(f"Could not cache doctor results: {err}")
+
+
+def preflight(
+    spec_file: Path, refresh: bool = False, ttl: float = DEFAULT_DOCTOR_TTL
+) -> List[AeternumRequirement]:
+    """Check the requirements of the workspace of a spec file, using the cache.
+
+    Args:
+        spec_file (Path): Spec file of the workspace
+        refresh (bool): Probe every requirement again
+        ttl (float): Seconds cached results stay valid
+
+    Returns:
+        List[AeternumRequirement]: Requirements that are not met
+    """
+    workspace = Path(spec_file).resolve().parent
+    cache = RequirementCache.for_workspace(workspace, ttl)
+    missing = [
+        requirement
+        for requirement in default_requirements(Path(spec_file).name)
+        if not cache.probe(requirement, workspace, refresh)
+    ]
+    cache.save()
+    return missing
+
+
+def discover_workspaces(
+    root: Path, spec_file: str = ProjectFiles.SPEC_FILE
+) -> List[Path]:
+    """Find the directories below root that contain a spec file.
+
+    Hidden directories and dependency directories are not searched.
+    """
+    workspaces = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if not name.startswith(".") and name not in _SKIPPED_DIRS
+        )
+        if spec_file in files:
+            workspaces.append(Path(directory))
+    return workspaces
+
+
+@dataclass(frozen=True)
+class RequirementStatus:
+    workspace: Path
+    requirement: AeternumRequirement
+    ready: bool
+
+
+@dataclass
+class FleetReport:
+    statuses: List[RequirementStatus] = field(default_factory=list)
+    # Number of distinct probes that ran, after deduplication
+    probes: int = 0
+
+    def workspaces(self) -> Iterator[Tuple[Path, List[RequirementStatus]]]:
+        by_workspace: Dict[Path, List[RequirementStatus]] = {}
+        for status in self.statuses:
+            by_workspace.setdefault(status.workspace, []).append(status)
+        return iter(by_workspace.items())
+
+    @property
+    def failures(self) -> List[RequirementStatus]:
+        return [status for status in self.statuses if not status.ready]
+
+    def to_dict(self) -> Dict:
+        return {
+            "workspaces": [
+                {
+                    "path": str(workspace),
+                    "ready": all(status.ready for status in statuses),
+                    "checks": [
+                        {
+                            "name": status.requirement.name,
+                            "ready": status.ready,
+                            "help": None
+                            if status.ready
+                            else status.requirement.help_text,
+                        }
+                        for status in statuses
+                    ],
+                }
+                for workspace, statuses in self.workspaces()
+            ],
+            "probes": self.probes,
+            "failures": len(self.failures),
+        }
+
+
+def check_workspaces(
+    workspaces: List[Path],
+    spec_file: str = ProjectFiles.SPEC_FILE,
+    jobs: int = DEFAULT_DOCTOR_JOBS,
+    requirements: Callable[[str], List[AeternumRequirement]] = default_requirements,
+    cache: Optional[RequirementCache] = None,
+    refresh: bool = False,
+) -> FleetReport:
+    """Check the requirements of many workspaces on a bounded pool.
+
+    Args:
+        workspaces (List[Path]): Workspace directories
+        spec_file (str): Spec file name expected in every workspace
+        jobs (int): Maximum number of concurrent probes
+        requirements (Callable): Builds the requirements of one workspace
+            from the spec file name
+        cache (Optional[RequirementCache]): Cache of probe results, if any
+        refresh (bool): Probe again even if a valid result is cached
+
+    Returns:
+        FleetReport: Status of every requirement of every workspace
+    """
+    checks = [
+        (workspace, requirement)
+        for workspace in workspaces
+        for requirement in requirements(spec_file)
+    ]
+    probes: Dict[Hashable, Tuple[AeternumRequirement, Path]] = {}
+    for workspace, requirement in checks:
+        probes.setdefault(requirement.probe_key(workspace), (requirement, workspace))
+    logger.info(f"Running {len(probes)} probes for {len(checks)} checks")
+
+    def run_probe(probe: Tuple[AeternumRequirement, Path]) -> bool:
+        requirement, workspace = probe
+        if cache is None:
+            return requirement.probe(workspace)
+        return cache.probe(requirement, workspace, refresh)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        outcomes = dict(zip(probes, pool.map(run_probe, probes.values())))
+    if cache is not None:
+        cache.save()
+    return FleetReport(
+        statuses=[
+            RequirementStatus(
+                workspace, requirement, outcomes[requirement.probe_key(workspace)]
+            )
+            for workspace, requirement in checks
+        ],
+        probes=len(probes),
+    )
@@ -0,0 +1,209 @@
+"""Compact storage of per-step build results.
+
+Large generated specs can run tens of thousands of steps, so results are kept
+in array-backed columns with small integer status codes rather than one object
+per step. Only the tail of stderr is retained, and only for failed steps.
+"""
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from aeternum.core.constants import StepExecutionStatus
+
+if TYPE_CHECKING:
+    from aeternum.core.httpcheck import LatencySummary
+    from aeternum.core.junit import JUnitSummary
+    from aeternum.core.sampler import ResourceTimeline
+
+STDERR_TAIL_BYTES: int = 8192
+
+# Position in this tuple is the status code stored in the table
+STATUS_CODES: Tuple[str, ...] = (
+    StepExecutionStatus.COMPLETED,
+    StepExecutionStatus.FAILED,
+    StepExecutionStatus.SKIPPED,
+    StepExecutionStatus.EXCLUDED,
+    StepExecutionStatus.NOT_EXECUTED,
+    StepExecutionStatus.RESUMED,
+    StepExecutionStatus.RESTORED,
+)
+_CODE_BY_STATUS: Dict[str, int] = {
+    status: code for code, status in enumerate(STATUS_CODES)
+}
+_EXECUTED_CODES = frozenset(
+    _CODE_BY_STATUS[status]
+    for status in (StepExecutionStatus.COMPLETED, StepExecutionStatus.FAILED)
+)
+
+
+def tail_text(text: Optional[str], max_bytes: int = STDERR_TAIL_BYTES) -> str:
+    """Keep the end of a text, cut at a line boundary when possible."""
+    if not isinstance(text, str):
+        return ""
+    if len(text) <= max_bytes:
+        return text
+    tail = text[-max_bytes:]
+    newline = tail.find("\n")
+    return tail[newline + 1 :] if 0 <= newline < len(tail) - 1 else tail
+
+
+class StepRecord:
+    """Read-only view of one row of a ResultTable."""
+
+    __slots__ = ("index", "name", "command", "status", "exit_code", "duration")
+
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        command: str,
+        status: str,
+        exit_code: int,
+        duration: float,
+    ) -> None:
+        self.index = index
+        self.name = name
+        self.command = command
+        self.status = status
+        self.exit_code = exit_code
+        self.duration = duration
+
+    @property
+    def executed(self) -> bool:
+        return self.status in (
+            StepExecutionStatus.COMPLETED,
+            StepExecutionStatus.FAILED,
+        )
+
+
+@dataclass(frozen=True)
+class FailureDetail:
+    name: str
+    command: str
+    exit_code: int
+    stderr: str
+
+
+class ResultTable:
+    """Column store of step results, in execution order."""
+
+    __slots__ = (
+        "_indexes",
+        "_status_codes",
+        "_exit_codes",
+        "_durations",
+        "_names",
+        "_commands",
+        "_failures",
+        "_tests",
+        "_resources",
+        "_latencies",
+    )
+
+    def __init__(self) -> None:
+        self._indexes = array("I")
+        self._status_codes = array("B")
+        self._exit_codes = array("i")
+        self._durations = array("d")
+        self._names: List[str] = []
+        self._commands: List[str] = []
+        self._failures: Dict[int, FailureDetail] = {}
+        self._tests: Dict[int, "JUnitSummary"] = {}
+        self._resources: Dict[int, "ResourceTimeline"] = {}
+        self._latencies: Dict[int, "LatencySummary"] = {}
+
+    def append(
+        self,
+        index: int,
+        name: str,
+        command: str,
+        status: str,
+        exit_code: int = 0,
+        duration: float = 0.0,
+        stderr: Optional[str] = None,
+        tests: Optional["JUnitSummary"] = None,
+        resources: Optional["ResourceTimeline"] = None,
+        latency: Optional["LatencySummary"] = None,
+    ) -> None:
+        """Record the result of a step.
+
+        Args:
+            index (int): 1-based position of the step in the spec
+            name (str): Step name
+            command (str): Command string of the step
+            status (str): One of the StepExecutionStatus values
+            exit_code (int): Exit code, for executed steps
+            duration (float): Wall-clock duration, for executed steps
+            stderr (Optional[str]): Error output; only the tail of a failed
+                step's stderr is kept
+            tests (Optional[JUnitSummary]): Results of the step's JUnit reports;
+                only the aggregated counts and failures are kept
+            resources (Optional[ResourceTimeline]): Sampled resource usage of
+                the step processes
+            latency (Optional[LatencySummary]): Request latencies of an HTTP
+                check step
+        """
+        row = len(self._indexes)
+        self._indexes.append(index)
+        self._status_codes.append(_CODE_BY_STATUS[status])
+        self._exit_codes.append(exit_code)
+        self._durations.append(duration)
+        self._names.append(name)
+        self._commands.append(command)
+        if status == StepExecutionStatus.FAILED:
+            self._failures[row] = FailureDetail(
+                name, command, exit_code, tail_text(stderr)
+            )
+        if tests is not None:
+            # Per-test durations are recorded when the step finishes
+            self._tests[row] = tests.without_durations()
+        if resources is not None:
+            self._resources[row] = resources
+        if latency is not None:
+            self._latencies[row] = latency
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, row: int) -> StepRecord:
+        return StepRecord(
+            self._indexes[row],
+            self._names[row],
+            self._commands[row],
+            STATUS_CODES[self._status_codes[row]],
+            self._exit_codes[row],
+            self._durations[row],
+        )
+
+    def __iter__(self) -> Iterator[StepRecord]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def count(self, status: str) -> int:
+        """Number of steps with the given status."""
+        return self._status_codes.count(_CODE_BY_STATUS[status])
+
+    @property
+    def failures(self) -> List[FailureDetail]:
+        """Failed steps, in execution order."""
+        return [self._failures[row] for row in sorted(self._failures)]
+
+    def test_summaries(self) -> List[Tuple[StepRecord, "JUnitSummary"]]:
+        """JUnit results of the steps that reported them, in execution order."""
+        return [(self[row], self._tests[row]) for row in sorted(self._tests)]
+
+    def resource_timelines(self) -> List[Tuple[StepRecord, "ResourceTimeline"]]:
+        """Resource usage of the sampled steps, in execution order."""
+        return [(self[row], self._resources[row]) for row in sorted(self._resources)]
+
+    def latency_summaries(self) -> List[Tuple[StepRecord, "LatencySummary"]]:
+        """Request latencies of the HTTP check steps, in execution order."""
+        return [(self[row], self._latencies[row]) for row in sorted(self._latencies)]
+
+    def durations(self) -> Dict[str, float]:
+        """Duration of every executed step, keyed by step name."""
+        return {
+            self._names[row]: self._durations[row]
+            for row, code in enumerate(self._status_codes)
+            if code in _EXECUTED_CODES
+        }
@@ -0,0 +1,681 @@
+"""Programmatic build execution.
+
+The Runner executes a loaded ProjectSpec without touching the console and
+reports progress through events, so builds can be embedded in other Python
+processes. The CLI renders the same events to the terminal.
+"""
+import asyncio
+import logging
+import sys
+import threading
+from contextlib import closing, nullcontext
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from time import perf_counter, time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from aeternum.core.artifacts import ArtifactStore
+from aeternum.core.capture import CapturedOutput, OutputSpool
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.jobserver import JobServer
+from aeternum.core.plan import ExecutionPlan, PlannedStep
+from aeternum.core.pystep import PythonWorker
+from aeternum.core.results import FailureDetail, ResultTable
+from aeternum.core.sampler import ProcessSampler, sampling_supported
+from aeternum.core.sharding import ShardSpec
+
+if TYPE_CHECKING:
+    from aeternum.core.models import (
+        AutomationStep,
+        ProjectSpec,
+        StepExecutionResult,
+    )
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StepOutcome:
+    """Outcome of a single step, carried by StepFinished events only."""
+
+    index: int
+    name: str
+    command: str
+    status: str
+    result: Optional["StepExecutionResult"] = None
+
+
+@dataclass(frozen=True)
+class BuildResult:
+    project: str
+    version: str
+    plan: ExecutionPlan
+    dry_run: bool
+    duration: float
+    steps: ResultTable
+    # Files holding the captured output of steps, keyed by step index
+    output_files: Dict[int, Path] = field(default_factory=dict)
+
+    @property
+    def failed_step(self) -> Optional[FailureDetail]:
+        """Details of the first step that failed the build, if any."""
+        failures = self.steps.failures
+        return failures[0] if failures else None
+
+    @property
+    def failures(self) -> List[FailureDetail]:
+        """Details of every failed step, in execution order."""
+        return self.steps.failures
+
+    @property
+    def succeeded(self) -> bool:
+        return self.failed_step is None
+
+    @property
+    def step_durations(self) -> Dict[str, float]:
+        """Measured duration of every executed step, keyed by step name."""
+        return self.steps.durations()
+
+
+@dataclass(frozen=True)
+class BuildStarted:
+    plan: ExecutionPlan
+    dry_run: bool
+
+
+@dataclass(frozen=True)
+class StepStarted:
+    planned: PlannedStep
+    total: int
+    dry_run: bool
+
+
+@dataclass(frozen=True)
+class StepSkipped:
+    planned: PlannedStep
+    total: int
+    # Set when a selected step is skipped: a dependency failed or it resumed
+    reason: Optional[str] = None
+    status: str = StepExecutionStatus.EXCLUDED
+
+
+@dataclass(frozen=True)
+class StepOutput:
+    planned: PlannedStep
+    stream: str
+    line: str
+
+
+@dataclass(frozen=True)
+class StepFinished:
+    planned: PlannedStep
+    outcome: StepOutcome
+
+
+@dataclass(frozen=True)
+class BuildFinished:
+    result: BuildResult
+
+
+RunnerEvent = Union[
+    BuildStarted, StepStarted, StepSkipped, StepOutput, StepFinished, BuildFinished
+]
+EventListener = Callable[[RunnerEvent], None]
+
+
+@dataclass
+class RunOptions:
+    """Options of one build run.
+
+    Attributes:
+        include_filters (Tuple[str, ...]): Steps to include
+        exclude_filters (Tuple[str, ...]): Steps to exclude
+        dry_run (bool): If true, plan the steps without executing them
+        shard (Optional[ShardSpec]): Only run this shard of the selected steps
+        timings (Optional[Dict[str, float]]): Recorded step durations used to
+            balance shards
+        jobs (Optional[int]): Jobserver slots shared by step processes,
+            overrides the strategy setting
+        stream_output (bool): Emit a StepOutput event per output line while
+            steps run
+        keep_going (bool): After a failure, keep running the steps that do not
+            depend on a failed step; dependents are skipped
+        resumed (FrozenSet[int]): Indexes of steps completed by a previous
+            run, which are skipped and recorded as resumed
+        artifacts (Optional[ArtifactStore]): Store of step outputs; steps with
+            outputs are restored from it instead of executed when an identical
+            invocation was stored
+        spool (Optional[OutputSpool]): If given, step output is captured to
+            disk and kept as one file per step
+        tee_output (bool): Copy step output to the console while steps run, in
+            addition to capturing it
+        sample_interval (Optional[float]): If given, sample the CPU, memory
+            and I/O of command step processes every this many seconds
+        listeners (List[EventListener]): Listeners of this run only, called
+            after the listeners of the Runner
+        stop (Optional[threading.Event]): Stops the build before its next step
+            once set
+    """
+
+    include_filters: Tuple[str, ...] = ()
+    exclude_filters: Tuple[str, ...] = ()
+    dry_run: bool = False
+    shard: Optional[ShardSpec] = None
+    timings: Optional[Dict[str, float]] = None
+    jobs: Optional[int] = None
+    stream_output: bool = False
+    keep_going: bool = False
+    resumed: FrozenSet[int] = frozenset()
+    artifacts: Optional[ArtifactStore] = None
+    spool: Optional[OutputSpool] = None
+    tee_output: bool = False
+    sample_interval: Optional[float] = None
+    listeners: List[EventListener] = field(default_factory=list)
+    # Once set, the build stops before starting its next step
+    stop: Optional[threading.Event] = None
+
+
+class Runner:
+    """Execute the build stage of a project spec.
+
+    Listeners are called synchronously, in registration order, from the thread
+    running the build; StepOutput events come from output reader threads. A
+    Runner runs one build at a time; create one Runner per concurrent build.
+    """
+
+    def __init__(
+        self, project: "ProjectSpec", listeners: Optional[List[EventListener]] = None
+    ) -> None:
+        self.project = project
+        self.listeners: List[EventListener] = list(listeners or [])
+
+    def add_listener(self, listener: EventListener) -> None:
+        """Register a callable to receive every runner event."""
+        self.listeners.append(listener)
+
+    def run(self, options: Optional[RunOptions] = None) -> BuildResult:
+        """Run the build and return its structured result.
+
+        Failing steps do not raise; inspect `BuildResult.failures` instead.
+
+        Args:
+            options (Optional[RunOptions]): Options of the run, the defaults if
+                not given
+
+        Returns:
+            BuildResult: Outcome of every processed step
+        """
+        return self._execute(options or RunOptions())
+
+    async def iter_events(
+        self, options: Optional[RunOptions] = None
+    ) -> AsyncIterator[RunnerEvent]:
+        """Run the build in a worker thread and yield its events.
+
+        The last event yielded is always BuildFinished. If the consumer stops
+        iterating early, the build stops before its next step and the worker
+        thread is awaited.
+
+        Args:
+            options (Optional[RunOptions]): Options of the run, the defaults if
+                not given
+        """
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Optional[RunnerEvent]]" = asyncio.Queue()
+        options = options or RunOptions()
+        stop = options.stop or threading.Event()
+
+        def forward(event: Optional[RunnerEvent]) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The loop closed; nobody is left to receive the event
+                stop.set()
+
+        def execute() -> BuildResult:
+            try:
+                # Forwarded first, so the consumer sees events before the
+                # run's own listeners handle them
+                return self._execute(
+                    replace(options, listeners=[forward, *options.listeners], stop=stop)
+                )
+            finally:
+                # Wake the consumer even if the build raised
+                forward(None)
+
+        build_task = loop.run_in_executor(None, execute)
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            stop.set()
+            await build_task
+
+    def _emit(self, options: RunOptions, event: RunnerEvent) -> None:
+        for listener in [*self.listeners, *options.listeners]:
+            listener(event)
+
+    def _execute(self, options: RunOptions) -> BuildResult:
+        project = self.project
+        plan = project.plan(
+            options.include_filters,
+            options.exclude_filters,
+            options.shard,
+            options.timings,
+        )
+        logger.info(f"Building project: {project.name}")
+        if options.sample_interval is not None and not sampling_supported():
+            logger.warning("Resource sampling needs /proc, steps will not be sampled")
+            options = replace(options, sample_interval=None)
+        jobserver = None
+        if not options.dry_run:
+            strategy = project.build_stage.strategy
+            jobserver = JobServer.from_environment(
+                options.jobs or strategy.jobs,
+                use_fifo=strategy.jobserver_style == "fifo",
+            )
+
+        records = ResultTable()
+        output_files: Dict[int, Path] = {}
+        # Names of steps that failed or were skipped because of a failure
+        blocked: Set[str] = set()
+        total = len(plan.steps)
+        self._emit(options, BuildStarted(plan=plan, dry_run=options.dry_run))
+        execution_start_time = perf_counter()
+        steps = project.build_stage.steps
+        resumed = self.__resumable(steps, plan, options.resumed)
+        # Steps that already ran as consumers in a pipeline
+        piped: Set[int] = set()
+        # Started on the first isolated Python step, shared by the later ones
+        worker = PythonWorker(
+            env=jobserver.child_env() if jobserver else None,
+            pass_fds=jobserver.pass_fds if jobserver else (),
+        )
+        with jobserver or nullcontext(), closing(worker):
+            for position, (step, planned_step) in enumerate(zip(steps, plan.steps)):
+                if options.stop is not None and options.stop.is_set():
+                    logger.info(f"Build stopped before step #{planned_step.index}")
+                    break
+                if planned_step.index in piped:
+                    continue
+                if not planned_step.selected:
+                    logger.debug(
+                        f"Step #{planned_step.index} not selected "
+                        + f"({planned_step.reason}), skipping execution"
+                    )
+                    self._emit(options, StepSkipped(planned=planned_step, total=total))
+                    records.append(
+                        planned_step.index,
+                        planned_step.name,
+                        planned_step.command,
+                        StepExecutionStatus.EXCLUDED,
+                    )
+                    continue
+
+                blocking = [name for name in step.depends_on or [] if name in blocked]
+                if blocking:
+                    blocked.add(planned_step.name)
+                    self.__skip(
+                        options,
+                        records,
+                        planned_step,
+                        total,
+                        f"dependency '{blocking[0]}' did not succeed",
+                        StepExecutionStatus.SKIPPED,
+                    )
+                    continue
+                if planned_step.index in resumed and not options.dry_run:
+                    self.__skip(
+                        options,
+                        records,
+                        planned_step,
+                        total,
+                        "completed in a previous run",
+                        StepExecutionStatus.RESUMED,
+                    )
+                    continue
+                if step.stdin_from is not None and not options.dry_run:
+                    blocked.add(planned_step.name)
+                    self.__skip(
+                        options,
+                        records,
+                        planned_step,
+                        total,
+                        f"input step '{step.stdin_from}' did not run",
+                        StepExecutionStatus.SKIPPED,
+                    )
+                    continue
+                pipeline = self.__pipeline(
+                    steps, plan, position, options, blocked, resumed
+                )
+                if len(pipeline) > 1:
+                    outcomes = self._run_pipeline(pipeline, options, total, jobserver)
+                    for (_, piped_step), outcome in zip(pipeline, outcomes):
+                        piped.add(outcome.index)
+                        self.__record(records, outcome)
+                        self._emit(
+                            options, StepFinished(planned=piped_step, outcome=outcome)
+                        )
+                        self.__finish_output(options, outcome, output_files)
+                    failed = [
+                        outcome.name
+                        for outcome in outcomes
+                        if outcome.status == StepExecutionStatus.FAILED
+                    ]
+                    if failed:
+                        if not options.keep_going:
+                            break
+                        blocked.update(failed)
+                    continue
+
+                artifact_key = self.__artifact_key(step, options)
+                if artifact_key and options.artifacts.restore(
+                    artifact_key, step.working_dir
+                ):
+                    self.__skip(
+                        options,
+                        records,
+                        planned_step,
+                        total,
+                        "outputs restored from the artifact store",
+                        StepExecutionStatus.RESTORED,
+                    )
+                    continue
+
+                self._emit(
+                    options,
+                    StepStarted(
+                        planned=planned_step, total=total, dry_run=options.dry_run
+                    ),
+                )
+                outcome = self._run_step(step, planned_step, options, jobserver, worker)
+                if artifact_key and outcome.status == StepExecutionStatus.COMPLETED:
+                    self.__store_outputs(step, artifact_key, options.artifacts)
+                self.__record(records, outcome)
+                self._emit(options, StepFinished(planned=planned_step, outcome=outcome))
+                self.__finish_output(options, outcome, output_files)
+                if outcome.status == StepExecutionStatus.FAILED:
+                    if not options.keep_going:
+                        break
+                    blocked.add(planned_step.name)
+
+        execution_end_time = perf_counter()
+        result = BuildResult(
+            project=project.name,
+            version=project.version,
+            plan=plan,
+            dry_run=options.dry_run,
+            duration=execution_end_time - execution_start_time,
+            steps=records,
+            output_files=output_files,
+        )
+        self._emit(options, BuildFinished(result=result))
+        return result
+
+    def __artifact_key(
+        self, step: "AutomationStep", options: RunOptions
+    ) -> Optional[str]:
+        if options.artifacts is None or not step.outputs or options.dry_run:
+            return None
+        if not step.inputs:
+            # Without inputs the key cannot tell when the outputs went stale
+            logger.warning(
+                f"Step '{step.name}' declares outputs but no inputs, "
+                + "its outputs are not stored or restored"
+            )
+            return None
+        return step.artifact_key(self.project.shell)
+
+    @staticmethod
+    def __resumable(
+        steps: List["AutomationStep"], plan: ExecutionPlan, resumed: FrozenSet[int]
+    ) -> Set[int]:
+        """Steps to resume, without producers whose consumers must run again."""
+        resumable = set(resumed)
+        pairs = list(zip(steps, plan.steps))
+        # Walk backwards so a rerun propagates up a chain of pipes
+        for (producer, planned_producer), (consumer, planned_consumer) in reversed(
+            list(zip(pairs, pairs[1:]))
+        ):
+            if (
+                consumer.stdin_from == producer.name
+                and planned_consumer.index not in resumable
+            ):
+                resumable.discard(planned_producer.index)
+        return resumable
+
+    @staticmethod
+    def __pipeline(
+        steps: List["AutomationStep"],
+        plan: ExecutionPlan,
+        position: int,
+        options: RunOptions,
+        blocked: Set[str],
+        resumed: Set[int],
+    ) -> List[Tuple["AutomationStep", PlannedStep]]:
+        """The step at a position, followed by the steps reading its output."""
+        pipeline = [(steps[position], plan.steps[position])]
+        while not options.dry_run and position + 1 < len(steps):
+            position += 1
+            step, planned_step = steps[position], plan.steps[position]
+            if (
+                step.stdin_from != pipeline[-1][0].name
+                or not planned_step.selected
+                or planned_step.index in resumed
+                or any(name in blocked for name in step.depends_on or [])
+            ):
+                break
+            pipeline.append((step, planned_step))
+        return pipeline
+
+    def __finish_output(
+        self,
+        options: RunOptions,
+        outcome: StepOutcome,
+        output_files: Dict[int, Path],
+    ) -> None:
+        if outcome.result is None or outcome.result.output is None:
+            return
+        if options.spool is not None:
+            self.__keep_output(options.spool, outcome, output_files)
+        else:
+            outcome.result.output.close()
+
+    @staticmethod
+    def __keep_output(
+        spool: OutputSpool, outcome: StepOutcome, output_files: Dict[int, Path]
+    ) -> None:
+        try:
+            output_files[outcome.index] = spool.keep(
+                outcome.result.output, outcome.index, outcome.name
+            )
+        except OSError as err:
+            logger.warning(f"Could not save the output of '{outcome.name}': {err}")
+
+    @staticmethod
+    def __store_outputs(
+        step: "AutomationStep", artifact_key: str, artifacts: ArtifactStore
+    ) -> None:
+        try:
+            file_count = artifacts.save(
+                artifact_key, step.outputs, step.working_dir, step.name
+            )
+            logger.info(f"Stored {file_count} output files of step '{step.name}'")
+        except OSError as err:
+            # Storing outputs is an optimization, it must not fail the build
+            logger.warning(f"Could not store outputs of step '{step.name}': {err}")
+
+    def __skip(
+        self,
+        options: RunOptions,
+        records: ResultTable,
+        planned_step: PlannedStep,
+        total: int,
+        reason: str,
+        status: str,
+    ) -> None:
+        logger.info(f"Skipping step '{planned_step.name}': {reason}")
+        self._emit(
+            options,
+            StepSkipped(
+                planned=planned_step, total=total, reason=reason, status=status
+            ),
+        )
+        records.append(
+            planned_step.index, planned_step.name, planned_step.command, status
+        )
+
+    @staticmethod
+    def __record(records: ResultTable, outcome: StepOutcome) -> None:
+        result = outcome.result
+        records.append(
+            outcome.index,
+            outcome.name,
+            outcome.command,
+            outcome.status,
+            exit_code=result.exit_code if result else 0,
+            duration=result.duration if result else 0.0,
+            stderr=result.stderr if result else None,
+            tests=result.tests if result else None,
+            resources=result.resources if result else None,
+            latency=result.latency if result else None,
+        )
+
+    @staticmethod
+    def __with_test_reports(
+        step: "AutomationStep", result: "StepExecutionResult", started: float
+    ) -> "StepExecutionResult":
+        if not step.junit:
+            return result
+        return replace(result, tests=step.collect_test_reports(started))
+
+    @staticmethod
+    def __sampler(
+        step: "AutomationStep", options: RunOptions
+    ) -> Optional[ProcessSampler]:
+        """A sampler for the process of a command step, if sampling is enabled."""
+        if options.sample_interval is None or step.command is None:
+            return None
+        return ProcessSampler(options.sample_interval)
+
+    def _run_pipeline(
+        self,
+        pipeline: List[Tuple["AutomationStep", PlannedStep]],
+        options: RunOptions,
+        total: int,
+        jobserver: Optional[JobServer],
+    ) -> List[StepOutcome]:
+        """Run connected steps together; their output is always captured."""
+        for _, planned_step in pipeline:
+            self._emit(
+                options, StepStarted(planned=planned_step, total=total, dry_run=False)
+            )
+        captures = [
+            options.spool.open() if options.spool is not None else CapturedOutput()
+            for _ in pipeline
+        ]
+        producer, consumers = pipeline[0][0], [step for step, _ in pipeline[1:]]
+        samplers = None
+        if options.sample_interval is not None:
+            samplers = [ProcessSampler(options.sample_interval) for _ in pipeline]
+        started = time()
+        try:
+            results = producer.run_pipeline(
+                consumers, self.project.shell, captures, jobserver, samplers
+            )
+        finally:
+            timelines = [sampler.stop() for sampler in samplers or []]
+        results = [
+            self.__with_test_reports(step, result, started)
+            for (step, _), result in zip(pipeline, results)
+        ]
+        if timelines:
+            results = [
+                replace(result, resources=timeline)
+                for result, timeline in zip(results, timelines)
+            ]
+        return [
+            StepOutcome(
+                planned_step.index,
+                planned_step.name,
+                result.command_executed,
+                (
+                    StepExecutionStatus.COMPLETED
+                    if result.exit_code == 0
+                    else StepExecutionStatus.FAILED
+                ),
+                result,
+            )
+            for (_, planned_step), result in zip(pipeline, results)
+        ]
+
+    def _run_step(
+        self,
+        step: "AutomationStep",
+        planned_step: PlannedStep,
+        options: RunOptions,
+        jobserver: Optional[JobServer],
+        worker: Optional[PythonWorker] = None,
+    ) -> StepOutcome:
+        if options.dry_run:
+            return StepOutcome(
+                planned_step.index,
+                planned_step.name,
+                planned_step.command,
+                StepExecutionStatus.NOT_EXECUTED,
+            )
+        on_output = None
+        if options.stream_output:
+
+            def on_output(stream: str, line: str) -> None:
+                self._emit(options, StepOutput(planned_step, stream, line))
+
+        mirrors = None
+        if options.tee_output and on_output is None:
+            # Looked up per step, so redirected console streams are honored
+            mirrors = {"stdout": sys.stdout, "stderr": sys.stderr}
+        capture = None
+        if options.spool is not None:
+            capture = options.spool.open()
+        elif mirrors is not None:
+            capture = CapturedOutput()
+        sampler = self.__sampler(step, options)
+        started = time()
+        try:
+            result = step.run(
+                self.project.shell,
+                jobserver,
+                on_output,
+                capture,
+                mirrors,
+                worker,
+                sampler,
+            )
+        finally:
+            timeline = sampler.stop() if sampler is not None else None
+        if timeline is not None:
+            result = replace(result, resources=timeline)
+        result = self.__with_test_reports(step, result, started)
+        status = (
+            StepExecutionStatus.COMPLETED
+            if result.exit_code == 0
+            else StepExecutionStatus.FAILED
+        )
+        return StepOutcome(
+            planned_step.index,
+            planned_step.name,
+            result.command_executed,
+            status,
+            result,
+        )
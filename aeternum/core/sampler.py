@@ -0,0 +1,305 @@
+"""Resource usage timelines of step processes.
+
+A sampler thread polls `/proc` while a step runs and records the CPU, memory
+and disk I/O of the step process and all of its descendants. Reading a few
+small proc files per process every interval keeps the overhead negligible,
+and nothing is sampled unless a build asks for it.
+
+CPU time and I/O bytes of exited descendants are folded into their parent's
+counters by the kernel once they are reaped, so summing the counters of the
+live process tree accounts for them. Descendants reparented outside the tree
+take their counters along; the totals are kept monotonic so such losses
+never show up as negative usage.
+"""
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROC_DIR: Path = Path("/proc")
+DEFAULT_SAMPLE_INTERVAL: float = 0.5
+TIMELINE_FORMAT_VERSION: int = 1
+
+
+def sampling_supported() -> bool:
+    """Whether process resources can be sampled on this host."""
+    return Path(PROC_DIR, "self", "stat").exists()
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count with a binary unit suited to its magnitude."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TiB"
+
+
+@dataclass(frozen=True)
+class ProcessCounters:
+    """Cumulative usage counters of one process, read from /proc."""
+
+    # CPU time of the process and its reaped children, in clock ticks
+    cpu_ticks: int
+    rss: int
+    read_bytes: int
+    write_bytes: int
+
+
+def _read_file(path: Path) -> Optional[str]:
+    try:
+        with open(path, "r") as file:
+            return file.read()
+    except (OSError, ValueError):
+        # The process exited between listing and reading, or is not ours
+        return None
+
+
+def read_counters(pid: int) -> Optional[ProcessCounters]:
+    """Read the counters of a process, None if it no longer exists."""
+    stat = _read_file(Path(PROC_DIR, str(pid), "stat"))
+    if stat is None:
+        return None
+    # The command name may contain spaces and parentheses, so split after it
+    fields = stat[stat.rfind(")") + 2 :].split()
+    try:
+        cpu_ticks = sum(int(value) for value in fields[11:15])
+        rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    except (IndexError, ValueError):
+        return None
+    io_counters: Dict[str, int] = {}
+    for line in (_read_file(Path(PROC_DIR, str(pid), "io")) or "").splitlines():
+        key, _, value = line.partition(": ")
+        if value.isdigit():
+            io_counters[key] = int(value)
+    return ProcessCounters(
+        cpu_ticks,
+        rss,
+        io_counters.get("read_bytes", 0),
+        io_counters.get("write_bytes", 0),
+    )
+
+
+def _children_by_parent() -> Dict[int, List[int]]:
+    """Map every process to its children, by scanning all of /proc."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.scandir(PROC_DIR):
+        if not entry.name.isdigit():
+            continue
+        stat = _read_file(Path(entry.path, "stat"))
+        if stat is None:
+            continue
+        fields = stat[stat.rfind(")") + 2 :].split()
+        if len(fields) > 1 and fields[1].isdigit():
+            children.setdefault(int(fields[1]), []).append(int(entry.name))
+    return children
+
+
+def _direct_children(pid: int) -> Optional[List[int]]:
+    """Children of a process, None if the kernel does not list them."""
+    try:
+        tasks = os.listdir(Path(PROC_DIR, str(pid), "task"))
+    except OSError:
+        return []
+    children: List[int] = []
+    for tid in tasks:
+        path = Path(PROC_DIR, str(pid), "task", tid, "children")
+        if not path.exists():
+            return None
+        children.extend(int(child) for child in (_read_file(path) or "").split())
+    return children
+
+
+def process_tree(pid: int) -> List[int]:
+    """A process and all of its live descendants.
+
+    Uses the per-task children lists when the kernel provides them, which only
+    touches the processes of the tree, and scans all of /proc otherwise.
+    """
+    tree: List[int] = []
+    pending = [pid]
+    seen: Set[int] = set()
+    scanned: Optional[Dict[int, List[int]]] = None
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        tree.append(current)
+        children = _direct_children(current) if scanned is None else None
+        if children is None:
+            if scanned is None:
+                scanned = _children_by_parent()
+            children = scanned.get(current, [])
+        pending.extend(children)
+    return tree
+
+
+@dataclass(frozen=True)
+class ResourceSample:
+    # Seconds since the step process started
+    elapsed: float
+    # CPU usage over the last interval; 100 is one fully used core
+    cpu_percent: float
+    rss: int
+    # Bytes read from and written to storage since the step process started
+    read_bytes: int
+    write_bytes: int
+    processes: int
+
+
+@dataclass(frozen=True)
+class ResourceTimeline:
+    """Resource samples of one step, in time order."""
+
+    interval: float
+    samples: List[ResourceSample] = field(default_factory=list)
+
+    @property
+    def cpu_average(self) -> float:
+        """Mean CPU usage over the sampled time, in percent of one core."""
+        if not self.samples:
+            return 0.0
+        return sum(sample.cpu_percent for sample in self.samples) / len(self.samples)
+
+    @property
+    def cpu_peak(self) -> float:
+        return max((sample.cpu_percent for sample in self.samples), default=0.0)
+
+    @property
+    def peak_rss(self) -> int:
+        return max((sample.rss for sample in self.samples), default=0)
+
+    @property
+    def read_bytes(self) -> int:
+        return self.samples[-1].read_bytes if self.samples else 0
+
+    @property
+    def write_bytes(self) -> int:
+        return self.samples[-1].write_bytes if self.samples else 0
+
+    def describe(self) -> str:
+        """Summarize the utilization, e.g. 'cpu 95% (peak 180%), rss 1.2GiB'."""
+        if not self.samples:
+            return "-"
+        return (
+            f"cpu {self.cpu_average:.0f}% (peak {self.cpu_peak:.0f}%), "
+            + f"rss {format_bytes(self.peak_rss)}, "
+            + f"io {format_bytes(self.read_bytes)} read / "
+            + f"{format_bytes(self.write_bytes)} written"
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "cpu_average": self.cpu_average,
+            "cpu_peak": self.cpu_peak,
+            "peak_rss": self.peak_rss,
+            "read_bytes": self.read_bytes,
+            "write_bytes": self.write_bytes,
+            "samples": [asdict(sample) for sample in self.samples],
+        }
+
+
+class ProcessSampler:
+    """Thread sampling the resources of a process tree until it exits.
+
+    The sampler is created before the step starts and attached to the step
+    process once it is spawned; `stop` returns the recorded timeline.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.__samples: List[ResourceSample] = []
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def attach(self, pid: int) -> None:
+        """Start sampling a spawned process and its descendants."""
+        if self.__thread is not None:
+            raise RuntimeError("A sampler can only be attached to one process")
+        self.__thread = threading.Thread(
+            target=self.__sample, args=(pid,), name=f"sampler-{pid}", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self) -> ResourceTimeline:
+        """Stop sampling and return the timeline recorded so far."""
+        self.__stopped.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        return ResourceTimeline(self.interval, list(self.__samples))
+
+    def __sample(self, pid: int) -> None:
+        ticks_per_second = os.sysconf("SC_CLK_TCK")
+        start_time = last_time = perf_counter()
+        last_ticks = 0
+        # Totals only grow, see the module docstring
+        totals = [0, 0, 0]
+        while not self.__stopped.wait(self.interval):
+            counters = [
+                counter
+                for counter in map(read_counters, process_tree(pid))
+                if counter is not None
+            ]
+            if not counters:
+                break
+            now = perf_counter()
+            totals = [
+                max(total, current)
+                for total, current in zip(totals, _sum_counters(counters))
+            ]
+            cpu_percent = (
+                (totals[0] - last_ticks) / ticks_per_second / (now - last_time) * 100
+            )
+            self.__samples.append(
+                ResourceSample(
+                    elapsed=now - start_time,
+                    cpu_percent=cpu_percent,
+                    rss=sum(counter.rss for counter in counters),
+                    read_bytes=totals[1],
+                    write_bytes=totals[2],
+                    processes=len(counters),
+                )
+            )
+            last_time, last_ticks = now, totals[0]
+
+
+def _sum_counters(counters: Sequence[ProcessCounters]) -> Tuple[int, int, int]:
+    return (
+        sum(counter.cpu_ticks for counter in counters),
+        sum(counter.read_bytes for counter in counters),
+        sum(counter.write_bytes for counter in counters),
+    )
+
+
+def write_timelines(
+    filepath: Path, timelines: Sequence[Tuple[int, str, ResourceTimeline]]
+) -> None:
+    """Write the resource timelines of a build to a JSON file.
+
+    Args:
+        filepath (Path): Output path to write to
+        timelines (Sequence[Tuple[int, str, ResourceTimeline]]): Step index,
+            step name and timeline of every sampled step
+    """
+    with open(filepath, "w") as file:
+        json.dump(
+            {
+                "version": TIMELINE_FORMAT_VERSION,
+                "steps": [
+                    {"index": index, "name": name, **timeline.to_dict()}
+                    for index, name, timeline in timelines
+                ],
+            },
+            file,
+            indent=2,
+        )
+        file.write("\n")
+    logger.debug(f"Wrote resource timelines of {len(timelines)} steps to {filepath}")
@@ -0,0 +1,91 @@
+"""Partitioning of build steps across CI nodes."""
+
+import hashlib
+import re
+import statistics
+from dataclasses import dataclass
+from typing import List, Mapping, Optional, Sequence
+
+from aeternum.core.errors import AeternumInputError
+
+DEFAULT_STEP_DURATION: float = 1.0
+
+_SHARD_PATTERN = re.compile(r"^(\d+)/(\d+)$")
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """One shard of a build, 1-based (e.g. 2/4 is the second of four)."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, value: str) -> "ShardSpec":
+        """Parse an 'i/n' shard selector.
+
+        Args:
+            value (str): Shard selector
+
+        Returns:
+            ShardSpec: Parsed shard
+        """
+        match = _SHARD_PATTERN.match(value.strip())
+        if not match:
+            raise AeternumInputError(
+                f"Invalid shard '{value}'", "Use the form i/n, e.g. --shard 1/4."
+            )
+        index, count = int(match.group(1)), int(match.group(2))
+        if count < 1 or not 1 <= index <= count:
+            raise AeternumInputError(
+                f"Invalid shard '{value}'", "Shard index must be between 1 and n."
+            )
+        return cls(index=index, count=count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def _name_digest(name: str) -> str:
+    return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+
+def assign_shards(
+    step_names: Sequence[str],
+    count: int,
+    timings: Optional[Mapping[str, float]] = None,
+) -> List[int]:
+    """Assign each step to a shard.
+
+    Without timings, steps are ordered by a stable hash of their name and dealt
+    round-robin, so every node computes the same partition and shard sizes
+    differ by at most one. With timings, steps are placed longest-first onto
+    the least loaded shard; steps missing from the timings are assumed to take
+    the median recorded duration.
+
+    Args:
+        step_names (Sequence[str]): Names of the steps to partition
+        count (int): Number of shards
+        timings (Optional[Mapping[str, float]]): Recorded durations by name
+
+    Returns:
+        List[int]: 0-based shard of each step, in input order
+    """
+    positions = sorted(
+        range(len(step_names)),
+        key=lambda pos: (_name_digest(step_names[pos]), pos),
+    )
+    assignment = [0] * len(step_names)
+    if not timings:
+        for rank, pos in enumerate(positions):
+            assignment[pos] = rank % count
+        return assignment
+
+    fallback = statistics.median(timings.values())
+    durations = [timings.get(name, fallback) for name in step_names]
+    loads = [0.0] * count
+    for pos in sorted(positions, key=lambda pos: -durations[pos]):
+        shard = min(range(count), key=lambda idx: (loads[idx], idx))
+        assignment[pos] = shard
+        loads[shard] += durations[pos]
+    return assignment
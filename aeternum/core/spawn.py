@@ -0,0 +1,442 @@
+"""Child process spawning.
+
+Both build steps and validation commands start their processes through this
+module. Options are normalized so CPython launches children with `vfork`,
+which does not copy the parent's page tables, so launch latency stays flat as
+the parent process grows. Descriptors that are not explicitly passed are
+closed in the child, and executables are resolved against PATH up front so
+the child does not try every PATH entry in turn.
+
+Output that is both persisted and shown is teed without passing through
+Python on Linux: `splice` moves child pipe data into the spool file and
+`sendfile` copies it from there to the console. Elsewhere, or when a target
+does not support these calls, a large-buffer binary copy loop is used.
+"""
+import errno
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+TEE_CHUNK_SIZE: int = 1024 * 1024
+
+PathLike = Union[str, Path]
+OutputTarget = Union[int, IO, None]
+
+
+@dataclass(frozen=True)
+class ProcessResult:
+    returncode: int
+    stdout: Any
+    stderr: Any
+    duration: float
+
+
+def resolve_executable(executable: str, env: Optional[Mapping[str, str]] = None) -> str:
+    """Resolve a command name to an absolute path, if it can be found on PATH.
+
+    Not cached: PATH may change, and tools may be installed, during a build.
+
+    Args:
+        executable (str): Command name or path
+        env (Optional[Mapping[str, str]]): Environment of the child, whose
+            PATH is searched like subprocess would; this process's by default
+    """
+    if os.path.dirname(executable):
+        return executable
+    search_path = os.pathsep.join(os.get_exec_path(env))
+    return shutil.which(executable, path=search_path) or executable
+
+
+def _effective_cwd(cwd: Optional[PathLike]) -> Optional[PathLike]:
+    """Drop a working directory that is already the current one."""
+    if cwd is None:
+        return None
+    try:
+        if Path(cwd).resolve() == Path.cwd().resolve():
+            return None
+    except OSError:
+        pass
+    return cwd
+
+
+def spawn_options(
+    argv: Sequence[str],
+    cwd: Optional[PathLike] = None,
+    env: Optional[Mapping[str, str]] = None,
+    pass_fds: Tuple[int, ...] = (),
+) -> Dict[str, Any]:
+    """Build subprocess options for a cheap, descriptor-tight launch.
+
+    Args:
+        argv (Sequence[str]): Program and arguments
+        cwd (Optional[PathLike]): Working directory for the child
+        env (Optional[Mapping[str, str]]): Environment for the child
+        pass_fds (Tuple[int, ...]): Extra descriptors the child must inherit
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for subprocess
+    """
+    options: Dict[str, Any] = {
+        "args": [resolve_executable(argv[0], env), *argv[1:]],
+        "cwd": _effective_cwd(cwd),
+        "env": env,
+    }
+    if pass_fds:
+        options["pass_fds"] = pass_fds
+    return options
+
+
+def run_process(
+    argv: Sequence[str],
+    cwd: Optional[PathLike] = None,
+    env: Optional[Mapping[str, str]] = None,
+    pass_fds: Tuple[int, ...] = (),
+    stdout: OutputTarget = subprocess.PIPE,
+    stderr: OutputTarget = subprocess.PIPE,
+    text: bool = True,
+    on_spawn: Optional[Callable[[int], None]] = None,
+) -> ProcessResult:
+    """Run a process to completion.
+
+    Args:
+        argv (Sequence[str]): Program and arguments
+        cwd (Optional[PathLike]): Working directory for the child
+        env (Optional[Mapping[str, str]]): Environment for the child
+        pass_fds (Tuple[int, ...]): Extra descriptors the child must inherit
+        stdout (OutputTarget): Where to send standard output
+        stderr (OutputTarget): Where to send standard error
+        text (bool): Decode captured output as text
+        on_spawn (Optional[Callable[[int], None]]): Called with the process
+            id right after the process started
+
+    Returns:
+        ProcessResult: Exit status, captured output and wall-clock duration
+    """
+    options = spawn_options(argv, cwd=cwd, env=env, pass_fds=pass_fds)
+    logger.debug(f"Spawning {options['args'][0]}")
+    start_time = perf_counter()
+    if on_spawn is None:
+        result = subprocess.run(stdout=stdout, stderr=stderr, text=text, **options)
+        returncode, output, errors = result.returncode, result.stdout, result.stderr
+    else:
+        with subprocess.Popen(
+            stdout=stdout, stderr=stderr, text=text, **options
+        ) as process:
+            on_spawn(process.pid)
+            output, errors = process.communicate()
+            returncode = process.returncode
+    return ProcessResult(
+        returncode=returncode,
+        stdout=output,
+        stderr=errors,
+        duration=perf_counter() - start_time,
+    )
+
+
+def stream_process(
+    argv: Sequence[str],
+    on_line: Callable[[str, str], None],
+    cwd: Optional[PathLike] = None,
+    env: Optional[Mapping[str, str]] = None,
+    pass_fds: Tuple[int, ...] = (),
+    sinks: Optional[Mapping[str, IO[bytes]]] = None,
+    on_spawn: Optional[Callable[[int], None]] = None,
+) -> ProcessResult:
+    """Run a process to completion, reporting its output line by line.
+
+    Args:
+        argv (Sequence[str]): Program and arguments
+        on_line (Callable[[str, str], None]): Called with the stream name
+            ('stdout' or 'stderr') and each line, from reader threads
+        cwd (Optional[PathLike]): Working directory for the child
+        env (Optional[Mapping[str, str]]): Environment for the child
+        pass_fds (Tuple[int, ...]): Extra descriptors the child must inherit
+        sinks (Optional[Mapping[str, IO[bytes]]]): Binary files receiving each
+            stream instead of keeping it in memory, keyed by stream name
+        on_spawn (Optional[Callable[[int], None]]): Called with the process
+            id right after the process started
+
+    Returns:
+        ProcessResult: Exit status, captured output and wall-clock duration
+    """
+    options = spawn_options(argv, cwd=cwd, env=env, pass_fds=pass_fds)
+    captured: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+
+    def pump(stream_name: str, pipe: IO[str]) -> None:
+        with pipe:
+            for line in pipe:
+                if sinks is not None:
+                    sinks[stream_name].write(line.encode("utf-8"))
+                else:
+                    captured[stream_name].append(line)
+                on_line(stream_name, line.rstrip("\n"))
+
+    start_time = perf_counter()
+    process = subprocess.Popen(
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **options
+    )
+    if on_spawn is not None:
+        on_spawn(process.pid)
+    readers = [
+        threading.Thread(target=pump, args=("stdout", process.stdout), daemon=True),
+        threading.Thread(target=pump, args=("stderr", process.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    returncode = process.wait()
+    return ProcessResult(
+        returncode=returncode,
+        stdout="".join(captured["stdout"]),
+        stderr="".join(captured["stderr"]),
+        duration=perf_counter() - start_time,
+    )
+
+
+@dataclass(frozen=True)
+class PipelineCommand:
+    argv: Sequence[str]
+    cwd: Optional[PathLike] = None
+    stderr: OutputTarget = None
+
+
+def run_pipeline(
+    commands: Sequence[PipelineCommand],
+    stdout: OutputTarget = None,
+    env: Optional[Mapping[str, str]] = None,
+    pass_fds: Tuple[int, ...] = (),
+    on_spawn: Optional[Callable[[int, int], None]] = None,
+) -> List[ProcessResult]:
+    """Run processes concurrently, each reading the output of the previous one.
+
+    Neighbours are connected by OS pipes, so the data flows with backpressure
+    and never passes through the parent.
+
+    Args:
+        commands (Sequence[PipelineCommand]): Processes in pipeline order
+        stdout (OutputTarget): Where the last process sends standard output
+        env (Optional[Mapping[str, str]]): Environment for the children
+        pass_fds (Tuple[int, ...]): Extra descriptors the children must inherit
+        on_spawn (Optional[Callable[[int, int], None]]): Called with the
+            pipeline position and process id of each process once all started
+
+    Returns:
+        List[ProcessResult]: Exit status and duration of each process, in
+            pipeline order; the output is only in the given targets
+    """
+    processes: List[subprocess.Popen] = []
+    stdin: Optional[int] = None
+    start_time = perf_counter()
+    try:
+        for position, command in enumerate(commands):
+            is_last = position == len(commands) - 1
+            read_end, write_end = (None, None) if is_last else os.pipe()
+            try:
+                options = spawn_options(
+                    command.argv, cwd=command.cwd, env=env, pass_fds=pass_fds
+                )
+                processes.append(
+                    subprocess.Popen(
+                        stdin=stdin,
+                        stdout=stdout if is_last else write_end,
+                        stderr=command.stderr,
+                        **options,
+                    )
+                )
+            finally:
+                # The children hold their own copies of the pipe ends
+                for fd in (stdin, write_end):
+                    if fd is not None:
+                        os.close(fd)
+                stdin = read_end
+    except BaseException:
+        if stdin is not None:
+            os.close(stdin)
+        for process in processes:
+            process.kill()
+            process.wait()
+        raise
+
+    if on_spawn is not None:
+        for position, process in enumerate(processes):
+            on_spawn(position, process.pid)
+    end_times = [0.0] * len(processes)
+
+    def wait(position: int) -> None:
+        processes[position].wait()
+        end_times[position] = perf_counter()
+
+    waiters = [
+        threading.Thread(target=wait, args=(position,), daemon=True)
+        for position in range(len(processes))
+    ]
+    for waiter in waiters:
+        waiter.start()
+    for waiter in waiters:
+        waiter.join()
+    return [
+        ProcessResult(
+            returncode=process.returncode,
+            stdout=None,
+            stderr=None,
+            duration=end_time - start_time,
+        )
+        for process, end_time in zip(processes, end_times)
+    ]
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _mirror_fd(mirror: IO) -> Optional[int]:
+    """Flush a console stream and return its descriptor, if it has one."""
+    mirror.flush()
+    try:
+        return mirror.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _copy_range(
+    sink_fd: int,
+    mirror: IO,
+    mirror_fd: Optional[int],
+    offset: int,
+    count: int,
+    zero_copy: bool,
+) -> bool:
+    """Copy a range of the sink file to a mirror.
+
+    Returns:
+        bool: Whether zero-copy sendfile can still be used for this mirror
+    """
+    if zero_copy and mirror_fd is not None:
+        try:
+            while count > 0:
+                sent = os.sendfile(mirror_fd, sink_fd, offset, count)
+                offset += sent
+                count -= sent
+            return True
+        except OSError as err:
+            if err.errno not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+    while count > 0:
+        data = os.pread(sink_fd, min(count, TEE_CHUNK_SIZE), offset)
+        if mirror_fd is not None:
+            _write_all(mirror_fd, data)
+        else:
+            getattr(mirror, "buffer", mirror).write(data)
+        offset += len(data)
+        count -= len(data)
+    return False
+
+
+def _tee_stream(pipe_fd: int, sink: IO[bytes], mirror: IO) -> None:
+    """Move a child pipe into a sink file, mirroring every chunk."""
+    sink_fd = sink.fileno()
+    mirror_fd = _mirror_fd(mirror)
+    offset = os.lseek(sink_fd, 0, os.SEEK_CUR)
+    use_splice = hasattr(os, "splice")
+    use_sendfile = hasattr(os, "sendfile")
+    while True:
+        count = 0
+        if use_splice:
+            try:
+                count = os.splice(pipe_fd, sink_fd, TEE_CHUNK_SIZE)
+            except OSError as err:
+                if err.errno not in (errno.EINVAL, errno.ENOSYS):
+                    raise
+                use_splice = False
+        if not use_splice:
+            data = os.read(pipe_fd, TEE_CHUNK_SIZE)
+            _write_all(sink_fd, data)
+            count = len(data)
+        if count == 0:
+            break
+        use_sendfile = _copy_range(
+            sink_fd, mirror, mirror_fd, offset, count, use_sendfile
+        )
+        offset += count
+    if mirror_fd is None:
+        mirror.flush()
+
+
+def tee_process(
+    argv: Sequence[str],
+    sinks: Mapping[str, IO[bytes]],
+    mirrors: Mapping[str, IO],
+    cwd: Optional[PathLike] = None,
+    env: Optional[Mapping[str, str]] = None,
+    pass_fds: Tuple[int, ...] = (),
+    on_spawn: Optional[Callable[[int], None]] = None,
+) -> ProcessResult:
+    """Run a process, writing its output to files and mirroring it live.
+
+    Args:
+        argv (Sequence[str]): Program and arguments
+        sinks (Mapping[str, IO[bytes]]): Binary files receiving each stream,
+            keyed by stream name ('stdout' and 'stderr')
+        mirrors (Mapping[str, IO]): Console streams each stream is mirrored
+            to, keyed by stream name
+        cwd (Optional[PathLike]): Working directory for the child
+        env (Optional[Mapping[str, str]]): Environment for the child
+        pass_fds (Tuple[int, ...]): Extra descriptors the child must inherit
+        on_spawn (Optional[Callable[[int], None]]): Called with the process
+            id right after the process started
+
+    Returns:
+        ProcessResult: Exit status and wall-clock duration; the output is
+            only in the sinks
+    """
+    options = spawn_options(argv, cwd=cwd, env=env, pass_fds=pass_fds)
+    start_time = perf_counter()
+    process = subprocess.Popen(
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, **options
+    )
+    if on_spawn is not None:
+        on_spawn(process.pid)
+    pipes = {"stdout": process.stdout, "stderr": process.stderr}
+    readers = [
+        threading.Thread(
+            target=_tee_stream,
+            args=(pipe.fileno(), sinks[name], mirrors[name]),
+            daemon=True,
+        )
+        for name, pipe in pipes.items()
+    ]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    for pipe in pipes.values():
+        pipe.close()
+    returncode = process.wait()
+    return ProcessResult(
+        returncode=returncode,
+        stdout=None,
+        stderr=None,
+        duration=perf_counter() - start_time,
+    )
@@ -0,0 +1,248 @@
+"""Loading of templated project specs.
+
+A spec may list shared fragments under a top-level `include:` key, resolved
+relative to the including file. Fragments are merged before the including
+file: mappings merge key by key, lists are concatenated in include order and
+the including file wins for scalars. Templating is opt-in: files named
+`*.j2` or starting with the `# aeternum: template` header are rendered with
+Jinja2 first, with the CLI variables and the process environment as `env`,
+and may import macros from files next to them. Every other file is plain
+YAML, so commands may contain literal `{{ ... }}` like Go templates.
+
+Compiled templates are kept by Jinja2 in memory and as bytecode on disk, both
+keyed by template source checksum. Parsed YAML is cached in memory and as JSON
+on disk, keyed by a hash of the rendered text, so a fragment shared by many
+specs is parsed once. Documents that JSON cannot represent exactly, e.g. with
+integer keys, are only cached in memory.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import yaml
+
+from aeternum.core.cache import atomic_write, default_cache_dir
+from aeternum.core.errors import AeternumInputError
+
+logger = logging.getLogger(__name__)
+
+SPEC_CACHE_DIR_ENV: str = "AETERNUM_SPEC_CACHE_DIR"
+INCLUDE_KEY: str = "include"
+
+TEMPLATE_SUFFIX: str = ".j2"
+TEMPLATE_HEADER: str = "# aeternum: template"
+# Parsed documents keyed by the hash of their rendered text
+_parsed_documents: Dict[str, Any] = {}
+
+
+def default_spec_cache_dir() -> Path:
+    """Spec cache location from the environment, or the user cache directory."""
+    configured = os.environ.get(SPEC_CACHE_DIR_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    return Path(default_cache_dir(), "specs")
+
+
+def parse_variables(assignments: Tuple[str, ...]) -> Dict[str, str]:
+    """Parse 'KEY=VALUE' template variable assignments."""
+    variables = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition("=")
+        if not separator or not key:
+            raise AeternumInputError(
+                f"Invalid template variable: '{assignment}'",
+                "Pass variables as KEY=VALUE.",
+            )
+        variables[key] = value
+    return variables
+
+
+def is_template(filepath: Path, text: str) -> bool:
+    """Whether a spec file opted in to Jinja2 rendering."""
+    return (
+        filepath.suffix == TEMPLATE_SUFFIX
+        or text.lstrip().partition("\n")[0].strip() == TEMPLATE_HEADER
+    )
+
+
+def merge_documents(base: Any, override: Any) -> Any:
+    """Merge a spec document over the fragments it includes."""
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = dict(base)
+        for key, value in override.items():
+            merged[key] = merge_documents(base[key], value) if key in base else value
+        return merged
+    if isinstance(base, list) and isinstance(override, list):
+        return [*base, *override]
+    return override
+
+
+@lru_cache(maxsize=64)
+def _environment(search_path: Tuple[str, ...], cache_dir: Optional[str]) -> Any:
+    # Imported here so plain YAML specs do not pay for the import
+    import jinja2
+
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(list(search_path)),
+        undefined=jinja2.StrictUndefined,
+        keep_trailing_newline=True,
+        auto_reload=True,
+        bytecode_cache=(
+            jinja2.FileSystemBytecodeCache(cache_dir) if cache_dir else None
+        ),
+    )
+
+
+class SpecLoader:
+    """Expands templated specs and their includes, with shared caches.
+
+    Args:
+        variables (Optional[Mapping[str, str]]): Template variables
+        cache_dir (Optional[Path]): Directory of the on-disk caches; None
+            disables them
+    """
+
+    def __init__(
+        self,
+        variables: Optional[Mapping[str, str]] = None,
+        cache_dir: Optional[Path] = None,
+    ) -> None:
+        self.variables = dict(variables or {})
+        self.cache_dir = cache_dir
+
+    def load(self, filepath: Path) -> Dict[str, Any]:
+        """Load a spec file with its includes expanded.
+
+        Args:
+            filepath (Path): Path of the spec file
+
+        Returns:
+            Dict[str, Any]: Expanded spec document
+        """
+        document = self.__load(Path(filepath).resolve(), Path(filepath).resolve(), ())
+        if not isinstance(document, dict):
+            raise AeternumInputError(f"Project spec is not a mapping: {filepath}")
+        return document
+
+    def __load(
+        self, filepath: Path, root: Path, stack: Tuple[Path, ...]
+    ) -> Dict[str, Any]:
+        if filepath in stack:
+            chain = " -> ".join(path.name for path in (*stack, filepath))
+            raise AeternumInputError(f"Circular spec include: {chain}")
+        document = self.__parse(filepath, root) or {}
+        if not isinstance(document, dict):
+            return document
+        includes = document.pop(INCLUDE_KEY, None) or []
+        if isinstance(includes, str):
+            includes = [includes]
+        merged: Dict[str, Any] = {}
+        for include in includes:
+            fragment_path = Path(filepath.parent, include).resolve()
+            if not fragment_path.is_file():
+                raise AeternumInputError(
+                    f"Included spec fragment not found: {include}",
+                    f"Includes are relative to the including file, {filepath}.",
+                )
+            merged = merge_documents(
+                merged, self.__load(fragment_path, root, (*stack, filepath))
+            )
+        return merge_documents(merged, document)
+
+    def __parse(self, filepath: Path, root: Path) -> Any:
+        text = self.render_file(filepath, root)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        document = _parsed_documents.get(digest)
+        if document is None:
+            document = self.__read_cached(digest)
+        if document is None:
+            document = yaml.safe_load(text)
+            self.__write_cached(digest, document)
+        _parsed_documents[digest] = document
+        # Callers merge and pop keys, the cached document must stay intact
+        return copy.deepcopy(document)
+
+    def render_file(self, filepath: Path, root: Path) -> str:
+        """Render a spec file, returning files that are not templates as they are."""
+        text = filepath.read_text()
+        if not is_template(filepath, text):
+            return text
+        import jinja2
+
+        search_path = tuple(dict.fromkeys([str(filepath.parent), str(root.parent)]))
+        environment = _environment(search_path, self.__cache_subdir("templates"))
+        try:
+            template = environment.get_template(filepath.name)
+            return template.render(env=os.environ, **self.variables)
+        except jinja2.TemplateError as err:
+            raise AeternumInputError(
+                f"Failed to render spec template {filepath}: {err}",
+                "Pass template variables with --var KEY=VALUE.",
+            )
+
+    def __cache_subdir(self, name: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        directory = Path(self.cache_dir, name)
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as err:
+            logger.debug(f"Spec cache disabled: {err}")
+            return None
+        return str(directory)
+
+    def __parsed_path(self, digest: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return Path(self.cache_dir, "parsed", digest[:2], f"{digest}.json")
+
+    def __read_cached(self, digest: str) -> Any:
+        path = self.__parsed_path(digest)
+        if path is None:
+            return None
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def __write_cached(self, digest: str, document: Any) -> None:
+        path = self.__parsed_path(digest)
+        if path is None:
+            return
+        try:
+            encoded = json.dumps(document)
+            # JSON turns non-string keys into strings; such a document would
+            # load differently from the cache
+            if json.loads(encoded) != document:
+                logger.debug(f"Not caching parsed spec {digest[:12]}: not JSON-safe")
+                return
+            atomic_write(path, encoded.encode("utf-8"))
+        except (OSError, TypeError, ValueError) as err:
+            # Documents with YAML-only types, e.g. dates, are not cached on disk
+            logger.debug(f"Not caching parsed spec {digest[:12]}: {err}")
+
+
+def load_spec_document(
+    filepath: Path, variables: Optional[Mapping[str, str]] = None
+) -> Dict[str, Any]:
+    """Load a spec file with templates rendered and includes expanded.
+
+    Args:
+        filepath (Path): Path of the spec file
+        variables (Optional[Mapping[str, str]]): Template variables
+
+    Returns:
+        Dict[str, Any]: Expanded spec document
+    """
+    try:
+        return SpecLoader(variables, default_spec_cache_dir()).load(filepath)
+    except yaml.YAMLError as err:
+        raise AeternumInputError(
+            f"Failed to load project spec from {filepath}", str(err)
+        ) from err
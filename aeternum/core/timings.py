@@ -0,0 +1,145 @@
+"""Historical step duration records, and regression checks against them."""
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping
+
+from aeternum.core.errors import AeternumInputError
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_FORMAT_VERSION: int = 1
+BASELINE_SMOOTHING: float = 0.3
+DEFAULT_MAX_REGRESSION: float = 0.2
+DEFAULT_MIN_DELTA: float = 1.0
+
+
+def load_timings(filepath: Path) -> Dict[str, float]:
+    """Load recorded step durations.
+
+    Args:
+        filepath (Path): Path of the timings JSON file
+
+    Returns:
+        Dict[str, float]: Duration in seconds keyed by step name
+    """
+    try:
+        with open(filepath, "r") as file:
+            data = json.load(file)
+        return {name: float(seconds) for name, seconds in data["steps"].items()}
+    except FileNotFoundError:
+        raise AeternumInputError(f"Timings file not found: {filepath}")
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+        raise AeternumInputError(
+            f"Invalid timings file: {filepath}",
+            'Expected a JSON object like {"steps": {"<step name>": <seconds>}}.',
+        )
+
+
+def save_timings(filepath: Path, timings: Mapping[str, float]) -> None:
+    """Write step durations, keeping entries for steps not measured this run.
+
+    Args:
+        filepath (Path): Path of the timings JSON file
+        timings (Mapping[str, float]): Measured durations keyed by step name
+    """
+    recorded = load_timings(filepath) if Path(filepath).exists() else {}
+    recorded.update(timings)
+    with open(filepath, "w") as file:
+        json.dump(
+            {
+                "version": TIMINGS_FORMAT_VERSION,
+                "steps": {name: round(recorded[name], 6) for name in sorted(recorded)},
+            },
+            file,
+            indent=2,
+        )
+        file.write("\n")
+    logger.debug(f"Recorded {len(timings)} step durations to {filepath}")
+
+
+def parse_percentage(value: str) -> float:
+    """Parse a percentage like '20%' or '20' into a fraction."""
+    try:
+        percentage = float(value.strip().rstrip("%"))
+    except ValueError:
+        raise AeternumInputError(
+            f"Invalid percentage: '{value}'", "Use a number like '20%'."
+        )
+    if percentage < 0:
+        raise AeternumInputError(f"Percentage must not be negative: '{value}'")
+    return percentage / 100
+
+
+def smooth_timings(
+    baseline: Mapping[str, float],
+    measured: Mapping[str, float],
+    alpha: float = BASELINE_SMOOTHING,
+) -> Dict[str, float]:
+    """Blend measured durations into a baseline with an exponential moving average.
+
+    Args:
+        baseline (Mapping[str, float]): Baseline durations keyed by step name
+        measured (Mapping[str, float]): Durations measured by this run
+        alpha (float): Weight of the new measurement, between 0 and 1
+
+    Returns:
+        Dict[str, float]: Smoothed durations of the measured steps; steps new
+            to the baseline take their measured duration
+    """
+    return {
+        name: (
+            alpha * duration + (1 - alpha) * baseline[name]
+            if name in baseline
+            else duration
+        )
+        for name, duration in measured.items()
+    }
+
+
+@dataclass(frozen=True)
+class Regression:
+    name: str
+    baseline: float
+    measured: float
+
+    @property
+    def delta(self) -> float:
+        return self.measured - self.baseline
+
+    @property
+    def ratio(self) -> float:
+        """Relative change against the baseline, e.g. 0.25 for 25% slower."""
+        return self.delta / self.baseline if self.baseline > 0 else float("inf")
+
+
+@dataclass(frozen=True)
+class RegressionGate:
+    """Compares measured step durations against a baseline.
+
+    A step regressed when it is slower than its baseline by more than both the
+    relative threshold and the absolute minimum delta; the latter keeps noise
+    in very short steps from failing builds.
+    """
+
+    baseline: Mapping[str, float]
+    max_regression: float = DEFAULT_MAX_REGRESSION
+    min_delta: float = DEFAULT_MIN_DELTA
+
+    def compare(self, measured: Mapping[str, float]) -> List[Regression]:
+        """Changes of every measured step with a baseline, in measured order."""
+        return [
+            Regression(name, self.baseline[name], duration)
+            for name, duration in measured.items()
+            if name in self.baseline
+        ]
+
+    def regressions(self, measured: Mapping[str, float]) -> List[Regression]:
+        """Steps that got slower than the thresholds allow."""
+        return [
+            change
+            for change in self.compare(measured)
+            if change.delta > self.min_delta and change.ratio > self.max_regression
+        ]
@@ -3,8 +3,13 @@ import logging
 import click
 import colorama
 
+from aeternum.command.bench import bench
 from aeternum.command.doctor import doctor
+from aeternum.command.gc import collect_garbage
 from aeternum.command.init import init_new_project
+from aeternum.command.logs import logs
+from aeternum.command.merge import merge_logs
+from aeternum.command.render import render_spec
 from aeternum.command.run import run_scripts
 from aeternum.core.handler import AeternumCliHandler
 from aeternum.core.output import ColorHandler
@@ -51,3 +56,8 @@ def cli(context: click.Context, verbose: int):
 cli.add_command(doctor)
 cli.add_command(run_scripts)
 cli.add_command(init_new_project)
+cli.add_command(merge_logs)
+cli.add_command(collect_garbage)
+cli.add_command(logs)
+cli.add_command(render_spec)
+cli.add_command(bench)
@@ -0,0 +1,21 @@
+"""Callables used by the tests of Python callable steps."""
+import os
+import sys
+
+
+def greet(name: str) -> None:
+    print(f"Hello, {name}")
+
+
+def fail() -> None:
+    raise ValueError("fixture is broken")
+
+
+def exit_with(code: int) -> int:
+    return code
+
+
+def write_descriptors() -> None:
+    os.write(1, b"raw stdout\n")
+    os.write(2, b"raw stderr\n")
+    print(f"worker {os.getpid()}", file=sys.stderr)
@@ -1,10 +1,12 @@
 import logging
+from pathlib import Path
 from typing import Generator, Tuple
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from aeternum.core.output import ColorHandler
+from aeternum.core.templating import SPEC_CACHE_DIR_ENV
 from tests.shared.runner import TestRunner
 
 
@@ -37,5 +39,15 @@ def mock_datetime() -> Generator[MagicMock, None, None]:
 
 @pytest.fixture
 def mock_perf_counter() -> Generator[MagicMock, None, None]:
-    with patch("aeternum.core.models.perf_counter") as mock_datetime:
+    with patch("aeternum.core.runner.perf_counter") as mock_datetime:
         yield mock_datetime
+
+
+@pytest.fixture(autouse=True)
+def spec_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Keep the on-disk spec caches of tests out of the user cache directory."""
+    cache_dir = tmp_path_factory.mktemp("spec-cache")
+    monkeypatch.setenv(SPEC_CACHE_DIR_ENV, str(cache_dir))
+    return cache_dir
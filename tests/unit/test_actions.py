@@ -0,0 +1,85 @@
+import os
+from pathlib import Path
+
+from aeternum.core.actions import template_environment
+from aeternum.core.models import AutomationStep
+
+
+def __action_step(action: str, tmp_path: Path, *args: str, **kwargs) -> AutomationStep:
+    return AutomationStep(
+        name=f"{action} step",
+        category="build",
+        action=action,
+        args=list(args),
+        working_dir=tmp_path,
+        **kwargs,
+    )
+
+
+def __stdout(result) -> str:
+    return "".join(result.output.iter_text("stdout"))
+
+
+def test_copy_tree_and_files(tmp_path: Path) -> None:
+    tree = Path(tmp_path, "src", "pkg")
+    tree.mkdir(parents=True)
+    for index in range(40):
+        Path(tree, f"module_{index}.py").write_text(f"VALUE = {index}\n")
+    os.symlink("module_0.py", Path(tree, "alias.py"))
+    Path(tmp_path, "README.md").write_text("readme\n")
+
+    result = __action_step("copy", tmp_path, "src", "README.md", "dist/").run("sh")
+    assert result.exit_code == 0
+    assert __stdout(result) == "Copied 41 files to dist/\n"
+    assert Path(tmp_path, "dist", "src", "pkg", "module_39.py").read_text() == (
+        "VALUE = 39\n"
+    )
+    assert os.readlink(Path(tmp_path, "dist", "src", "pkg", "alias.py")) == (
+        "module_0.py"
+    )
+    assert Path(tmp_path, "dist", "README.md").exists()
+
+
+def test_move_mkdir_and_remove(tmp_path: Path) -> None:
+    assert (
+        __action_step("mkdir", tmp_path, "build/a", "build/b").run("sh").exit_code == 0
+    )
+    Path(tmp_path, "build", "a", "x.o").write_text("")
+    Path(tmp_path, "build", "a", "y.o").write_text("")
+
+    moved = __action_step("move", tmp_path, "build/a/*.o", "build/b").run("sh")
+    assert moved.exit_code == 0
+    assert sorted(path.name for path in Path(tmp_path, "build", "b").iterdir()) == [
+        "x.o",
+        "y.o",
+    ]
+
+    removed = __action_step("remove", tmp_path, "build", "missing").run("sh")
+    assert removed.exit_code == 0
+    assert not Path(tmp_path, "build").exists()
+
+
+def test_copy_missing_source_fails(tmp_path: Path) -> None:
+    result = __action_step("copy", tmp_path, "missing.txt", "dist").run("sh")
+    assert result.exit_code == 1
+    assert result.stderr == "copy: No such file or directory: 'missing.txt'\n"
+
+
+def test_render_template(tmp_path: Path) -> None:
+    Path(tmp_path, "app.cfg.j2").write_text("port = {{ port }}\nname = {{ name }}\n")
+    step = __action_step(
+        "render",
+        tmp_path,
+        "app.cfg.j2",
+        "conf/app.cfg",
+        params={"port": 8080, "name": "api"},
+    )
+    assert step.command_line == "action:render app.cfg.j2 conf/app.cfg"
+    assert step.run("sh").exit_code == 0
+    assert Path(tmp_path, "conf", "app.cfg").read_text() == "port = 8080\nname = api\n"
+    environment = template_environment(str(tmp_path.resolve()))
+    assert environment.cache is not None and len(environment.cache) == 1
+
+    failed = __action_step("render", tmp_path, "app.cfg.j2", "out.cfg").run("sh")
+    assert failed.exit_code == 1
+    assert "UndefinedError: 'port' is undefined" in failed.stderr
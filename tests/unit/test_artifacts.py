@@ -0,0 +1,134 @@
+import os
+import time
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from aeternum.core.artifacts import ArtifactStore, clone_file
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.models import ProjectSpec
+from aeternum.core.runner import Runner, RunOptions
+from tests.shared.runner import TestRunner, assert_cli_output
+
+SPEC = """name: "artifact-project"
+repo-url: "https://github.com/some-user/artifact-project"
+version: "1.0.0"
+build-stage:
+  strategy:
+    shell: "/bin/sh"
+  steps:
+    - name: "Bundle"
+      category: "build"
+      command: "mkdir -p dist && cat src.txt > dist/bundle.txt && date +%s%N >> runs"
+      inputs: ["src.txt"]
+      outputs: ["dist"]
+"""
+
+
+def test_clone_file(tmp_path: Path):
+    source = Path(tmp_path, "source")
+    source.write_text("content")
+    target = Path(tmp_path, "target")
+
+    assert clone_file(source, target) in ("reflink", "copy")
+    assert target.read_text() == "content"
+    assert os.stat(target).st_nlink == 1
+
+
+def test_artifact_store_save_restore_gc(tmp_path: Path):
+    store = ArtifactStore(Path(tmp_path, "store"))
+    workspace = Path(tmp_path, "workspace")
+    Path(workspace, "dist/bin").mkdir(parents=True)
+    Path(workspace, "dist/app.whl").write_text("wheel")
+    Path(workspace, "dist/copy.whl").write_text("wheel")
+    Path(workspace, "dist/bin/run").write_text("#!/bin/sh")
+    os.chmod(Path(workspace, "dist/bin/run"), 0o755)
+
+    assert store.save("a1", [Path("dist")], workspace, "Bundle") == 3
+    assert store.contains("a1")
+    # Identical files share one object
+    assert len(list(store.objects_dir.glob("*/*"))) == 2
+
+    restored = Path(tmp_path, "restored")
+    assert store.restore("a1", restored) == 3
+    assert Path(restored, "dist/copy.whl").read_text() == "wheel"
+    assert os.access(Path(restored, "dist/bin/run"), os.X_OK)
+    assert store.restore("unknown", restored) is None
+    # Restored files are private copies a later step may write to
+    Path(restored, "dist/app.whl").write_text("patched")
+    assert store.restore("a1", Path(tmp_path, "pristine")) == 3
+    assert Path(tmp_path, "pristine", "dist/app.whl").read_text() == "wheel"
+
+    Path(workspace, "dist/app.whl").write_text("new wheel")
+    Path(workspace, "dist/copy.whl").write_text("new wheel")
+    store.save("a2", [Path("dist")], workspace, "Bundle")
+    record_path = next(store.records_dir.glob("*/a1*.json"))
+    os.utime(record_path, (time.time() - 3600, time.time() - 3600))
+
+    assert store.gc().objects_removed == 0
+    collection = store.gc(max_age=60)
+    assert collection.records_removed == 1
+    assert collection.objects_removed == 1
+    assert not store.contains("a1")
+    assert store.restore("a2", Path(tmp_path, "again")) == 3
+
+
+def test_runner_restores_step_outputs(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    Path(tmp_path, "aeternum.yaml").write_text(SPEC)
+    Path(tmp_path, "src.txt").write_text("v1")
+    project = ProjectSpec.load_from_yaml(Path("aeternum.yaml"))
+    store = ArtifactStore(Path(tmp_path, "store"))
+
+    first = Runner(project).run(RunOptions(artifacts=store))
+    assert first.steps[0].status == StepExecutionStatus.COMPLETED
+    os.unlink(Path(tmp_path, "dist/bundle.txt"))
+
+    second = Runner(project).run(RunOptions(artifacts=store))
+    assert second.steps[0].status == StepExecutionStatus.RESTORED
+    assert (
+        Path(tmp_path, "dist/bundle.txt").read_text() == "v1\n"
+        or Path(tmp_path, "dist/bundle.txt").read_text() == "v1"
+    )
+    assert len(Path(tmp_path, "runs").read_text().splitlines()) == 1
+
+    v1_key = project.build_stage.steps[0].artifact_key("/bin/sh")
+    # Changed inputs invalidate the stored outputs; the step rewrites the
+    # restored files without touching the stored objects
+    Path(tmp_path, "src.txt").write_text("v2")
+    third = Runner(project).run(RunOptions(artifacts=store))
+    assert third.steps[0].status == StepExecutionStatus.COMPLETED
+    assert Path(tmp_path, "dist/bundle.txt").read_text() == "v2"
+    assert store.restore(v1_key, Path(tmp_path, "check")) == 1
+    assert Path(tmp_path, "check", "dist/bundle.txt").read_text() == "v1"
+
+
+def test_runner_skips_outputs_without_inputs(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    Path(tmp_path, "aeternum.yaml").write_text(
+        SPEC.replace('      inputs: ["src.txt"]\n', "")
+    )
+    Path(tmp_path, "src.txt").write_text("v1")
+    project = ProjectSpec.load_from_yaml(Path("aeternum.yaml"))
+    store = ArtifactStore(Path(tmp_path, "store"))
+
+    Runner(project).run(RunOptions(artifacts=store))
+    Path(tmp_path, "src.txt").write_text("v2")
+    second = Runner(project).run(RunOptions(artifacts=store))
+    assert second.steps[0].status == StepExecutionStatus.COMPLETED
+    assert Path(tmp_path, "dist/bundle.txt").read_text() == "v2"
+    assert not list(store.records_dir.glob("*/*.json"))
+
+
+def test_gc_command(tmp_path: Path, runner: TestRunner, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    result = runner.run_cli(["gc"])
+    assert_cli_output(result, ["No artifact store found"])
+
+    store = ArtifactStore(Path(tmp_path, ".aeternum", "artifacts"))
+    Path(tmp_path, "out").write_text("artifact")
+    store.save("k1", [Path("out")], tmp_path)
+    result = runner.run_cli(["gc", "--max-age", "0"])
+    assert_cli_output(
+        result, ["Removed 1 stored step outputs and 1 unreferenced files"]
+    )
@@ -0,0 +1,85 @@
+import csv
+import json
+from pathlib import Path
+
+from pytest import MonkeyPatch, approx, raises
+
+from aeternum.core.bench import StepBenchmark, benchmark_step, format_duration
+from aeternum.core.errors import AeternumRuntimeError
+from aeternum.core.models import AutomationStep
+from tests.shared.file_utils import load_resources_dir
+from tests.shared.runner import TestRunner, assert_cli_output
+
+
+def test_step_benchmark_statistics() -> None:
+    benchmark = StepBenchmark("Build", "make", [1.0, 1.2, 1.1, 0.9, 1.0, 5.0])
+    assert benchmark.runs == 6
+    assert benchmark.mean == approx(1.7)
+    assert benchmark.median == approx(1.05)
+    assert benchmark.min == 0.9
+    assert benchmark.max == 5.0
+    assert benchmark.outliers == [5.0]
+    assert benchmark.to_dict()["outliers"] == 1
+
+    single = StepBenchmark("Build", "make", [2.0])
+    assert (single.stddev, single.outliers) == (0.0, [])
+
+
+def test_format_duration() -> None:
+    assert format_duration(0.0000123) == "12.3us"
+    assert format_duration(0.0123) == "12.30ms"
+    assert format_duration(12.3) == "12.300s"
+
+
+def test_benchmark_step() -> None:
+    step = AutomationStep(name="Echo", category="build", command="echo hi")
+    timed = []
+    benchmark = benchmark_step(
+        step, "/bin/sh", 3, warmup=2, on_run=lambda run, _: timed.append(run)
+    )
+    assert benchmark.runs == 3
+    assert timed == [1, 2, 3]
+    assert all(sample > 0 for sample in benchmark.samples)
+
+    failing = AutomationStep(name="Fail", category="build", command="exit 3")
+    with raises(AeternumRuntimeError, match="exit code 3 during benchmark run 1"):
+        benchmark_step(failing, "/bin/sh", 3)
+
+
+def test_bench_command(
+    tmp_path: Path, runner: TestRunner, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    spec_file = load_resources_dir("valid", "piped.yaml")
+    json_file, csv_file = Path(tmp_path, "bench.json"), Path(tmp_path, "bench.csv")
+
+    result = runner.run_cli(
+        [
+            "bench",
+            "-f",
+            str(spec_file),
+            "--step",
+            "Dump fixture",
+            "--runs",
+            "3",
+            "--warmup",
+            "0",
+            "--export-json",
+            str(json_file),
+            "--export-csv",
+            str(csv_file),
+        ]
+    )
+    assert_cli_output(result, ["Dump fixture", "MEDIAN", "OUTLIERS"])
+    report = json.loads(json_file.read_text())
+    assert report["project"] == "piped-project"
+    assert [len(step["samples"]) for step in report["steps"]] == [3]
+    with open(csv_file, newline="") as file:
+        [row] = list(csv.DictReader(file))
+    assert row["name"] == "Dump fixture"
+    assert row["runs"] == "3"
+
+    result = runner.run_cli(["bench", "-f", str(spec_file), "--step", "Load fixture"])
+    assert result.exit_code == 2
+    result = runner.run_cli(["bench", "-f", str(spec_file), "--step", "Missing"])
+    assert result.exit_code == 2
@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.cache import (
+    CacheStore,
+    atomic_write,
+    parse_size,
+    render_cache_key,
+    store_lock,
+    temp_path_for,
+)
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.models import BuildStage, CacheDirectory, ProjectSpec
+from tests.shared.file_utils import load_resources_dir
+
+
+def __populate(directory: Path, files: dict) -> None:
+    for name, content in files.items():
+        file_path = Path(directory, name)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+
+def test_parse_size():
+    assert parse_size("512") == 512
+    assert parse_size("2K") == 2048
+    assert parse_size("1.5GiB") == 1536 * 1024**2
+    with raises(AeternumInputError):
+        parse_size("lots")
+
+
+def test_render_cache_key(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.setenv("CACHE_EPOCH", "3")
+    Path(tmp_path, "poetry.lock").write_text("content-hash = 1")
+    key = render_cache_key("deps-{platform}-{env:CACHE_EPOCH}-{hash:*.lock}", tmp_path)
+    assert key.startswith(f"deps-{sys.platform}-3-")
+    assert key == render_cache_key(
+        "deps-{platform}-{env:CACHE_EPOCH}-{hash:*.lock}", tmp_path
+    )
+
+    Path(tmp_path, "poetry.lock").write_text("content-hash = 2")
+    assert key != render_cache_key(
+        "deps-{platform}-{env:CACHE_EPOCH}-{hash:*.lock}", tmp_path
+    )
+    with raises(AeternumInputError):
+        render_cache_key("deps-{branch}", tmp_path)
+
+
+def test_cache_store_roundtrip_and_dedup(tmp_path: Path):
+    store = CacheStore(Path(tmp_path, "store"))
+    workspace = Path(tmp_path, "workspace")
+    __populate(workspace, {"venv/lib/a.py": "a" * 4096, "venv/lib/b.py": "b"})
+    os.chmod(Path(workspace, "venv/lib/b.py"), 0o755)
+    os.symlink("lib/a.py", Path(workspace, "venv/link.py"))
+    Path(workspace, "venv/empty").mkdir()
+
+    assert store.save("deps-1", [Path("venv")], workspace) > 0
+    Path(workspace, "venv/lib/b.py").write_text("changed")
+    second_written = store.save("deps-2", [Path("venv")], workspace)
+    # Only the changed file is stored again
+    assert 0 < second_written < 100
+    assert len(list(Path(store.root, "blobs").glob("*/*"))) == 3
+
+    restored = Path(tmp_path, "restored")
+    entry = store.find("deps-3", restore_keys=["deps-"])
+    assert entry is not None
+    assert store.restore(store.find("deps-1"), restored) == 2
+    assert Path(restored, "venv/lib/a.py").read_text() == "a" * 4096
+    assert Path(restored, "venv/lib/b.py").read_text() == "b"
+    assert os.stat(Path(restored, "venv/lib/b.py")).st_mode & 0o777 == 0o755
+    assert os.readlink(Path(restored, "venv/link.py")) == "lib/a.py"
+    assert Path(restored, "venv/empty").is_dir()
+    assert store.find("other", restore_keys=["nothing-"]) is None
+
+
+def test_cache_store_evicts_least_recently_used(tmp_path: Path):
+    store = CacheStore(Path(tmp_path, "store"))
+    workspace = Path(tmp_path, "workspace")
+    for key in ["old", "recent"]:
+        __populate(workspace, {"deps/data.bin": os.urandom(2048).hex()})
+        store.save(key, [Path("deps")], workspace)
+        os.utime(store.find(key).manifest_path, (0, 0) if key == "old" else None)
+
+    store.max_size = store.size() - 1
+    assert store.evict() == ["old"]
+    assert store.find("old") is None
+    assert store.find("recent") is not None
+    assert store.size() <= store.max_size
+
+
+def test_eviction_waits_for_saves_in_progress(tmp_path: Path):
+    store = CacheStore(Path(tmp_path, "store"), max_size=0)
+    workspace = Path(tmp_path, "workspace")
+    __populate(workspace, {"deps/data.bin": "data"})
+    store.save("old", [Path("deps")], workspace)
+    evicted = []
+
+    # A save holds the shared lock until its manifest is written
+    with store_lock(store.root):
+        evictor = threading.Thread(target=lambda: evicted.extend(store.evict()))
+        evictor.start()
+        evictor.join(timeout=0.2)
+        assert evictor.is_alive()
+    evictor.join()
+    assert evicted == ["old"]
+
+
+def test_atomic_write_uses_unique_temp_files(tmp_path: Path):
+    target = Path(tmp_path, "entries", "manifest.json")
+    assert temp_path_for(target) != temp_path_for(target)
+    atomic_write(target, b"{}")
+    assert target.read_bytes() == b"{}"
+    assert os.listdir(target.parent) == ["manifest.json"]
+
+
+@patch("subprocess.run")
+def test_build_restores_and_saves_caches(
+    mock_subproc_run: MagicMock, tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0, "stdout": ""})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    project.build_stage = BuildStage(
+        strategy=project.build_stage.strategy,
+        steps=project.build_stage.steps,
+        caches=[CacheDirectory(name="pip", key="pip-{platform}", paths=[Path("deps")])],
+    )
+    store = CacheStore(Path(tmp_path, "store"))
+    __populate(tmp_path, {"deps/package.py": "print('cached')"})
+
+    project.build(False, True, False, (), (), cache_store=store)
+    assert store.find(f"pip-{sys.platform}") is not None
+
+    Path(tmp_path, "deps/package.py").unlink()
+    project.build(False, True, False, (), (), cache_store=store)
+    assert Path(tmp_path, "deps/package.py").read_text() == "print('cached')"
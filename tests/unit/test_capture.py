@@ -0,0 +1,124 @@
+import gzip
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.capture import (
+    CapturedOutput,
+    OutputSpool,
+    create_run_dir,
+    find_step_output,
+)
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.execution_log import ExecutionLog, ExecutionLogRow
+from aeternum.core.models import AutomationStep
+from tests.shared.runner import TestRunner
+
+
+def test_step_output_spooled_to_disk(tmp_path: Path):
+    step = AutomationStep(
+        name="Chatty",
+        category="build",
+        command="head -c 3000000 /dev/zero | tr '\\0' 'a'; echo; echo oops >&2",
+    )
+    captured = CapturedOutput()
+    result = step.run("/bin/sh", capture=captured)
+
+    assert result.exit_code == 0
+    assert result.stdout == ""
+    assert result.stderr == "oops\n"
+    assert result.output is captured
+    assert captured.size("stdout") == 3000001
+    assert sum(len(text) for text in captured.iter_text("stdout")) == 3000001
+
+    spool = OutputSpool(Path(tmp_path, "runs", "run-1"))
+    output_file = spool.keep(captured, 1, "Chatty")
+    assert output_file.name == "1-chatty.log.gz"
+    with gzip.open(output_file, "rt") as file:
+        lines = file.read().splitlines()
+    assert lines[0] == "==> stdout <=="
+    assert lines[-2:] == ["==> stderr <==", "oops"]
+
+
+def test_captured_output_decodes_across_chunks():
+    captured = CapturedOutput()
+    captured.stdout.write("é".encode("utf-8") * 200000)
+    captured.stderr.write(b"x" * 10000 + b"\nlast line")
+
+    assert "".join(captured.iter_text("stdout")) == "é" * 200000
+    assert captured.tail("stderr", max_bytes=100) == "last line"
+    captured.close()
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 11) or not Path("/proc/self/fd").is_dir(),
+    reason="needs spooled files with the full io interface and /proc",
+)
+def test_small_output_stays_in_memory(tmp_path: Path):
+    spool = OutputSpool(Path(tmp_path, "runs", "run-1"))
+    captured = spool.open()
+    captured.stdout.write(b"built\n")
+    assert captured.size("stdout") == 6
+    assert not captured.stdout._rolled  # type: ignore[attr-defined]
+
+    captured.stderr.write(b"x" * (2 * 1024 * 1024))
+    assert captured.tail("stderr", max_bytes=10) == "x" * 10
+    spilled = os.readlink(f"/proc/self/fd/{captured.stderr.fileno()}")
+    assert spilled.startswith(str(spool.directory))
+    captured.close()
+
+
+def test_run_dirs_are_unique(tmp_path: Path):
+    first = create_run_dir("2024-08-01_12-34-56", tmp_path)
+    second = create_run_dir("2024-08-01_12-34-56", tmp_path)
+    assert first.name == "2024-08-01_12-34-56"
+    assert second.name == "2024-08-01_12-34-56-2"
+    assert first.is_dir() and second.is_dir()
+
+
+def test_find_step_output(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    spool = OutputSpool(Path(".aeternum", "runs", "2024-08-01_12-34-56"), False)
+    captured = CapturedOutput()
+    captured.stdout.write(b"built\n")
+    output_file = spool.keep(captured, 2, "Build Wheel")
+
+    assert find_step_output("2024-08-01_12-34-56", "2") == output_file
+    assert find_step_output("2024-08-01_12-34-56", "Build Wheel") == output_file
+    with raises(AeternumInputError):
+        find_step_output("2024-08-01_12-34-56", "3")
+    with raises(AeternumInputError):
+        find_step_output("missing-run", "2")
+
+    log_file = Path(tmp_path, "aeternum-execution.log")
+    ExecutionLog(
+        project="test-project",
+        version="0.1.0",
+        shell="/bin/sh",
+        duration=1.0,
+        dry_run=False,
+        rows=[ExecutionLogRow(2, "Build Wheel", "make", "COMPLETED")],
+        outputs={2: str(output_file)},
+    ).write(log_file)
+    assert find_step_output(str(log_file), "Build Wheel") == output_file
+
+
+def test_logs_show_command(
+    tmp_path: Path, runner: TestRunner, monkeypatch: MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    spool = OutputSpool(Path(".aeternum", "runs", "run-1"))
+    captured = CapturedOutput()
+    captured.stdout.write(b"compiled 12 files\n")
+    spool.keep(captured, 1, "Compile")
+
+    result = runner.run_cli(["logs", "show", "run-1", "Compile"])
+    assert result.exit_code == 0
+    assert result.stdout == "==> stdout <==\ncompiled 12 files\n==> stderr <==\n"
+
+    result = runner.run_cli(["logs", "show", "run-1", "Link"])
+    assert result.exit_code == 2
+    assert "No captured output of step 'Link'" in result.stderr
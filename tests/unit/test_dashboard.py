@@ -0,0 +1,117 @@
+import io
+from pathlib import Path
+from typing import List
+
+from pytest import CaptureFixture, MonkeyPatch
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.dashboard import LiveDashboard
+from aeternum.core.models import ProjectSpec, StepExecutionResult
+from aeternum.core.plan import PlannedStep
+from aeternum.core.runner import (
+    Runner,
+    RunnerEvent,
+    RunOptions,
+    StepFinished,
+    StepOutcome,
+    StepOutput,
+    StepStarted,
+)
+
+SPEC = """name: "dashboard-project"
+repo-url: "https://github.com/some-user/dashboard-project"
+version: "1.0.0"
+build-stage:
+  strategy:
+    shell: "/bin/sh"
+  steps:
+    - name: "Greet"
+      command: "printf"
+      args: ["'hello\\\\nworld\\\\n'"]
+      category: "build"
+"""
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def __planned_step() -> PlannedStep:
+    return PlannedStep(1, "Compile", "build", "make", ".", True, "selected")
+
+
+def __finished(planned: PlannedStep, status: str) -> StepFinished:
+    result = StepExecutionResult(planned.name, planned.command, "", "boom", 1, 0.25)
+    outcome = StepOutcome(1, planned.name, planned.command, status, result)
+    return StepFinished(planned, outcome)
+
+
+def test_dashboard_plain_output_without_terminal() -> None:
+    stream = io.StringIO()
+    dashboard = LiveDashboard(stream=stream)
+    planned = __planned_step()
+
+    dashboard(StepStarted(planned, 1, False))
+    dashboard(StepOutput(planned, "stdout", "compiling"))
+    dashboard(__finished(planned, StepExecutionStatus.FAILED))
+    dashboard.close()
+
+    lines = stream.getvalue().splitlines()
+    assert not dashboard.live
+    assert lines[0] == "[Compile] compiling"
+    assert "FAILED" in lines[1] and lines[1].endswith("in 0.25s")
+    assert lines[2] == "[Compile] boom"
+
+
+def test_dashboard_live_region_on_terminal() -> None:
+    stream = FakeTerminal()
+    dashboard = LiveDashboard(stream=stream, frame_rate=1000.0)
+    planned = __planned_step()
+
+    dashboard(StepStarted(planned, 1, False))
+    dashboard(StepOutput(planned, "stdout", "linking"))
+    dashboard.render_frame()
+    frame = stream.getvalue()
+    assert "[Compile] linking\n" in frame
+    assert "Compile" in frame.rsplit("[Compile] linking\n", 1)[1]
+
+    dashboard(__finished(planned, StepExecutionStatus.COMPLETED))
+    dashboard.close()
+    final_frame = stream.getvalue()[len(frame) :]
+    # The one-line running region is erased before completed lines scroll
+    assert final_frame.startswith("\x1b[1F\x1b[J")
+    assert "COMPLETED" in final_frame
+
+
+def test_dashboard_quiet_output_hides_step_output() -> None:
+    stream = io.StringIO()
+    dashboard = LiveDashboard(quiet_output=True, stream=stream)
+    planned = __planned_step()
+
+    dashboard(StepStarted(planned, 1, False))
+    dashboard(StepOutput(planned, "stdout", "compiling"))
+    assert stream.getvalue() == ""
+
+
+def test_runner_streams_step_output(
+    tmp_path: Path, capsys: CaptureFixture, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    spec_file = Path(tmp_path, "aeternum.yaml")
+    spec_file.write_text(SPEC)
+    project = ProjectSpec.load_from_yaml(spec_file)
+    events: List[RunnerEvent] = []
+
+    result = Runner(project, listeners=[events.append]).run(
+        RunOptions(stream_output=True)
+    )
+    assert result.succeeded
+    assert [
+        (event.stream, event.line) for event in events if isinstance(event, StepOutput)
+    ] == [("stdout", "hello"), ("stdout", "world")]
+
+    project.build(False, False, False, (), (), dashboard=True)
+    captured = capsys.readouterr()
+    assert "[Greet] hello\n[Greet] world\n" in captured.out
+    assert "Ran 1 automation steps" in captured.out
@@ -1,12 +1,23 @@
+import json
 import os
 import shutil
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List
 from unittest.mock import MagicMock, Mock, patch
 
 from pytest import MonkeyPatch, raises
 from pytest_mock import MockerFixture
 
 from aeternum.command.doctor import ExpectedBinary, ExpectedFile, validate_requirements
+from aeternum.core.errors import ExitCode
+from aeternum.core.requirements import (
+    AeternumRequirement,
+    RequirementCache,
+    check_workspaces,
+    default_requirements,
+    discover_workspaces,
+)
 from tests.shared.file_utils import load_resources_dir
 from tests.shared.runner import TestRunner, assert_cli_output
 
@@ -34,11 +45,12 @@ def test_doctor_success(
     valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
     shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
 
-    unsuccessful_subprocess_exec = __new_mock_subprocess("git", 0, "true")
-    mock_subproc_run.side_effect = [unsuccessful_subprocess_exec]
+    mock_subproc_run.return_value = __new_mock_subprocess("git", 0, "true")
 
     result = runner.run_cli(["doctor"])
     assert_cli_output(result, ["All dependencies ready"])
+    # The Git binary and the Git repository are checked separately
+    assert mock_subproc_run.call_count == 2
 
 
 @patch("subprocess.run")
@@ -107,3 +119,163 @@ def test_validate_requirements_invalid_input():
     mock_requirements = ["some requirement"]
     with raises(TypeError):
         _ = validate_requirements(mock_requirements)
+
+
+def test_incomplete_requirement_cannot_be_created():
+    @dataclass
+    class ExpectedNothing(AeternumRequirement):
+        def probe(self, workspace: Path) -> bool:
+            return True
+
+    with raises(TypeError, match="fingerprint"):
+        ExpectedNothing("Nothing", "None", "Nothing to do")
+
+
+def __new_workspace(root: Path, name: str, git: bool = True) -> Path:
+    workspace = Path(root, name)
+    os.makedirs(workspace)
+    shutil.copy(load_resources_dir("valid", "aeternum.yaml"), workspace)
+    if git:
+        os.makedirs(Path(workspace, ".git"))
+    return workspace
+
+
+def test_discover_workspaces(tmp_path: Path) -> None:
+    __new_workspace(tmp_path, "service-a")
+    __new_workspace(tmp_path, "libs/service-b")
+    __new_workspace(tmp_path, "node_modules/vendored")
+    __new_workspace(tmp_path, ".cache/copy")
+    os.makedirs(Path(tmp_path, "empty"))
+
+    workspaces = discover_workspaces(tmp_path)
+    assert workspaces == [
+        Path(tmp_path, "libs", "service-b"),
+        Path(tmp_path, "service-a"),
+    ]
+
+
+@patch("subprocess.run")
+def test_check_workspaces_probes_global_binaries_once(
+    mock_subproc_run: MagicMock, tmp_path: Path
+) -> None:
+    mock_subproc_run.return_value = __new_mock_subprocess("bin", 0, "true")
+    workspaces = [__new_workspace(tmp_path, f"service-{i}") for i in range(5)]
+
+    def requirements(spec_file: str) -> List[AeternumRequirement]:
+        return [
+            *default_requirements(spec_file),
+            ExpectedBinary("Docker", "Cannot build images", "Install it", "docker"),
+        ]
+
+    # The Git binary is probed once per host, the repository once per workspace
+    report = check_workspaces(workspaces, jobs=4)
+    assert mock_subproc_run.call_count == 6
+    assert report.probes == 11
+    assert len(report.statuses) == 15
+
+    mock_subproc_run.reset_mock()
+    report = check_workspaces(workspaces, jobs=4, requirements=requirements)
+    # Docker is probed once per host as well
+    assert mock_subproc_run.call_count == 7
+    assert report.probes == 12
+    assert len(report.statuses) == 20
+    assert not report.failures
+
+
+@patch("subprocess.run")
+def test_doctor_recursive(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests the aggregated report of aeternum doctor --recursive."""
+    monkeypatch.chdir(tmp_path)
+    __new_workspace(tmp_path, "service-a")
+    __new_workspace(tmp_path, "service-b")
+
+    def git_check(*args, **kwargs) -> Mock:
+        if kwargs["args"][-1].endswith("--version"):
+            return __new_mock_subprocess("git", 0, "git version 2.45.0")
+        in_repo = kwargs.get("cwd") is not None and "service-a" in str(kwargs["cwd"])
+        return __new_mock_subprocess("git", 0 if in_repo else 128, "not a repo")
+
+    mock_subproc_run.side_effect = git_check
+    result = runner.run_cli(["doctor", "--recursive", ".", "--jobs", "2"])
+    assert result.exit_code == 0
+    assert_cli_output(
+        result, ["service-a", "service-b", "Git", "fixes needed in 1 of 2 workspaces"]
+    )
+
+    result = runner.run_cli(["doctor", "-r", ".", "--format", "json"])
+    report = json.loads(result.output)
+    assert [workspace["ready"] for workspace in report["workspaces"]] == [True, False]
+    assert report["failures"] == 1
+
+
+@patch("subprocess.run")
+def test_requirement_cache(
+    mock_subproc_run: MagicMock, tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    mock_subproc_run.return_value = __new_mock_subprocess("bin", 0, "true")
+    monkeypatch.setenv("PATH", str(tmp_path))
+    requirement = ExpectedBinary("Tool", "Cannot build", "Install it", "tool")
+
+    def probe(refresh: bool = False, ttl: float = 60) -> bool:
+        cache = RequirementCache(Path(tmp_path, "doctor.json"), ttl)
+        ready = cache.probe(requirement, tmp_path, refresh)
+        cache.save()
+        return ready
+
+    assert probe()
+    assert probe()
+    assert mock_subproc_run.call_count == 1
+
+    # Installing the binary changes the fingerprint
+    Path(tmp_path, "tool").touch(mode=0o755)
+    assert probe()
+    assert mock_subproc_run.call_count == 2
+
+    # So does another PATH
+    monkeypatch.setenv("PATH", f"{tmp_path}:/nonexistent")
+    assert probe()
+    assert mock_subproc_run.call_count == 3
+
+    assert probe(refresh=True)
+    assert probe(ttl=0)
+    assert mock_subproc_run.call_count == 5
+
+
+def test_requirement_cache_file_fingerprint(tmp_path: Path) -> None:
+    cache = RequirementCache(Path(tmp_path, "doctor.json"))
+    requirement = ExpectedFile("Spec", "Cannot build", "Create it", "aeternum.yaml")
+    assert not cache.probe(requirement, tmp_path)
+    Path(tmp_path, "aeternum.yaml").touch()
+    assert cache.probe(requirement, tmp_path)
+
+
+@patch("subprocess.run")
+def test_run_preflight(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests that aeternum run --preflight fails early in a broken workspace."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(load_resources_dir("valid", "aeternum.yaml"), tmp_path)
+    mock_subproc_run.return_value = __new_mock_subprocess("git", 128, "no repo")
+
+    result = runner.run_cli(["run", "--preflight", "--dry-run"])
+    assert result.exit_code == ExitCode.VALIDATION_ERROR
+    # The Git binary and the repository
+    assert mock_subproc_run.call_count == 2
+    assert Path(tmp_path, ".aeternum", "doctor.json").is_file()
+
+    # The cached failure is reused until --refresh
+    mock_subproc_run.return_value = __new_mock_subprocess("git", 0, "true")
+    result = runner.run_cli(["run", "--preflight", "--dry-run"])
+    assert result.exit_code == ExitCode.VALIDATION_ERROR
+    result = runner.run_cli(["run", "--preflight", "--refresh", "--dry-run"])
+    assert result.exit_code == 0
+    assert mock_subproc_run.call_count == 4
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+from pytest import raises
+
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.execution_log import (
+    ExecutionLog,
+    ExecutionLogRow,
+    merge_execution_logs,
+)
+from tests.shared.file_utils import assert_file_content, load_resources_dir
+from tests.shared.runner import TestRunner, assert_cli_output
+
+
+def __shard_log(shard: str, duration: float, statuses: list) -> ExecutionLog:
+    return ExecutionLog(
+        project="test-project",
+        version="0.1.0",
+        shell="/bin/bash",
+        duration=duration,
+        dry_run=False,
+        rows=[
+            ExecutionLogRow(idx, f"Step {idx}", f"make step{idx}", status)
+            for idx, status in enumerate(statuses, start=1)
+        ],
+        shard=shard,
+    )
+
+
+def test_execution_log_round_trip(tmp_path: Path) -> None:
+    for reference in ["successful_output.log", "failed_step.log", "dry_run.log"]:
+        ref_log_file = load_resources_dir("references", reference)
+        execution_log = ExecutionLog.load(ref_log_file)
+        generated_log_file = Path(tmp_path, reference)
+        execution_log.write(generated_log_file)
+        assert_file_content(generated_log_file, ref_log_file)
+
+
+def test_execution_log_invalid_file(tmp_path: Path) -> None:
+    invalid_log = Path(tmp_path, "invalid.log")
+    invalid_log.write_text("Some random text\n")
+    with raises(AeternumInputError):
+        _ = ExecutionLog.load(invalid_log)
+
+
+def test_execution_log_resource_usage(tmp_path: Path) -> None:
+    execution_log = __shard_log("1/2", 4.0, ["COMPLETED", "EXCLUDED", "COMPLETED"])
+    execution_log.resources = {3: "cpu 95% (peak 180%), rss 1.2GiB"}
+    execution_log.outputs = {3: "step_3.out.gz"}
+    log_file = Path(tmp_path, "execution.log")
+    execution_log.write(log_file)
+
+    loaded = ExecutionLog.load(log_file)
+    assert loaded.resources == execution_log.resources
+    assert loaded.outputs == execution_log.outputs
+    assert len(loaded.rows) == 3
+    merged = merge_execution_logs(
+        [loaded, __shard_log("2/2", 6.0, ["EXCLUDED", "COMPLETED", "EXCLUDED"])]
+    )
+    assert merged.resources == execution_log.resources
+
+
+def test_merge_execution_logs() -> None:
+    merged = merge_execution_logs(
+        [
+            __shard_log("1/2", 4.0, ["COMPLETED", "EXCLUDED", "FAILED"]),
+            __shard_log("2/2", 6.0, ["EXCLUDED", "COMPLETED", "EXCLUDED"]),
+        ]
+    )
+    assert merged.shard == "1/2, 2/2"
+    assert merged.duration == 6.0
+    assert [row.status for row in merged.rows] == ["COMPLETED", "COMPLETED", "FAILED"]
+    assert merged.status_counts() == {"COMPLETED": 2, "FAILED": 1, "SKIPPED": 0}
+
+
+def test_merge_execution_logs_different_projects() -> None:
+    other_project = __shard_log("2/2", 1.0, ["COMPLETED"])
+    other_project.project = "other-project"
+    with raises(AeternumInputError):
+        _ = merge_execution_logs([__shard_log("1/2", 1.0, []), other_project])
+
+
+def test_merge_logs_command(
+    tmp_path: Path,
+    runner: TestRunner,
+) -> None:
+    """Tests aeternum merge-logs writing a combined report."""
+    log_files = []
+    for shard, statuses in [
+        ("1/2", ["COMPLETED", "EXCLUDED"]),
+        ("2/2", ["EXCLUDED", "COMPLETED"]),
+    ]:
+        log_file = Path(tmp_path, f"shard-{shard[0]}.log")
+        __shard_log(shard, 1.0, statuses).write(log_file)
+        log_files.append(str(log_file))
+    merged_file = Path(tmp_path, "merged.log")
+
+    result = runner.run_cli(["merge-logs", *log_files, "-o", str(merged_file)])
+    assert_cli_output(result, ["Merged execution log saved to"])
+    merged = ExecutionLog.load(merged_file)
+    assert merged.status_counts()["COMPLETED"] == 2
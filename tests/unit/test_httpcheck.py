@@ -0,0 +1,98 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Generator
+
+import pytest
+from pydantic import ValidationError
+
+from aeternum.core.httpcheck import percentile
+from aeternum.core.models import AutomationStep, HttpCheck
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Remaining failures of /warming-up before it reports ready
+    warming_up: Dict[str, int] = {}
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self.__reply(200, b'{"status": "ok"}')
+        elif self.path == "/warming-up":
+            remaining = self.warming_up.get(self.path, 0)
+            self.warming_up[self.path] = remaining - 1
+            self.__reply(503 if remaining > 0 else 200, b"ready")
+        else:
+            self.__reply(500, b"broken")
+
+    def __reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Generator[str, None, None]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def __check_step(**check) -> AutomationStep:
+    return AutomationStep(
+        name="Smoke test", category="deploy", http_check=HttpCheck(**check)
+    )
+
+
+def test_http_check_waits_for_endpoints(stub_server: str) -> None:
+    StubHandler.warming_up["/warming-up"] = 2
+    step = __check_step(
+        endpoints=[
+            {"url": f"{stub_server}/health", "body": '"status": "ok"'},
+            f"{stub_server}/warming-up",
+        ],
+        interval=0.01,
+        deadline=10,
+    )
+    result = step.run("sh")
+    assert result.exit_code == 0
+    report = "".join(result.output.iter_text("stdout")).splitlines()
+    assert report[0].split() == ["URL", "STATUS", "ATTEMPTS", "P50", "P90", "P99"]
+    assert report[2].split()[:3] == [f"{stub_server}/health", "OK", "1"]
+    assert report[3].split()[:3] == [f"{stub_server}/warming-up", "OK", "3"]
+    assert result.latency.requests == 4
+    assert result.latency.p50 <= result.latency.p90 <= result.latency.p99
+    assert result.latency.describe().endswith("over 4 requests")
+
+
+def test_http_check_needs_endpoints() -> None:
+    with pytest.raises(ValidationError):
+        HttpCheck(endpoints=[])
+
+
+def test_http_check_deadline(stub_server: str) -> None:
+    step = __check_step(
+        endpoints=[{"url": f"{stub_server}/broken"}, {"url": f"{stub_server}/health"}],
+        interval=0.01,
+        deadline=0.2,
+    )
+    result = step.run("sh")
+    assert result.exit_code == 1
+    assert result.stderr.startswith(
+        f"{stub_server}/broken: status 500, expected 200 after "
+    )
+    assert step.command_line == (
+        f"http_check {stub_server}/broken {stub_server}/health"
+    )
+
+
+def test_percentile() -> None:
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert percentile(values, 0.5) == 0.3
+    assert percentile(values, 0.9) == 0.5
+    assert percentile([0.7], 0.99) == 0.7
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.jobserver import JobServer
+
+
+def test_create_pipe_jobserver_tokens() -> None:
+    with JobServer.create(jobs=3) as jobserver:
+        assert jobserver.owner
+        assert jobserver.pass_fds == (jobserver.read_fd, jobserver.write_fd)
+        assert (
+            f"--jobserver-auth={jobserver.read_fd},{jobserver.write_fd}"
+            in jobserver.makeflags
+        )
+        assert "-j3" in jobserver.makeflags
+        jobserver.acquire()
+        jobserver.acquire()
+        os.set_blocking(jobserver.read_fd, False)
+        with raises(BlockingIOError):
+            os.read(jobserver.read_fd, 1)
+        os.set_blocking(jobserver.read_fd, True)
+        jobserver.release()
+        with jobserver.token():
+            pass
+
+
+def test_create_fifo_jobserver() -> None:
+    jobserver = JobServer.create(jobs=2, use_fifo=True)
+    fifo_path = jobserver.fifo_path
+    assert fifo_path.exists()
+    assert jobserver.pass_fds == ()
+    assert f"--jobserver-auth=fifo:{fifo_path}" in jobserver.makeflags
+    jobserver.close()
+    assert not fifo_path.exists()
+
+
+def test_create_jobserver_invalid_jobs() -> None:
+    with raises(AeternumInputError):
+        _ = JobServer.create(jobs=0)
+
+
+def test_join_jobserver_from_makeflags() -> None:
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"+")
+    makeflags = f" -j4 --jobserver-auth={read_fd},{write_fd}"
+    jobserver = JobServer.from_makeflags(makeflags)
+    assert jobserver is not None
+    assert not jobserver.owner
+    assert jobserver.jobs == 4
+    assert jobserver.makeflags == makeflags
+    with jobserver.token():
+        assert jobserver.child_env({})["MAKEFLAGS"] == makeflags
+    jobserver.close()
+    assert os.read(read_fd, 1) == b"+", "Inherited pipe should stay open"
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+def test_join_jobserver_unusable_makeflags() -> None:
+    assert JobServer.from_makeflags(None) is None
+    assert JobServer.from_makeflags("-k") is None
+    assert JobServer.from_makeflags("-j4 --jobserver-auth=998,999") is None
+
+
+def test_jobserver_from_environment(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.delenv("MAKEFLAGS", raising=False)
+    assert JobServer.from_environment() is None
+    with JobServer.from_environment(jobs=2) as jobserver:
+        assert jobserver.owner
+        assert jobserver.jobs == 2
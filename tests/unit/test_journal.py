@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.errors import AeternumRuntimeError
+from aeternum.core.journal import journal_path, read_journal, resumable_steps
+from aeternum.core.models import ProjectSpec
+from aeternum.core.runner import Runner, RunOptions
+from tests.shared.file_utils import load_resources_dir
+
+
+def __new_mock_subprocess(exit_code: int) -> Mock:
+    value = Mock()
+    value.configure_mock(**{"returncode": exit_code, "stdout": "", "stderr": ""})
+    return value
+
+
+def test_journal_ignores_torn_entry(tmp_path: Path):
+    journal_file = Path(tmp_path, "journal.jsonl")
+    entries = [
+        {"event": "start", "version": 1, "project": "test-project"},
+        {"event": "step", "index": 1, "name": "Lint", "status": "COMPLETED"},
+        {"event": "step", "index": 2, "name": "Compile", "status": "FAILED"},
+    ]
+    journal_file.write_text(
+        "".join(f"{json.dumps(entry)}\n" for entry in entries) + '{"event": "st'
+    )
+
+    assert read_journal(journal_file) == entries
+    assert resumable_steps(journal_file) == {1: "Lint"}
+    assert resumable_steps(Path(tmp_path, "missing.jsonl")) == {}
+
+
+@patch("subprocess.run")
+def test_resume_skips_completed_steps(
+    mock_subproc_run: MagicMock, tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "keep_going.yaml"))
+    journal_file = journal_path(project.spec_hash)
+    assert journal_file.parent == Path(".aeternum", "journal")
+
+    mock_subproc_run.side_effect = [
+        __new_mock_subprocess(0),
+        __new_mock_subprocess(0),
+        __new_mock_subprocess(1),
+    ]
+    with raises(AeternumRuntimeError):
+        project.build(False, True, False, (), (), keep_going=False)
+    assert resumable_steps(journal_file) == {1: "Lint", 2: "Compile"}
+
+    mock_subproc_run.reset_mock()
+    mock_subproc_run.side_effect = [__new_mock_subprocess(0)] * 2
+    project.build(False, True, False, (), (), resume=True)
+    assert mock_subproc_run.call_count == 2
+    entries = read_journal(journal_file)
+    assert [entry.get("status") for entry in entries[1:-1]] == [
+        StepExecutionStatus.RESUMED,
+        StepExecutionStatus.RESUMED,
+        StepExecutionStatus.COMPLETED,
+        StepExecutionStatus.COMPLETED,
+    ]
+    assert entries[-1] == {"event": "end", "succeeded": True}
+    assert resumable_steps(journal_file) == {}
+
+    mock_subproc_run.reset_mock()
+    mock_subproc_run.side_effect = [__new_mock_subprocess(0)] * 4
+    result = Runner(project).run(RunOptions(resumed=frozenset({1}), dry_run=True))
+    assert mock_subproc_run.call_count == 0
+    assert result.steps[0].status == StepExecutionStatus.NOT_EXECUTED
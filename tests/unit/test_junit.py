@@ -0,0 +1,104 @@
+import json
+import os
+from pathlib import Path
+
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.errors import AeternumRuntimeError, AeternumValidationError
+from aeternum.core.execution_log import ExecutionLog
+from aeternum.core.junit import (
+    duration_history_path,
+    find_reports,
+    iter_test_cases,
+    load_duration_history,
+    parse_reports,
+    record_test_durations,
+)
+from aeternum.core.models import AutomationStep, ProjectSpec
+from aeternum.core.runner import Runner
+from tests.shared.file_utils import load_resources_dir
+
+
+def test_iter_test_cases() -> None:
+    cases = list(iter_test_cases(load_resources_dir("junit", "report.xml")))
+    assert [(case.test_id, case.status) for case in cases] == [
+        ("tests.test_api.test_get", "passed"),
+        ("tests.test_api.test_post", "failed"),
+        ("tests.test_api.test_delete", "error"),
+        ("tests.test_api.test_patch", "skipped"),
+        ("tests.test_models.test_user", "passed"),
+    ]
+    assert cases[1].message == "assert 500 == 201"
+    assert cases[1].time == 1.0
+
+
+def test_parse_reports(tmp_path: Path) -> None:
+    report = load_resources_dir("junit", "report.xml")
+    invalid_report = Path(tmp_path, "invalid.xml")
+    invalid_report.write_text("<testsuite><testcase")
+
+    summary = parse_reports([report, report, invalid_report])
+    assert summary.reports == 2
+    assert (summary.tests, summary.passed, summary.failures) == (10, 4, 2)
+    assert (summary.errors, summary.skipped) == (2, 2)
+    assert summary.durations["tests.test_api.test_post"] == 1.0
+    assert summary.describe() == "10 tests: 4 passed, 2 failed, 2 errors, 2 skipped"
+    assert summary.describe_failures().endswith(
+        "failed: tests.test_api.test_post, tests.test_api.test_delete, "
+        + "tests.test_api.test_post, tests.test_api.test_delete"
+    )
+
+
+def test_find_reports_ignores_stale_reports(tmp_path: Path) -> None:
+    Path(tmp_path, "reports").mkdir()
+    stale = Path(tmp_path, "reports", "stale.xml")
+    fresh = Path(tmp_path, "reports", "fresh.xml")
+    stale.touch()
+    fresh.touch()
+    os.utime(stale, (1000, 1000))
+
+    assert find_reports(["reports/*.xml", "reports/fresh.xml"], tmp_path) == [
+        fresh,
+        stale,
+    ]
+    assert find_reports(["reports/*.xml"], tmp_path, since=2000) == [fresh]
+
+
+def test_record_test_durations(tmp_path: Path) -> None:
+    history_file = duration_history_path("Unit tests: API", tmp_path)
+    assert history_file == Path(tmp_path, "tests", "Unit_tests_API.json")
+    for run in range(4):
+        record_test_durations(
+            history_file, {"test_a": float(run), f"test_{run}": 1.0}, keep=3
+        )
+
+    history = load_duration_history(history_file)
+    assert history["test_a"] == [1.0, 2.0, 3.0]
+    assert history["test_0"] == [1.0]
+    assert json.loads(history_file.read_text())["runs"] == 4
+
+
+def test_junit_only_for_test_steps() -> None:
+    with raises(AeternumValidationError):
+        AutomationStep(name="Build", category="build", command="make", junit=["*.xml"])
+
+
+def test_runner_attaches_test_results(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("JUNIT_FIXTURE", str(load_resources_dir("junit", "report.xml")))
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "junit.yaml"))
+
+    result = Runner(project).run()
+    [(record, summary)] = result.steps.test_summaries()
+    assert record.name == "Unit tests"
+    assert (summary.tests, summary.failures, summary.errors) == (5, 1, 1)
+    # Only the aggregate outlives the step; durations go to the history
+    assert summary.durations == {}
+
+    with raises(AeternumRuntimeError):
+        project.build(False, True, True, (), ())
+    history = load_duration_history(duration_history_path("Unit tests"))
+    assert history["tests.test_api.test_get"] == [0.25]
+    [log_file] = Path(tmp_path).glob("aeternum-execution_*.log")
+    execution_log = ExecutionLog.load(log_file)
+    assert execution_log.tests[1].startswith("5 tests: 2 passed, 1 failed")
@@ -72,3 +72,32 @@ def test_automation_step_invalid():
         _ = AutomationStep(
             name="Something", category="random", command="python3", args=["app.py"]
         )
+
+
+def test_build_stage_unknown_dependency():
+    steps = [
+        AutomationStep(name="Compile", category="build", command="make"),
+        AutomationStep(
+            name="Unit tests", category="test", command="pytest", depends_on=["Lint"]
+        ),
+    ]
+    build_stage = BuildStage(strategy=AutomationStrategy(), steps=steps)
+    with raises(AeternumInputError, match="depends on unknown step 'Lint'"):
+        build_stage.validate()
+
+
+def test_failure_policy_keep_going():
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "keep_going.yaml"))
+    assert project.build_stage.strategy.keep_going
+    assert not AutomationStrategy().keep_going
+
+
+def test_build_stage_stdin_from_must_follow_producer():
+    steps = [
+        AutomationStep(name="Dump", category="build", command="pg_dump"),
+        AutomationStep(name="Lint", category="build", command="flake8"),
+        AutomationStep(name="Load", category="test", command="psql", stdin_from="Dump"),
+    ]
+    build_stage = BuildStage(strategy=AutomationStrategy(), steps=steps)
+    with raises(AeternumInputError, match="not the step right before it"):
+        build_stage.validate()
@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from aeternum.core.models import ProjectSpec
+from aeternum.core.plan import ExecutionPlan, PlanCache
+from aeternum.core.sharding import ShardSpec
+from tests.shared.file_utils import load_resources_dir
+
+
+def test_plan_filter_decisions():
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    plan = project.plan(exclude_filters=("test",))
+
+    assert plan.project == "test-project"
+    assert [step.command for step in plan.steps] == ["pip list", "pytest -v"]
+    assert [step.selected for step in plan.steps] == [True, False]
+    assert [step.reason for step in plan.steps] == ["selected", "excluded"]
+    assert plan.selected_steps == plan.steps[:1]
+
+
+def test_plan_with_shard():
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    first_shard = project.plan(shard=ShardSpec(1, 2))
+    second_shard = project.plan(shard=ShardSpec(2, 2))
+
+    assert len(first_shard.selected_steps) == 1
+    assert len(second_shard.selected_steps) == 1
+    assert first_shard.selected_steps[0].name != second_shard.selected_steps[0].name
+    assert second_shard.shard == "2/2"
+
+
+def test_plan_is_memoized():
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    assert project.plan(("build",), ()) is project.plan(("build",), ())
+    assert project.plan(("build",), ()) is not project.plan(("test",), ())
+
+
+def test_plan_json_round_trip():
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    plan = project.plan(include_filters=("build",))
+    restored = ExecutionPlan.from_dict(json.loads(plan.to_json()))
+    assert restored == plan
+
+
+def test_plan_cache(tmp_path: Path):
+    cache = PlanCache(Path(tmp_path, "plans"))
+    key = PlanCache.key(b"name: project", ("build",), ())
+    assert key != PlanCache.key(b"name: project", ("test",), ())
+    assert key != PlanCache.key(b"name: other-project", ("build",), ())
+    assert cache.get(key) is None
+    cache.put(key, '{"steps": []}')
+    assert cache.get(key) == '{"steps": []}'
@@ -0,0 +1,86 @@
+import os
+import sys
+from pathlib import Path
+
+from pytest import MonkeyPatch, raises
+
+from aeternum.core.capture import CapturedOutput
+from aeternum.core.errors import AeternumValidationError
+from aeternum.core.models import AutomationStep
+from aeternum.core.pystep import PythonWorker, call_in_process
+
+
+def __python_step(reference: str, **kwargs) -> AutomationStep:
+    return AutomationStep(
+        name="Python step",
+        category="build",
+        python=f"tests.shared.python_steps:{reference}",
+        **kwargs,
+    )
+
+
+def test_python_step_runs_in_process() -> None:
+    step = __python_step("greet", params={"name": "Ada"})
+    result = step.run("/bin/sh")
+    assert result.exit_code == 0
+    assert result.command_executed == "python:tests.shared.python_steps:greet"
+    assert "".join(result.output.iter_text("stdout")) == "Hello, Ada\n"
+
+
+def test_python_step_failures() -> None:
+    result = __python_step("fail").run("/bin/sh")
+    assert result.exit_code == 1
+    assert "ValueError: fixture is broken" in result.stderr
+    assert __python_step("exit_with", params={"code": 7}).run("/bin/sh").exit_code == 7
+    missing = AutomationStep(
+        name="Missing", category="build", python="tests.shared.missing:main"
+    ).run("/bin/sh")
+    assert missing.exit_code == 1
+    assert "ModuleNotFoundError" in missing.stderr
+
+
+def test_isolated_python_steps_share_worker() -> None:
+    step = __python_step("write_descriptors", isolated=True)
+    worker = PythonWorker()
+    try:
+        first = step.run("/bin/sh", capture=CapturedOutput(), worker=worker)
+        second = step.run("/bin/sh", capture=CapturedOutput(), worker=worker)
+    finally:
+        worker.close()
+    assert first.exit_code == second.exit_code == 0
+    assert "".join(first.output.iter_text("stdout")) == "raw stdout\n"
+    assert first.stderr.startswith("raw stderr\nworker ")
+    assert first.stderr == second.stderr
+    assert f"worker {os.getpid()}" not in first.stderr
+
+
+def test_python_step_kind_validation() -> None:
+    with raises(AeternumValidationError, match="exactly one of"):
+        AutomationStep(
+            name="Both", category="build", command="make", python="build:main"
+        )
+    with raises(AeternumValidationError, match="exactly one of"):
+        AutomationStep(name="Neither", category="build")
+    with raises(AeternumValidationError, match="Invalid python reference"):
+        AutomationStep(name="Bad", category="build", python="build.main")
+
+
+def test_python_step_relative_working_dir(tmp_path: Path, monkeypatch: MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    Path(tmp_path, "scripts").mkdir()
+    Path(tmp_path, "scripts", "stepmod.py").write_text(
+        "import os\n\ndef hello():\n    print(os.path.basename(os.getcwd()))\n"
+    )
+    # Console scripts do not put the current directory on sys.path
+    monkeypatch.setattr(
+        sys,
+        "path",
+        [entry for entry in sys.path if entry not in ("", ".", os.getcwd())],
+    )
+
+    capture = CapturedOutput()
+    result = call_in_process("stepmod:hello", {}, Path("scripts"), capture)
+    assert result.returncode == 0, "".join(capture.iter_text("stderr"))
+    assert "".join(capture.iter_text("stdout")) == "scripts\n"
+    assert os.getcwd() == str(tmp_path)
+    sys.modules.pop("stepmod", None)
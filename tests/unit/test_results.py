@@ -0,0 +1,39 @@
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.results import ResultTable, tail_text
+
+
+def test_result_table_records() -> None:
+    table = ResultTable()
+    table.append(1, "Build", "make", StepExecutionStatus.COMPLETED, duration=1.5)
+    table.append(2, "Lint", "ruff", StepExecutionStatus.EXCLUDED)
+    table.append(3, "Test", "pytest", StepExecutionStatus.FAILED, 2, 3.0, stderr="boom")
+
+    assert len(table) == 3
+    assert [record.status for record in table] == [
+        StepExecutionStatus.COMPLETED,
+        StepExecutionStatus.EXCLUDED,
+        StepExecutionStatus.FAILED,
+    ]
+    assert table[2].exit_code == 2
+    assert table[1].executed is False
+    assert table.count(StepExecutionStatus.COMPLETED) == 1
+    assert table.durations() == {"Build": 1.5, "Test": 3.0}
+    assert len(table.failures) == 1
+    assert table.failures[0].name == "Test"
+    assert table.failures[0].stderr == "boom"
+
+
+def test_result_table_keeps_only_failure_stderr() -> None:
+    table = ResultTable()
+    table.append(1, "Build", "make", StepExecutionStatus.COMPLETED, stderr="warn")
+    assert table.failures == []
+
+
+def test_tail_text() -> None:
+    assert tail_text("short") == "short"
+    assert tail_text(None) == ""
+    long_text = "\n".join(f"line {idx}" for idx in range(1000))
+    tail = tail_text(long_text, max_bytes=64)
+    assert len(tail) <= 64
+    assert tail.startswith("line ")
+    assert tail.endswith("line 999")
@@ -1,3 +1,4 @@
+import json
 import shutil
 from pathlib import Path
 from unittest.mock import MagicMock, Mock, patch
@@ -5,6 +6,7 @@ from unittest.mock import MagicMock, Mock, patch
 from pytest import MonkeyPatch
 from pytest_mock import MockerFixture
 
+from aeternum.core.errors import ExitCode
 from tests.shared.file_utils import (
     assert_file_content,
     assert_files_created,
@@ -124,6 +126,83 @@ def test_run_step_failure(
     assert "FAILED" in result.output, "Summary table did not appear in output"
 
 
+@patch("subprocess.run")
+def test_run_keep_going_reports_all_failures(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum build keeps going past failures and reports all of them."""
+    monkeypatch.chdir(tmp_path)
+    spec_file = load_resources_dir("valid", "keep_going.yaml")
+    shutil.copy(spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    def new_subprocess_exec(exit_code: int, stderr: str) -> Mock:
+        subprocess_exec = Mock()
+        subprocess_exec.configure_mock(
+            **{"returncode": exit_code, "stdout": "", "stderr": stderr}
+        )
+        return subprocess_exec
+
+    mock_subproc_run.side_effect = [
+        new_subprocess_exec(1, "E501 line too long"),
+        new_subprocess_exec(0, ""),
+        new_subprocess_exec(1, "1 failed, 10 passed"),
+    ]
+    result = runner.run_cli(["run"])
+    assert result.exit_code == 1, f"Expected exit code 1, got {result.exit_code}"
+    assert mock_subproc_run.call_count == 3
+    assert "Skipping step: dependency 'Unit tests' did not succeed" in result.output
+    assert "2 steps failed" in result.stderr
+    assert "E501 line too long" in result.stderr
+    assert "1 failed, 10 passed" in result.stderr
+
+    mock_subproc_run.reset_mock()
+    mock_subproc_run.side_effect = [new_subprocess_exec(1, "E501 line too long")]
+    result = runner.run_cli(["run", "--fail-fast"])
+    assert result.exit_code == 1
+    assert mock_subproc_run.call_count == 1
+    assert "Step 'Lint' failed with exit code 1" in result.stderr
+
+
+@patch("subprocess.run")
+def test_run_resume_after_failure(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum build resumes from the first incomplete step."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0, "stdout": ""})
+    unsuccessful_subprocess_exec = Mock()
+    unsuccessful_subprocess_exec.configure_mock(**{"returncode": 1, "stderr": ""})
+    mock_subproc_run.side_effect = [
+        successful_subprocess_exec,
+        unsuccessful_subprocess_exec,
+        successful_subprocess_exec,
+    ]
+    result = runner.run_cli(["run"])
+    assert result.exit_code == 1
+
+    result = runner.run_cli(["run", "--resume"])
+    assert_cli_output(
+        result,
+        [
+            "Resuming build, 1 steps completed in a previous run",
+            "Skipping step: completed in a previous run",
+            "Resumed 1 steps completed in a previous run",
+            "RESUMED",
+        ],
+    )
+    assert mock_subproc_run.call_count == 3
+
+
 @patch("subprocess.run")
 def test_run_filtered_steps_filter_conflict(
     mock_subproc_run: MagicMock,
@@ -338,3 +417,230 @@ def test_run_dry_run_with_log_output_success(
     assert_files_created(tmp_path, expected_log_filename)
     ref_log_file = load_resources_dir("references", "dry_run.log")
     assert_file_content(generated_log_file, ref_log_file)
+
+
+@patch("subprocess.run")
+def test_run_with_jobserver(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum build passes a jobserver to step processes."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("MAKEFLAGS", raising=False)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    result = runner.run_cli(["run", "--jobs", "4"])
+    assert_cli_output(result, ["Ran 2 automation steps"])
+    for call in mock_subproc_run.call_args_list:
+        assert "--jobserver-auth=" in call.kwargs["env"]["MAKEFLAGS"]
+        assert len(call.kwargs["pass_fds"]) == 2
+
+
+@patch("subprocess.run")
+def test_run_shard_with_log_output(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+    mock_datetime: MagicMock,
+) -> None:
+    """Tests aeternum build of one shard records the shard in the log."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    fixed_timestamp = "2024-08-01_12-34-56"
+    mock_datetime_instance = MagicMock()
+    mock_datetime_instance.strftime.return_value = fixed_timestamp
+    mock_datetime.now.return_value = mock_datetime_instance
+
+    result = runner.run_cli(["run", "--shard", "1/2", "--save-output"])
+    assert_cli_output(result, ["Shard 1/2: 1 steps assigned", "Ran 1 automation steps"])
+    assert mock_subproc_run.call_count == 1
+    generated_log_file = Path(tmp_path, "aeternum-execution_2024-08-01_12-34-56.log")
+    log_content = generated_log_file.read_text()
+    assert "Shard: 1/2" in log_content
+    assert "EXCLUDED" in log_content
+
+
+@patch("subprocess.run")
+def test_run_invalid_shard(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum build with an invalid shard selector."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    result = runner.run_cli(["run", "--shard", "3/2"])
+    assert result.exit_code == 2, f"Expected exit code 2, got {result.exit_code}"
+    assert "Invalid shard '3/2'" in result.stderr
+
+
+def test_run_dry_run_json_plan(
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum dry run printing a cached JSON plan."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    result = runner.run_cli(["run", "--dry-run", "--format", "json"])
+    assert result.exit_code == 0, f"Expected exit code 0, got {result.exit_code}"
+    plan = json.loads(result.stdout)
+    assert plan["project"] == "test-project"
+    assert [step["name"] for step in plan["steps"]] == [
+        "Install dependencies",
+        "Run tests",
+    ]
+    assert len(list(Path(tmp_path, ".aeternum", "plans").iterdir())) == 1
+
+    with patch("aeternum.command.run.ProjectSpec.load_from_yaml") as mock_load:
+        cached_result = runner.run_cli(["run", "--dry-run", "--format", "json"])
+        mock_load.assert_not_called()
+    assert cached_result.stdout == result.stdout
+
+
+def test_run_cached_plan_checks_working_dirs(
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests a cached plan is not reused once a working directory is gone."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    spec = (
+        Path(valid_spec_file).read_text().replace("working_dir: .", "working_dir: app")
+    )
+    Path(tmp_path, "aeternum.yaml").write_text(spec)
+    Path(tmp_path, "app").mkdir()
+
+    result = runner.run_cli(["run", "--dry-run", "--format", "json"])
+    assert result.exit_code == 0, f"Expected exit code 0, got {result.exit_code}"
+
+    Path(tmp_path, "app").rmdir()
+    cached_result = runner.run_cli(["run", "--dry-run", "--format", "json"])
+    assert cached_result.exit_code == 2
+    assert "Working directory provided does not exist: app" in cached_result.stderr
+
+
+def test_run_json_format_requires_dry_run(
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests aeternum run rejects JSON output outside of dry runs."""
+    monkeypatch.chdir(tmp_path)
+    valid_spec_file = load_resources_dir("valid", "aeternum.yaml")
+    shutil.copy(valid_spec_file, Path(tmp_path, "aeternum.yaml"))
+
+    result = runner.run_cli(["run", "--format", "json"])
+    assert result.exit_code == 2, f"Expected exit code 2, got {result.exit_code}"
+    assert "JSON output is only available for dry runs" in result.stderr
+
+
+@patch("subprocess.run")
+def test_run_baseline_regression(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests that steps slower than the baseline fail the build."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(load_resources_dir("valid", "aeternum.yaml"), tmp_path)
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0, "stdout": ""})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    baseline_file = Path(tmp_path, "baseline.json")
+    baseline_file.write_text(
+        json.dumps({"steps": {"Install dependencies": 100.0, "Run tests": 1e-9}})
+    )
+
+    result = runner.run_cli(
+        ["run", "--baseline", str(baseline_file), "--min-delta", "0"]
+    )
+    assert result.exit_code == ExitCode.PERFORMANCE_REGRESSION
+    assert "REGRESSED" in result.output
+    assert "1 steps regressed" in result.output
+
+    result = runner.run_cli(["run", "--baseline", str(baseline_file)])
+    assert_cli_output(result, ["VS BASELINE", "-100%"])
+
+
+@patch("subprocess.run")
+def test_run_update_baseline(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests that --update-baseline creates and smooths the baseline."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(load_resources_dir("valid", "aeternum.yaml"), tmp_path)
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0, "stdout": ""})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    baseline_file = Path(tmp_path, "baseline.json")
+
+    result = runner.run_cli(["run", "--update-baseline"])
+    assert result.exit_code == ExitCode.INPUT_ERROR
+
+    result = runner.run_cli(
+        ["run", "--baseline", str(baseline_file), "--update-baseline"]
+    )
+    assert_cli_output(result, ["Updated baseline timings"])
+    first = json.loads(baseline_file.read_text())["steps"]
+    assert set(first) == {"Install dependencies", "Run tests"}
+
+    baseline_file.write_text(json.dumps({"steps": {"Run tests": 10.0}}))
+    runner.run_cli(["run", "--baseline", str(baseline_file), "--update-baseline"])
+    # Exponential moving average: 0.3 * measured + 0.7 * 10.0
+    assert 7.0 <= json.loads(baseline_file.read_text())["steps"]["Run tests"] < 7.1
+
+
+@patch("subprocess.run")
+def test_run_update_baseline_skips_regressed_builds(
+    mock_subproc_run: MagicMock,
+    tmp_path: Path,
+    runner: TestRunner,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """Tests that --update-baseline keeps the baseline of a regressed build."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(load_resources_dir("valid", "aeternum.yaml"), tmp_path)
+    successful_subprocess_exec = Mock()
+    successful_subprocess_exec.configure_mock(**{"returncode": 0, "stdout": ""})
+    mock_subproc_run.return_value = successful_subprocess_exec
+    baseline_file = Path(tmp_path, "baseline.json")
+    baseline_content = json.dumps({"steps": {"Run tests": 1e-9}})
+    baseline_file.write_text(baseline_content)
+
+    result = runner.run_cli(
+        [
+            "run",
+            "--baseline",
+            str(baseline_file),
+            "--min-delta",
+            "0",
+            "--update-baseline",
+        ]
+    )
+    assert result.exit_code == ExitCode.PERFORMANCE_REGRESSION
+    assert "Updated baseline timings" not in result.output
+    assert "--record-timings" in result.output
+    assert baseline_file.read_text() == baseline_content
@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import threading
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, Mock, patch
+
+from pytest import CaptureFixture, MonkeyPatch
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.models import ProjectSpec
+from aeternum.core.runner import (
+    BuildFinished,
+    BuildStarted,
+    Runner,
+    RunnerEvent,
+    RunOptions,
+    StepFinished,
+    StepSkipped,
+    StepStarted,
+)
+from aeternum.core.spawn import ProcessResult
+from tests.shared.file_utils import load_resources_dir
+
+
+def __new_mock_subprocess(exit_code: int) -> Mock:
+    value = Mock()
+    value.configure_mock(
+        **{"returncode": exit_code, "stdout": "output", "stderr": "error"}
+    )
+    return value
+
+
+@patch("subprocess.run")
+def test_runner_success_without_console_output(
+    mock_subproc_run: MagicMock, capsys: CaptureFixture
+) -> None:
+    mock_subproc_run.return_value = __new_mock_subprocess(0)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    events: List[RunnerEvent] = []
+
+    result = Runner(project, listeners=[events.append]).run()
+    assert result.succeeded
+    assert [record.status for record in result.steps] == [
+        StepExecutionStatus.COMPLETED,
+        StepExecutionStatus.COMPLETED,
+    ]
+    assert set(result.step_durations) == {"Install dependencies", "Run tests"}
+    assert [type(event) for event in events] == [
+        BuildStarted,
+        StepStarted,
+        StepFinished,
+        StepStarted,
+        StepFinished,
+        BuildFinished,
+    ]
+    assert events[-1].result is result
+    captured = capsys.readouterr()
+    assert captured.out == ""
+
+
+@patch("subprocess.run")
+def test_runner_stops_on_failure(mock_subproc_run: MagicMock) -> None:
+    mock_subproc_run.side_effect = [__new_mock_subprocess(2)]
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+
+    result = Runner(project).run()
+    assert not result.succeeded
+    assert len(result.steps) == 1
+    assert result.failed_step.name == "Install dependencies"
+    assert result.failed_step.exit_code == 2
+    assert result.failed_step.stderr == "error"
+
+
+@patch("subprocess.run")
+def test_runner_keep_going_skips_dependents(mock_subproc_run: MagicMock) -> None:
+    mock_subproc_run.side_effect = [
+        __new_mock_subprocess(1),
+        __new_mock_subprocess(0),
+        __new_mock_subprocess(2),
+    ]
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "keep_going.yaml"))
+    events: List[RunnerEvent] = []
+
+    result = Runner(project, listeners=[events.append]).run(RunOptions(keep_going=True))
+    assert mock_subproc_run.call_count == 3
+    assert [record.status for record in result.steps] == [
+        StepExecutionStatus.FAILED,
+        StepExecutionStatus.COMPLETED,
+        StepExecutionStatus.FAILED,
+        StepExecutionStatus.SKIPPED,
+    ]
+    assert [failure.name for failure in result.failures] == ["Lint", "Unit tests"]
+    skipped = [event for event in events if isinstance(event, StepSkipped)]
+    assert skipped[0].reason == "dependency 'Unit tests' did not succeed"
+
+
+@patch("subprocess.run")
+def test_runner_filtered_dry_run(mock_subproc_run: MagicMock) -> None:
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    events: List[RunnerEvent] = []
+
+    result = Runner(project, listeners=[events.append]).run(
+        RunOptions(include_filters=("test",), dry_run=True)
+    )
+    mock_subproc_run.assert_not_called()
+    assert [record.status for record in result.steps] == [
+        StepExecutionStatus.EXCLUDED,
+        StepExecutionStatus.NOT_EXECUTED,
+    ]
+    assert isinstance(events[1], StepSkipped)
+    assert events[1].planned.reason == "not included"
+
+
+@patch("subprocess.run")
+def test_runner_iter_events(mock_subproc_run: MagicMock) -> None:
+    mock_subproc_run.return_value = __new_mock_subprocess(0)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+
+    async def collect_events() -> List[RunnerEvent]:
+        return [event async for event in Runner(project).iter_events()]
+
+    events = asyncio.run(collect_events())
+    assert isinstance(events[0], BuildStarted)
+    assert isinstance(events[-1], BuildFinished)
+    assert events[-1].result.succeeded
+    assert sum(isinstance(event, StepFinished) for event in events) == 2
+
+
+@patch("subprocess.run")
+def test_runner_iter_events_stops_build(mock_subproc_run: MagicMock) -> None:
+    mock_subproc_run.return_value = __new_mock_subprocess(0)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+    stop = threading.Event()
+    # Hold the build after each step until the consumer had a chance to stop it
+    options = RunOptions(
+        listeners=[lambda event: isinstance(event, StepFinished) and stop.wait(5)],
+        stop=stop,
+    )
+
+    async def first_step() -> List[RunnerEvent]:
+        events: List[RunnerEvent] = []
+        async with contextlib.aclosing(Runner(project).iter_events(options)) as stream:
+            async for event in stream:
+                events.append(event)
+                if isinstance(event, StepFinished):
+                    break
+        return events
+
+    events = asyncio.run(first_step())
+    assert stop.is_set()
+    assert isinstance(events[-1], StepFinished)
+    assert mock_subproc_run.call_count == 1
+
+
+@patch("aeternum.core.models.tee_process")
+def test_runner_tee_output(mock_tee_process: MagicMock) -> None:
+    def tee(argv, sinks, mirrors, **kwargs) -> ProcessResult:
+        sinks["stderr"].write(b"error: tests failed\n")
+        assert set(mirrors) == {"stdout", "stderr"}
+        return ProcessResult(returncode=1, stdout=None, stderr=None, duration=0.1)
+
+    mock_tee_process.side_effect = tee
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "aeternum.yaml"))
+
+    result = Runner(project).run(RunOptions(tee_output=True))
+    assert not result.succeeded
+    mock_tee_process.assert_called_once()
+    assert result.failures[0].stderr == "error: tests failed\n"
+    assert result.output_files == {}
+
+
+def test_runner_pipes_steps(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "piped.yaml"))
+    project.build_stage.validate()
+    events: List[RunnerEvent] = []
+    stdout: List[bytes] = []
+
+    def on_event(event: RunnerEvent) -> None:
+        events.append(event)
+        if isinstance(event, StepFinished):
+            # Captured output is released once listeners have seen the event
+            stdout.append(b"".join(event.outcome.result.output.iter_chunks("stdout")))
+
+    result = Runner(project, listeners=[on_event]).run()
+    assert result.succeeded
+    assert [type(event) for event in events[1:4]] == [StepStarted] * 3
+    assert [record.status for record in result.steps] == [
+        StepExecutionStatus.COMPLETED
+    ] * 3
+    assert stdout[:2] == [b"", b""]
+    assert stdout[2].strip() == b"20000"
+
+
+def test_runner_skips_consumer_of_excluded_step(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "piped.yaml"))
+
+    result = Runner(project).run(RunOptions(include_filters=("test",)))
+    assert [record.status for record in result.steps] == [
+        StepExecutionStatus.EXCLUDED,
+        StepExecutionStatus.EXCLUDED,
+        StepExecutionStatus.SKIPPED,
+    ]
@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from aeternum.core import sampler as sampler_module
+from aeternum.core.models import ProjectSpec
+from aeternum.core.runner import Runner, RunOptions
+from aeternum.core.sampler import (
+    ProcessSampler,
+    ResourceSample,
+    ResourceTimeline,
+    format_bytes,
+    process_tree,
+    read_counters,
+    sampling_supported,
+    write_timelines,
+)
+from tests.shared.file_utils import load_resources_dir
+
+pytestmark = pytest.mark.skipif(
+    not sampling_supported(), reason="resource sampling needs /proc"
+)
+
+_BUSY_SCRIPT = (
+    "import subprocess, sys, time; "
+    + "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)']); "
+    + "end = time.time() + 0.6\n"
+    + "while time.time() < end: pass\n"
+    + "child.kill()"
+)
+
+
+def __timeline() -> ResourceTimeline:
+    return ResourceTimeline(
+        0.5,
+        [
+            ResourceSample(0.5, 50.0, 1024**2, 0, 0, 1),
+            ResourceSample(1.0, 150.0, 3 * 1024**2, 2048, 4096, 2),
+        ],
+    )
+
+
+def test_read_counters_of_current_process() -> None:
+    counters = read_counters(os.getpid())
+    assert counters is not None
+    assert counters.cpu_ticks >= 0
+    assert counters.rss > 0
+
+
+def test_process_tree_lists_descendants(monkeypatch: MonkeyPatch) -> None:
+    child = subprocess.Popen(["sleep", "5"])
+    try:
+        assert process_tree(os.getpid())[0] == os.getpid()
+        assert child.pid in process_tree(os.getpid())
+        # Kernels without per-task children lists fall back to a /proc scan
+        monkeypatch.setattr(sampler_module, "_direct_children", lambda pid: None)
+        assert child.pid in process_tree(os.getpid())
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_process_sampler_records_timeline() -> None:
+    sampler = ProcessSampler(interval=0.05)
+    process = subprocess.Popen([sys.executable, "-c", _BUSY_SCRIPT])
+    sampler.attach(process.pid)
+    process.wait()
+    timeline = sampler.stop()
+
+    assert timeline.samples
+    assert timeline.cpu_peak > 0
+    assert timeline.peak_rss > 0
+    assert max(sample.processes for sample in timeline.samples) == 2
+    elapsed = [sample.elapsed for sample in timeline.samples]
+    assert elapsed == sorted(elapsed)
+    with pytest.raises(RuntimeError):
+        sampler.attach(process.pid)
+
+
+def test_resource_timeline_summary(tmp_path: Path) -> None:
+    timeline = __timeline()
+    assert timeline.cpu_average == 100.0
+    assert timeline.describe() == (
+        "cpu 100% (peak 150%), rss 3.0MiB, io 2.0KiB read / 4.0KiB written"
+    )
+    assert ResourceTimeline(0.5).describe() == "-"
+    assert format_bytes(512) == "512B"
+
+    timeline_file = Path(tmp_path, "resources.json")
+    write_timelines(timeline_file, [(2, "Run tests", timeline)])
+    content = json.loads(timeline_file.read_text())
+    assert content["steps"][0]["name"] == "Run tests"
+    assert content["steps"][0]["peak_rss"] == 3 * 1024**2
+    assert len(content["steps"][0]["samples"]) == 2
+
+
+def test_runner_samples_command_steps(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    project = ProjectSpec.load_from_yaml(load_resources_dir("valid", "piped.yaml"))
+    project.build_stage.steps[0].args = ["1", "2000000"]
+
+    result = Runner(project).run(RunOptions(sample_interval=0.01))
+    assert result.succeeded
+    timelines = result.steps.resource_timelines()
+    assert [record.name for record, _ in timelines] == [
+        "Dump fixture",
+        "Filter fixture",
+        "Load fixture",
+    ]
+    assert all(timeline.interval == 0.01 for _, timeline in timelines)
+    assert Runner(project).run().steps.resource_timelines() == []
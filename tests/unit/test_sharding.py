@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from pytest import raises
+
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.sharding import ShardSpec, assign_shards
+from aeternum.core.timings import load_timings, save_timings
+
+
+def test_parse_shard_spec() -> None:
+    shard = ShardSpec.parse("2/4")
+    assert shard.index == 2
+    assert shard.count == 4
+    assert str(shard) == "2/4"
+
+
+def test_parse_shard_spec_invalid() -> None:
+    for value in ["0/2", "3/2", "1/0", "1-2", "abc"]:
+        with raises(AeternumInputError):
+            _ = ShardSpec.parse(value)
+
+
+def test_assign_shards_by_name_is_deterministic() -> None:
+    names = [f"step-{idx}" for idx in range(10)]
+    assignment = assign_shards(names, 3)
+    assert assignment == assign_shards(names, 3)
+    sizes = [assignment.count(shard) for shard in range(3)]
+    assert sorted(sizes) == [3, 3, 4]
+    reordered = assign_shards(list(reversed(names)), 3)
+    assert dict(zip(names, assignment)) == dict(zip(reversed(names), reordered))
+
+
+def test_assign_shards_balanced_by_timings() -> None:
+    names = ["lint", "unit", "integration", "e2e", "docs"]
+    timings = {"lint": 10.0, "unit": 30.0, "integration": 60.0, "e2e": 90.0}
+    assignment = assign_shards(names, 2, timings)
+    loads = [0.0, 0.0]
+    for name, shard in zip(names, assignment):
+        loads[shard] += timings.get(name, 45.0)
+    assert abs(loads[0] - loads[1]) <= 30.0
+    assert assignment[names.index("e2e")] != assignment[names.index("integration")]
+
+
+def test_save_and_load_timings(tmp_path: Path) -> None:
+    timings_file = Path(tmp_path, "timings.json")
+    save_timings(timings_file, {"build": 1.5})
+    save_timings(timings_file, {"test": 2.0})
+    assert load_timings(timings_file) == {"build": 1.5, "test": 2.0}
+
+
+def test_load_timings_invalid(tmp_path: Path) -> None:
+    timings_file = Path(tmp_path, "timings.json")
+    timings_file.write_text(json.dumps({"durations": []}))
+    with raises(AeternumInputError):
+        _ = load_timings(timings_file)
+    with raises(AeternumInputError):
+        _ = load_timings(Path(tmp_path, "missing.json"))
@@ -0,0 +1,119 @@
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from aeternum.core.spawn import (
+    PipelineCommand,
+    resolve_executable,
+    run_pipeline,
+    run_process,
+    spawn_options,
+    tee_process,
+)
+
+_TEE_SCRIPT = (
+    "import sys; sys.stdout.write('x' * 3000000 + 'end\\n'); "
+    + "sys.stderr.write('boom\\n'); sys.exit(3)"
+)
+
+
+def test_resolve_executable(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    assert resolve_executable("/bin/sh") == "/bin/sh"
+    assert os.path.isabs(resolve_executable("sh"))
+    assert resolve_executable("some-missing-binary") == "some-missing-binary"
+
+    # Tools installed or put on PATH during a build are found right away
+    tool = Path(tmp_path, "some-missing-binary")
+    tool.write_text("#!/bin/sh\n")
+    tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    assert resolve_executable("some-missing-binary") == str(tool)
+    assert resolve_executable("some-missing-binary", {"PATH": "/nowhere"}) == (
+        "some-missing-binary"
+    )
+
+
+def test_spawn_options(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    options = spawn_options(["sh", "-c", "true"], cwd=Path("."))
+    assert options["cwd"] is None
+    assert os.path.isabs(options["args"][0])
+    assert "close_fds" not in options
+    assert spawn_options(["/bin/sh"], pass_fds=(5,))["pass_fds"] == (5,)
+
+
+def test_child_does_not_inherit_unrelated_fds() -> None:
+    read_end, write_end = os.pipe()
+    os.set_inheritable(write_end, True)
+    try:
+        script = f"import os; os.fstat({write_end})"
+        result = run_process([sys.executable, "-c", script])
+        assert result.returncode != 0
+        assert "Bad file descriptor" in result.stderr
+        passed = run_process([sys.executable, "-c", script], pass_fds=(write_end,))
+        assert passed.returncode == 0
+    finally:
+        os.close(read_end)
+        os.close(write_end)
+
+
+def test_run_process_captures_output(tmp_path: Path) -> None:
+    result = run_process(["/bin/sh", "-c", "pwd; echo oops >&2; exit 3"], cwd=tmp_path)
+    assert result.returncode == 3
+    assert result.stdout.strip() == str(tmp_path.resolve())
+    assert result.stderr.strip() == "oops"
+    assert result.duration > 0
+
+
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_tee_process_to_files(
+    tmp_path: Path, monkeypatch: MonkeyPatch, zero_copy: bool
+) -> None:
+    if not zero_copy:
+        monkeypatch.delattr(os, "splice", raising=False)
+        monkeypatch.delattr(os, "sendfile", raising=False)
+    sinks = {"stdout": tempfile.TemporaryFile(), "stderr": tempfile.TemporaryFile()}
+    with open(Path(tmp_path, "console.out"), "w") as stdout, open(
+        Path(tmp_path, "console.err"), "w"
+    ) as stderr:
+        result = tee_process(
+            [sys.executable, "-c", _TEE_SCRIPT],
+            sinks,
+            {"stdout": stdout, "stderr": stderr},
+        )
+    assert result.returncode == 3
+    assert result.stdout is None
+    expected = b"x" * 3000000 + b"end\n"
+    sinks["stdout"].seek(0)
+    assert sinks["stdout"].read() == expected
+    assert Path(tmp_path, "console.out").read_bytes() == expected
+    assert Path(tmp_path, "console.err").read_bytes() == b"boom\n"
+
+
+def test_tee_process_to_buffered_streams() -> None:
+    sinks = {"stdout": tempfile.TemporaryFile(), "stderr": tempfile.TemporaryFile()}
+    mirrors = {"stdout": io.BytesIO(), "stderr": io.BytesIO()}
+    tee_process([sys.executable, "-c", _TEE_SCRIPT], sinks, mirrors)
+    assert mirrors["stdout"].getvalue().endswith(b"xend\n")
+    assert mirrors["stderr"].getvalue() == b"boom\n"
+    sinks["stderr"].seek(0)
+    assert sinks["stderr"].read() == b"boom\n"
+
+
+def test_run_pipeline_reports_each_exit_status() -> None:
+    sink = tempfile.TemporaryFile()
+    results = run_pipeline(
+        [
+            PipelineCommand(["sh", "-c", "echo fixture; exit 3"]),
+            PipelineCommand(["tr", "a-z", "A-Z"]),
+        ],
+        stdout=sink,
+    )
+    assert [result.returncode for result in results] == [3, 0]
+    sink.seek(0)
+    assert sink.read() == b"FIXTURE\n"
@@ -0,0 +1,109 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+from pytest import MonkeyPatch, raises
+
+from aeternum.core import templating
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.models import ProjectSpec
+from aeternum.core.templating import SpecLoader, merge_documents
+from tests.shared.file_utils import load_resources_dir
+from tests.shared.runner import TestRunner
+
+
+def test_load_templated_spec_with_includes() -> None:
+    spec_file = load_resources_dir("templated", "aeternum.yaml")
+    project = ProjectSpec.load_from_yaml(spec_file, {"service": "billing"})
+    assert project.name == "billing"
+    assert project.repo_url == "https://github.com/some-user/services"
+    assert [step.name for step in project.build_stage.steps] == [
+        "Install dependencies",
+        "Test unit",
+        "Test integration",
+    ]
+
+
+def test_missing_template_variable() -> None:
+    spec_file = load_resources_dir("templated", "aeternum.yaml")
+    with raises(AeternumInputError, match="'service' is undefined"):
+        ProjectSpec.load_from_yaml(spec_file)
+
+
+def test_merge_documents() -> None:
+    base = {"steps": [1], "strategy": {"strict": True, "shell": "sh"}, "name": "a"}
+    override = {"steps": [2], "strategy": {"shell": "bash"}, "name": "b"}
+    assert merge_documents(base, override) == {
+        "steps": [1, 2],
+        "strategy": {"strict": True, "shell": "bash"},
+        "name": "b",
+    }
+
+
+def test_parsed_fragments_are_cached(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    spec_file = load_resources_dir("templated", "aeternum.yaml")
+    monkeypatch.setattr(templating, "_parsed_documents", {})
+    loader = SpecLoader({"service": "billing"}, Path(tmp_path, "cache"))
+    expected = loader.load(spec_file)
+    assert len(list(Path(tmp_path, "cache", "parsed").glob("*/*.json"))) == 3
+
+    # A fresh process starts with an empty memory cache and reads the disk cache
+    monkeypatch.setattr(templating, "_parsed_documents", {})
+    with patch("yaml.safe_load", side_effect=AssertionError("parsed again")):
+        assert (
+            SpecLoader({"service": "billing"}, Path(tmp_path, "cache")).load(spec_file)
+            == expected
+        )
+        # Within a process, the memory cache serves other specs too
+        assert SpecLoader({"service": "billing"}).load(spec_file) == expected
+
+
+def test_plain_spec_with_braces_is_not_rendered(
+    tmp_path: Path, runner: TestRunner, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    spec = yaml.safe_load(load_resources_dir("valid", "minimal.yaml").read_text())
+    spec["build-stage"]["steps"][0]["command"] = "docker ps --format '{{.Names}}'"
+    Path(tmp_path, "aeternum.yaml").write_text(yaml.safe_dump(spec))
+
+    project = ProjectSpec.load_from_yaml(Path(tmp_path, "aeternum.yaml"))
+    assert project.build_stage.steps[0].command == "docker ps --format '{{.Names}}'"
+    result = runner.run_cli(["run", "--dry-run"])
+    assert result.exit_code == 0, result.output
+
+
+def test_template_suffix_opts_in(tmp_path: Path) -> None:
+    Path(tmp_path, "spec.yaml.j2").write_text('name: "{{ service }}"\n')
+    assert SpecLoader({"service": "api"}).load(Path(tmp_path, "spec.yaml.j2")) == {
+        "name": "api"
+    }
+
+
+def test_non_json_documents_are_not_cached_on_disk(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(templating, "_parsed_documents", {})
+    Path(tmp_path, "spec.yaml").write_text("ports:\n  8080: web\n  true: on\n")
+    loader = SpecLoader(cache_dir=Path(tmp_path, "cache"))
+    expected = {"ports": {8080: "web", True: True}}
+    assert loader.load(Path(tmp_path, "spec.yaml")) == expected
+    assert not list(Path(tmp_path, "cache").glob("parsed/*/*.json"))
+
+    monkeypatch.setattr(templating, "_parsed_documents", {})
+    assert loader.load(Path(tmp_path, "spec.yaml")) == expected
+
+
+def test_circular_include(tmp_path: Path) -> None:
+    Path(tmp_path, "a.yaml").write_text('include: "b.yaml"\nname: a\n')
+    Path(tmp_path, "b.yaml").write_text('include: "a.yaml"\n')
+    with raises(AeternumInputError, match="Circular spec include: a.yaml -> b.yaml"):
+        SpecLoader().load(Path(tmp_path, "a.yaml"))
+
+
+def test_render_command(runner: TestRunner) -> None:
+    spec_file = load_resources_dir("templated", "aeternum.yaml")
+    result = runner.run_cli(["render", "-f", str(spec_file), "--var", "service=api"])
+    assert result.exit_code == 0
+    document = yaml.safe_load(result.stdout)
+    assert document["name"] == "api"
+    assert len(document["build-stage"]["steps"]) == 3
@@ -0,0 +1,33 @@
+from pytest import approx, raises
+
+from aeternum.core.errors import AeternumInputError
+from aeternum.core.timings import RegressionGate, parse_percentage, smooth_timings
+
+
+def test_parse_percentage() -> None:
+    assert parse_percentage("20%") == approx(0.2)
+    assert parse_percentage(" 7.5 ") == approx(0.075)
+    for invalid in ["fast", "-5%"]:
+        with raises(AeternumInputError):
+            parse_percentage(invalid)
+
+
+def test_regression_gate_thresholds() -> None:
+    gate = RegressionGate(
+        {"build": 10.0, "test": 2.0, "lint": 1.0}, max_regression=0.2, min_delta=1.0
+    )
+    measured = {"build": 13.0, "test": 3.5, "lint": 1.9, "deploy": 50.0}
+
+    assert [change.name for change in gate.compare(measured)] == [
+        "build",
+        "test",
+        "lint",
+    ]
+    # 'lint' is 90% slower but within the minimum delta
+    assert [change.name for change in gate.regressions(measured)] == ["build", "test"]
+    assert gate.regressions({"build": 11.5}) == []
+
+
+def test_smooth_timings() -> None:
+    smoothed = smooth_timings({"build": 10.0}, {"build": 20.0, "test": 4.0}, 0.5)
+    assert smoothed == {"build": 15.0, "test": 4.0}
@@ -0,0 +1,104 @@
+"""Memory benchmark of per-step result storage for very large builds.
+
+Compares the per-step objects previously kept by ProjectSpec.build (an
+(AutomationStep, status) pair, a pre-colored summary row, and the full
+StepExecutionResult of failures) with the ResultTable used today.
+
+Usage: python3 tools/bench_results.py --steps 50000 --failure-rate 0.01
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+from colorama import Fore, Style
+from tabulate import tabulate
+
+from aeternum.core.constants import StepExecutionStatus
+from aeternum.core.models import AutomationStep, StepExecutionResult
+from aeternum.core.results import ResultTable
+
+OUTPUT_SIZE = 2048
+
+
+def make_steps(count: int) -> List[AutomationStep]:
+    return [
+        AutomationStep(
+            name=f"Generated step {idx}",
+            category="build",
+            command="make",
+            args=[f"target-{idx}"],
+        )
+        for idx in range(count)
+    ]
+
+
+def legacy_records(steps: List[AutomationStep], failure_every: int) -> Tuple:
+    executed_steps = []
+    summary = []
+    failures = []
+    for idx, step in enumerate(steps, start=1):
+        command = f"{step.command} {' '.join(step.args)}"
+        if failure_every and idx % failure_every == 0:
+            status = StepExecutionStatus.FAILED
+            failures.append(
+                StepExecutionResult(
+                    step.name, command, "o" * OUTPUT_SIZE, "e" * OUTPUT_SIZE, 1
+                )
+            )
+            icon = f"{Fore.RED}{Style.BRIGHT}{status}{Style.RESET_ALL}"
+        else:
+            status = StepExecutionStatus.COMPLETED
+            icon = f"{Fore.GREEN}{Style.BRIGHT}{status}{Style.RESET_ALL}"
+        summary.append([idx, step.name, command, icon])
+        executed_steps.append((step, status))
+    return executed_steps, summary, failures
+
+
+def compact_records(steps: List[AutomationStep], failure_every: int) -> ResultTable:
+    table = ResultTable()
+    for idx, step in enumerate(steps, start=1):
+        command = f"{step.command} {' '.join(step.args)}"
+        failed = failure_every and idx % failure_every == 0
+        table.append(
+            idx,
+            step.name,
+            command,
+            StepExecutionStatus.FAILED if failed else StepExecutionStatus.COMPLETED,
+            exit_code=1 if failed else 0,
+            duration=0.5,
+            stderr="e" * OUTPUT_SIZE if failed else None,
+        )
+    return table
+
+
+def measure(build: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=50000)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    steps = make_steps(args.steps)
+    failure_every = int(1 / args.failure_rate) if args.failure_rate else 0
+    legacy = measure(lambda: legacy_records(steps, failure_every))
+    compact = measure(lambda: compact_records(steps, failure_every))
+    rows = [
+        ["legacy lists", f"{legacy / 1024 / 1024:.1f}", f"{legacy / args.steps:.0f}"],
+        ["ResultTable", f"{compact / 1024 / 1024:.1f}", f"{compact / args.steps:.0f}"],
+    ]
+    print(tabulate(rows, headers=["STORAGE", "MIB", "BYTES/STEP"], tablefmt="github"))
+    print(f"Reduction: {100 * (1 - compact / legacy):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Microbenchmark of process spawn latency against parent process size.
+
+Compares the spawn layer used by Aeternum, which launches children with vfork,
+with a forced fork+exec launch (what subprocess falls back to when a
+preexec_fn is given) while the parent holds an increasing amount of touched
+memory.
+
+Usage: python3 tools/bench_spawn.py --sizes 0 256 1024 --runs 200
+"""
+import argparse
+import statistics
+import subprocess
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from tabulate import tabulate
+
+from aeternum.core.spawn import run_process
+
+PAGE_SIZE = 4096
+COMMAND = ["/bin/true"]
+
+
+def allocate_ballast(size_mb: int) -> bytearray:
+    """Allocate memory and touch every page so it counts towards RSS."""
+    ballast = bytearray(size_mb * 1024 * 1024)
+    for offset in range(0, len(ballast), PAGE_SIZE):
+        ballast[offset] = 1
+    return ballast
+
+
+def spawn_fork_exec() -> None:
+    subprocess.run(COMMAND, preexec_fn=lambda: None, check=True)
+
+
+def spawn_vfork() -> None:
+    subprocess.run(COMMAND, cwd="/", check=True)
+
+
+def spawn_aeternum() -> None:
+    run_process(COMMAND, stdout=None, stderr=None)
+
+
+def measure(spawn: Callable[[], None], runs: int) -> List[float]:
+    spawn()
+    samples = []
+    for _ in range(runs):
+        start = perf_counter()
+        spawn()
+        samples.append((perf_counter() - start) * 1e6)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 256, 1024])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    strategies: Dict[str, Callable[[], None]] = {
+        "fork+exec": spawn_fork_exec,
+        "vfork (cwd set)": spawn_vfork,
+        "aeternum spawn": spawn_aeternum,
+    }
+    rows = []
+    for size_mb in args.sizes:
+        ballast = allocate_ballast(size_mb)
+        for label, spawn in strategies.items():
+            samples = measure(spawn, args.runs)
+            rows.append(
+                [
+                    size_mb,
+                    label,
+                    f"{statistics.median(samples):.0f}",
+                    f"{statistics.quantiles(samples, n=20)[-1]:.0f}",
+                ]
+            )
+        del ballast
+    print(
+        tabulate(
+            rows,
+            headers=["PARENT MB", "STRATEGY", "MEDIAN US", "P95 US"],
+            tablefmt="github",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
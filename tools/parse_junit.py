@@ -1,79 +1,161 @@
+import heapq
 import os
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterator, List, Optional, Tuple
 
+SLOWEST_TESTS: int = 20
 
-def parse_junit_xml(junit_file: str) -> dict:
-    """Parses a single JUnit XML file and returns test cases info."""
-    tree = ET.parse(junit_file)
-    root = tree.getroot()
-
-    test_cases = []
-    for testcase in root.iter("testcase"):
-        name = testcase.attrib["name"]
-        classname = testcase.attrib["classname"]
-        time = testcase.attrib["time"]
-        status = "PASSED"
 
+def iter_test_cases(junit_file: str) -> Iterator[dict]:
+    """Streams the test cases of a JUnit XML file.
+
+    Each <testcase> element is cleared once read, and its siblings are dropped
+    from the parent, so memory stays flat however large the report is.
+    """
+    parents = []
+    for event, element in ET.iterparse(junit_file, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag != "testcase":
+            continue
+
+        status = "PASSED"
         # Check for failures or errors
-        failure = testcase.find("failure")
-        error = testcase.find("error")
+        failure = element.find("failure")
+        error = element.find("error")
         if failure is not None:
             status = f"FAILED: {failure.attrib.get('message', 'No message')}"
         elif error is not None:
             status = f"ERROR: {error.attrib.get('message', 'No message')}"
+        yield {
+            "name": element.attrib["name"],
+            "classname": element.attrib.get("classname", ""),
+            "time": element.attrib.get("time", "0"),
+            "status": status,
+        }
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
 
-        test_cases.append(
-            {"name": name, "classname": classname, "time": time, "status": status}
-        )
-
-    # Gather summary stats
-    total_tests = len(root.findall(".//testcase"))
-    failed_tests = len(root.findall(".//failure"))
-    error_tests = len(root.findall(".//error"))
 
+def parse_junit_xml(junit_file: str) -> dict:
+    """Parses a single JUnit XML file and returns test cases info."""
+    test_cases = list(iter_test_cases(junit_file))
     return {
         "test_cases": test_cases,
-        "total_tests": total_tests,
-        "failed_tests": failed_tests,
-        "error_tests": error_tests,
+        "total_tests": len(test_cases),
+        "failed_tests": sum(case["status"].startswith("FAILED") for case in test_cases),
+        "error_tests": sum(case["status"].startswith("ERROR") for case in test_cases),
     }
 
 
-def junit_reports_to_markdown(junit_dir: str, output_file: str) -> None:
-    """Converts multiple JUnit XML reports to a single Markdown file."""
-    markdown_content = ""
-    total_tests = 0
-    total_failures = 0
-    total_errors = 0
-
-    for filename in os.listdir(junit_dir):
-        if filename.endswith(".xml"):
-            junit_file = os.path.join(junit_dir, filename)
-            test_results = parse_junit_xml(junit_file)
-
-            markdown_content += f"## Results from {filename}\n\n"
-            for testcase in test_results["test_cases"]:
-                markdown_content += (
-                    f"### {testcase['name']} ({testcase['classname']})\n\n"
+def _test_time(testcase: dict) -> float:
+    try:
+        return float(testcase["time"])
+    except ValueError:
+        return 0.0
+
+
+def write_report_section(
+    junit_file: str, output: IO[str], slowest: int = SLOWEST_TESTS
+) -> dict:
+    """Writes the Markdown section of one report while streaming it.
+
+    Returns:
+        dict: Test counts and the slowest test cases of the report, as
+            (time, name, classname) tuples
+    """
+    filename = os.path.basename(junit_file)
+    totals = {"total_tests": 0, "failed_tests": 0, "error_tests": 0}
+    # Min-heap of the slowest tests seen so far
+    slowest_tests: List[Tuple[float, str, str]] = []
+    output.write(f"## Results from {filename}\n\n")
+    for testcase in iter_test_cases(junit_file):
+        output.write(
+            f"### {testcase['name']} ({testcase['classname']})\n\n"
+            f"**Status**: {testcase['status']}\n\n"
+            f"**Time**: {testcase['time']} seconds\n\n"
+            "---\n\n"
+        )
+        totals["total_tests"] += 1
+        if testcase["status"].startswith("FAILED"):
+            totals["failed_tests"] += 1
+        elif testcase["status"].startswith("ERROR"):
+            totals["error_tests"] += 1
+        entry = (_test_time(testcase), testcase["name"], testcase["classname"])
+        if len(slowest_tests) < slowest:
+            heapq.heappush(slowest_tests, entry)
+        elif slowest_tests and entry > slowest_tests[0]:
+            heapq.heapreplace(slowest_tests, entry)
+    totals["slowest_tests"] = slowest_tests
+    return totals
+
+
+def _write_section_file(junit_file: str, section_file: str, slowest: int) -> dict:
+    with open(section_file, "w") as output:
+        return write_report_section(junit_file, output, slowest)
+
+
+def junit_reports_to_markdown(
+    junit_dir: str,
+    output_file: str,
+    workers: Optional[int] = None,
+    slowest: int = SLOWEST_TESTS,
+) -> None:
+    """Converts multiple JUnit XML reports to a single Markdown file.
+
+    Reports are parsed in parallel processes, each writing its section to a
+    temporary file; the sections are then appended to the output in file name
+    order, followed by the summary and the slowest tests of all reports.
+    """
+    junit_files = sorted(
+        os.path.join(junit_dir, filename)
+        for filename in os.listdir(junit_dir)
+        if filename.endswith(".xml")
+    )
+    with tempfile.TemporaryDirectory() as sections_dir:
+        section_files = [
+            os.path.join(sections_dir, f"{index}.md")
+            for index in range(len(junit_files))
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    _write_section_file,
+                    junit_files,
+                    section_files,
+                    [slowest] * len(junit_files),
                 )
-                markdown_content += f"**Status**: {testcase['status']}\n\n"
-                markdown_content += f"**Time**: {testcase['time']} seconds\n\n"
-                markdown_content += "---\n\n"
-
-            # Aggregate the results
-            total_tests += test_results["total_tests"]
-            total_failures += test_results["failed_tests"]
-            total_errors += test_results["error_tests"]
-
-    # Write summary
-    markdown_content += "## Summary\n\n"
-    markdown_content += f"**Total Tests**: {total_tests}\n\n"
-    markdown_content += f"**Failed**: {total_failures}\n\n"
-    markdown_content += f"**Errors**: {total_errors}\n\n"
-
-    # Write to the markdown file
-    with open(output_file, "w") as md_file:
-        md_file.write(markdown_content)
+            )
+
+        with open(output_file, "w") as md_file:
+            for section_file in section_files:
+                with open(section_file, "r") as section:
+                    shutil.copyfileobj(section, md_file)
+
+            # Write summary
+            md_file.write("## Summary\n\n")
+            md_file.write(
+                f"**Total Tests**: {sum(r['total_tests'] for r in results)}\n\n"
+            )
+            md_file.write(f"**Failed**: {sum(r['failed_tests'] for r in results)}\n\n")
+            md_file.write(f"**Errors**: {sum(r['error_tests'] for r in results)}\n\n")
+
+            slowest_tests = heapq.nlargest(
+                slowest,
+                (entry for result in results for entry in result["slowest_tests"]),
+            )
+            if slowest_tests:
+                md_file.write(f"## Slowest {len(slowest_tests)} Tests\n\n")
+                md_file.write("| Test | Class | Time (s) |\n|---|---|---|\n")
+                for time, name, classname in slowest_tests:
+                    md_file.write(f"| {name} | {classname} | {time:.3f} |\n")
+                md_file.write("\n")
 
 
 if __name__ == "__main__":